@@ -0,0 +1,56 @@
+# Block type inference benchmark: TypeCheckCwhile on the output of explicate control.
+#
+#   python benchmarks/bench_block_types.py [-n CONDITIONALS ...] [-r REPEAT]
+#
+# The source program is a chain of CONDITIONALS if statements, each copying the previous
+# variable into the next one in both branches. Explicate control makes three blocks per
+# conditional and lists them from the end of the program to its start, so the type of
+# each variable is known one round after the type of the previous one.
+# The report gives the number of blocks, the best time of type_check over REPEAT runs and
+# the number of rounds it took.
+
+import argparse
+import ast
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from iup.compiler import PassManager, ShrinkPass, RCOPass, ExplicateControlPass
+from iup.type import TYPE_CHECKERS
+
+
+def program(n):
+    lines = ['v0 = input_int()']
+    for i in range(1, n):
+        lines.append(f'if v{i - 1} < {i}:')
+        lines.append(f'    v{i} = v{i - 1}')
+        lines.append('else:')
+        lines.append(f'    v{i} = v{i - 1}')
+    lines.append(f'print(v{n - 1})')
+    return ast.parse('\n'.join(lines) + '\n')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--conditionals', type=int, nargs='+', default=[100, 200, 400])
+    parser.add_argument('-r', '--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    checker = TYPE_CHECKERS['Cwhile']
+    for n in args.conditionals:
+        manager = PassManager([ShrinkPass(), RCOPass(), ExplicateControlPass()], [])
+        manager.trace = False
+        prog = manager.run(program(n), None) #type: ignore
+        best = float('inf')
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            checker.type_check(prog) #type: ignore
+            best = min(best, time.perf_counter() - start)
+        rounds = getattr(checker, 'rounds', '?')
+        print(f'conditionals {n:5d}  {len(prog.body):5d} blocks  {best * 1000:9.1f} ms  {rounds} rounds') #type: ignore
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+# Batch type checking benchmark.
+#
+#   python benchmarks/bench_check_only.py [-f FILES] [-n STATEMENTS] [-w WORKERS ...]
+#
+# FILES sources of about STATEMENTS statements each, at the three language levels in turn,
+# are written to a temporary directory and type checked with iup.check.check_paths by
+# WORKERS processes. The report gives the wall time for the directory and the number of
+# sources that passed.
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from iup.check import check_paths
+from bench_type_check import program
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-f', '--files', type=int, default=2000)
+    parser.add_argument('-n', '--statements', type=int, default=200)
+    parser.add_argument('-w', '--workers', type=int, nargs='+', default=[1, 2, 4])
+    args = parser.parse_args()
+
+    langs = ['Lvar', 'Lif', 'Lwhile']
+    with tempfile.TemporaryDirectory() as dir:
+        for i in range(args.files):
+            with open(os.path.join(dir, f'p{i}.py'), 'w') as file:
+                file.write(program(args.statements + i % 50, langs[i % 3]))
+        for workers in args.workers:
+            start = time.perf_counter()
+            passed = sum(result['ok'] for result in check_paths([dir], workers=workers))
+            print(f'files {args.files}  workers {workers:2d}  {(time.perf_counter() - start) * 1000:8.1f} ms  '
+                  f'{passed} passed')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+# Compile server benchmark: latency of `main.py` against `main.py --connect` to a warm server.
+#
+#   python benchmarks/bench_compile_server.py [-r REPEAT] [-w WORKERS]
+#
+# Every compilation emulates a small while/if program (-e -v), so gcc is not part of the
+# measurement. The report gives the median wall time of a whole client invocation, and the
+# median round trip of `iup.server.request` issued from an already running process.
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PROGRAM = '''x = input_int()
+y = 0
+i = 0
+while i < x:
+    y = y + i + 2
+    i = i + 1
+if x < 3 and y > 1:
+    print(y)
+else:
+    print(-y)
+'''
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+MAIN = os.path.join(ROOT, 'main.py')
+
+
+def timed(command, env):
+    start = time.perf_counter()
+    subprocess.run(command, env=env, input='5\n', capture_output=True, text=True, check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-r', '--repeat', type=int, default=20)
+    parser.add_argument('-w', '--workers', type=int, default=2)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.path.join(ROOT, 'src') + os.pathsep + env.get('PYTHONPATH', '')
+    sys.path.insert(0, os.path.join(ROOT, 'src'))
+    from iup.server import request
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, 'prog.py')
+        sock = os.path.join(tmp, 'iup.sock')
+        with open(source, 'w') as file:
+            file.write(PROGRAM)
+        server = subprocess.Popen([sys.executable, MAIN, '--serve', sock, '--workers', str(args.workers)],
+                                  env=env, stderr=subprocess.DEVNULL)
+        try:
+            while not os.path.exists(sock):
+                time.sleep(0.05)
+            local = [timed([sys.executable, MAIN, source, '-e', '-v'], env) for _ in range(args.repeat)]
+            client = [timed([sys.executable, MAIN, '--connect', sock, source, '-e', '-v'], env) for _ in range(args.repeat)]
+            trips = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                request(sock, source, source[:-3], ['all'], True, True, input_data='5\n')
+                trips.append(time.perf_counter() - start)
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(f'main.py                 {statistics.median(local) * 1000:8.1f} ms')
+    print(f'main.py --connect       {statistics.median(client) * 1000:8.1f} ms')
+    print(f'request() round trip    {statistics.median(trips) * 1000:8.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+# Benchmark: emitting a large X86Program to a .s file.
+#
+#   python benchmarks/bench_emit_asm.py [-n INSTRUCTIONS] [-b BLOCKS]
+#
+# Compares building the whole text with str() and writing it, against
+# streaming the program block by block with X86Program.write.
+
+import argparse
+import os
+import tempfile
+import time
+
+import iup.x86.x86_ast as x86
+
+
+def make_program(n, blocks):
+    per_block = n // blocks
+    body = {}
+    for b in range(blocks):
+        instrs = []
+        for i in range(per_block - 1):
+            instrs.append(x86.Instr('addq', [x86.Immediate(i), x86.Deref('rbp', -8 * (i % 32 + 1))]))
+        instrs.append(x86.Jump(f'block{b + 1}'))
+        body[f'block{b}'] = instrs
+    return x86.X86Program(body)
+
+
+def timed(command):
+    start = time.perf_counter()
+    command()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', type=int, default=100000, help='instructions')
+    parser.add_argument('-b', type=int, default=10000, help='blocks')
+    args = parser.parse_args()
+
+    prog = make_program(args.n, args.b)
+    with tempfile.TemporaryDirectory() as tmp:
+        target = os.path.join(tmp, 'prog.s')
+
+        def with_str():
+            with open(target, 'w') as file:
+                file.write(str(prog))
+
+        def with_write():
+            with open(target, 'w') as file:
+                prog.write(file)
+
+        print(f'instructions: {args.n}, blocks: {args.b}')
+        print(f'str():        {timed(with_str) * 1000:8.1f} ms')
+        if hasattr(prog, 'write'):
+            print(f'write():      {timed(with_write) * 1000:8.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+# Emulator benchmark: the heap of the x86 emulator against the one of runtime.c.
+#
+#   python benchmarks/bench_emulator_gc.py [-n ITERATIONS] [--keep K] [--heap BYTES]
+#
+# The x86 program allocates like the compiled code: it bumps free_ptr and calls collect
+# when a tuple does not fit before fromspace_end, with the root stack in %r15. Each
+# iteration allocates a tuple of three integers that dies at once, and every K-th also
+# allocates a cell of a list kept in the root stack; the program prints the sum of the
+# list. It runs in the emulator and, if gcc is found, natively with runtime.c; the report
+# gives the time of each run and the counters of their heaps, which must be the same.
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, ROOT)
+
+from tests.heap_programs import COUNTERS, emulate, native, program
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--iterations', type=int, default=3000)
+    parser.add_argument('--keep', type=int, default=4)
+    parser.add_argument('--heap', type=int, default=1024)
+    args = parser.parse_args()
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 20 * args.iterations + 1000))
+
+    prog = program(args.iterations, args.keep, args.heap)
+    runs = {'emulated': emulate(prog)}
+    if shutil.which('gcc'):
+        with tempfile.TemporaryDirectory() as tmp:
+            runs['native'] = native(prog, tmp)
+
+    print(f'{args.iterations} iterations, a cell kept every {args.keep}, {args.heap} byte initial heap')
+    print(f'{"run":>9} {"time ms":>9} {"output":>10} ' + ' '.join(f'{c:>15}' for c in COUNTERS))
+    for name, (output, elapsed, counters) in runs.items():
+        print(f'{name:>9} {elapsed * 1000:9.1f} {output:>10} ' + ' '.join(f'{counters[c]:>15}' for c in COUNTERS))
+    results = {(output, tuple(counters[c] for c in COUNTERS)) for output, _, counters in runs.values()}
+    if len(results) != 1:
+        sys.exit('the emulated and the native heap differ')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+# Explicate control benchmark on long statement lists and deeply nested conditionals.
+#
+#   python benchmarks/bench_explicate.py [-n STATEMENTS ...] [-d DEPTH ...] [--recursion-limit LIMIT]
+#
+# The straight-line program is STATEMENTS assignments in one block. The nested program
+# assigns a chain of DEPTH conditional expressions (x = 1 if a < 1 else 2 if a < 2 else ...)
+# and branches on a chain of the same depth, built directly as an AST since the parser
+# refuses expressions that deep. Both go through shrink and remove complex operands first;
+# the report gives the time of explicate_control and the number of blocks it made.
+
+import argparse
+import ast
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from iup.compiler import PassManager, ShrinkPass, RCOPass, ExplicateControlPass
+
+
+def straight_line(n):
+    lines = ['v0 = input_int()']
+    for i in range(1, n):
+        lines.append(f'v{i} = v{i - 1} + {i % 7}')
+    lines.append(f'print(v{n - 1})')
+    return ast.parse('\n'.join(lines) + '\n')
+
+
+def nested(depth):
+    def less(i):
+        return ast.Compare(ast.Name('a'), [ast.Lt()], [ast.Constant(i)])
+    value: ast.expr = ast.Constant(depth)
+    test: ast.expr = less(depth)
+    for i in reversed(range(depth)):
+        value = ast.IfExp(less(i), ast.Constant(i), value)
+        test = ast.IfExp(less(i), ast.Compare(ast.Name('x'), [ast.Eq()], [ast.Constant(i)]), test)
+    body = [
+        ast.Assign([ast.Name('a')], ast.Call(ast.Name('input_int'), [], [])),
+        ast.Assign([ast.Name('x')], value),
+        ast.If(test, [ast.Expr(ast.Call(ast.Name('print'), [ast.Name('x')], []))], []),
+    ]
+    for line, s in enumerate(body, 1):
+        s.lineno = line
+    return ast.Module(body)
+
+
+def explicate(name, prog):
+    manager = PassManager([ShrinkPass(), RCOPass()], [])
+    manager.trace = False
+    prog = manager.run(prog, None) #type: ignore
+    manager = PassManager([ExplicateControlPass()], [])
+    manager.trace = False
+    start = time.perf_counter()
+    try:
+        res = manager.run(prog, None) #type: ignore
+    except RecursionError:
+        print(f'{name:<24} RecursionError')
+        return
+    print(f'{name:<24} {(time.perf_counter() - start) * 1000:8.1f} ms  {len(res.body)} blocks') #type: ignore
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--statements', type=int, nargs='+', default=[25000, 50000, 100000])
+    parser.add_argument('-d', '--depth', type=int, nargs='+', default=[2500, 5000, 10000])
+    parser.add_argument('--recursion-limit', type=int)
+    args = parser.parse_args()
+    if args.recursion_limit:
+        sys.setrecursionlimit(args.recursion_limit)
+
+    for n in args.statements:
+        explicate(f'statements {n}', straight_line(n))
+    for depth in args.depth:
+        explicate(f'depth {depth}', nested(depth))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+# Expose allocation benchmark: heap checks executed by tuple-construction loops.
+#
+#   python benchmarks/bench_expose_allocation.py [-n ITERATIONS]
+#
+# Each program builds tuples in a loop of ITERATIONS iterations. expose_allocation runs with
+# and without coalescing of heap checks, and the exposed program runs in the Ltup
+# interpreter, which counts the statements it executes and the heap checks among them. The
+# tuples are annotated with their types first, as the Ltup type checker does; the values
+# the interpreter prints must be the ones the source program prints.
+
+import argparse
+import ast
+import contextlib
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from iup.compiler import PassManager, ExposeAllocationPass
+from iup.compiler.compiler import heap_check_bytes
+from iup.interp.interp_Ltup import InterpLtup
+from iup.utils import IntType, TupleType
+
+PROGRAMS = {
+    'pairs': '''
+i = 0
+s = 0
+while i < {n}:
+    p = (i, i + 1)
+    q = (p, i)
+    s = s + q[1] + p[0]
+    i = i + 1
+print(s)
+''',
+    'nested': '''
+i = 0
+s = 0
+while i < {n}:
+    t = ((i, 1), (2, (i, i)), i)
+    s = s + t[1][1][0] + t[2]
+    i = i + 1
+print(s)
+''',
+    'records': '''
+i = 0
+s = 0
+while i < {n}:
+    a = (i, 1, 2)
+    b = (a, a)
+    c = (b, i + 2)
+    print(c[1])
+    d = (c, b, a)
+    s = s + d[2][0]
+    i = i + 1
+print(s)
+''',
+}
+
+
+class CountingInterp(InterpLtup):
+    def __init__(self):
+        self.statements = 0
+        self.checks = 0
+
+    def interp_stmt(self, s, env, cont):
+        self.statements += 1
+        if heap_check_bytes(s) is not None:
+            self.checks += 1
+        return super().interp_stmt(s, env, cont)
+
+
+def annotate(prog):
+    env = {}
+
+    def type_of(e):
+        match e:
+            case ast.Tuple(es, ast.Load()):
+                e.has_type = TupleType([type_of(elt) for elt in es])
+                return e.has_type
+            case ast.Name(id):
+                return env.get(id, IntType())
+            case ast.Subscript(tup, ast.Constant(i), ast.Load()):
+                return type_of(tup).types[i]
+            case _:
+                for child in ast.iter_child_nodes(e):
+                    if isinstance(child, ast.expr):
+                        type_of(child)
+                return IntType()
+
+    for node in ast.walk(prog):
+        match node:
+            case ast.Assign([ast.Name(id)], value):
+                env[id] = type_of(value)
+            case ast.Expr(value) | ast.While(value):
+                type_of(value)
+
+
+def run(prog):
+    interp = CountingInterp()
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        interp.interp(prog)
+    return out.getvalue(), interp
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--iterations', type=int, default=300)
+    args = parser.parse_args()
+    sys.setrecursionlimit(100000)
+
+    print(f'{"program":>8} {"coalescing":>10} {"statements":>10} {"heap checks":>11}')
+    for name, source in PROGRAMS.items():
+        source = source.format(n=args.iterations)
+        # the interpreters print without newlines
+        expected = io.StringIO()
+        exec(source, {'print': lambda x: expected.write(str(x))})
+        for coalescing in [False, True]:
+            prog = ast.parse(source)
+            annotate(prog)
+            expose = ExposeAllocationPass()
+            expose.coalescing = coalescing
+            manager = PassManager([expose], [])
+            manager.trace = False
+            output, interp = run(manager.run(prog, None)) #type: ignore
+            if output != expected.getvalue():
+                sys.exit(f'{name}: the exposed program prints something else')
+            print(f'{name:>8} {str(coalescing):>10} {interp.statements:>10} {interp.checks:>11}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+# Front end benchmark: shrink + remove complex operands + explicate control as three
+# passes, against the fused front_end pass.
+#
+#   python benchmarks/bench_front_end.py [-d DEPTH ...] [-s STATEMENTS] [-r REPEAT]
+#
+# Every statement prints a left-leaning sum of DEPTH operands, nested in conditionals with
+# `and`, so each level of the tree makes a temporary. The report gives the best time of
+# each front end over REPEAT runs, and checks that both produce the same CProgram.
+
+import argparse
+import ast
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from iup.compiler import PassManager, ShrinkPass, RCOPass, ExplicateControlPass, FrontEndPass
+
+
+def program(depth, statements):
+    lines = ['a = input_int()', 'b = 1']
+    for i in range(statements):
+        operands = ' + '.join(['a', '-b', f'(a if b < {i} else b)'] * (depth // 3))
+        lines.append(f'if a < {i} and b < a:')
+        lines.append(f'    print({operands})')
+        lines.append(f'b = {operands}')
+    return ast.parse('\n'.join(lines) + '\n')
+
+
+def lower(transforms, prog):
+    manager = PassManager(transforms, [])
+    manager.trace = False
+    return manager.run(prog, None) #type: ignore
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-d', '--depth', type=int, nargs='+', default=[300, 600, 1200])
+    parser.add_argument('-s', '--statements', type=int, default=10)
+    parser.add_argument('-r', '--repeat', type=int, default=3)
+    args = parser.parse_args()
+    sys.setrecursionlimit(100000)
+
+    fronts = {
+        'separate': lambda: [ShrinkPass(), RCOPass(), ExplicateControlPass()],
+        'fused': lambda: [FrontEndPass()],
+    }
+    for depth in args.depth:
+        results = {}
+        for name, transforms in fronts.items():
+            best = float('inf')
+            for _ in range(args.repeat):
+                prog = program(depth, args.statements)
+                start = time.perf_counter()
+                res = lower(transforms(), prog)
+                best = min(best, time.perf_counter() - start)
+            results[name] = str(res)
+            print(f'depth {depth:5d}  {name:<10} {best * 1000:8.1f} ms')
+        assert results['separate'] == results['fused']
+
+
+if __name__ == '__main__':
+    main()
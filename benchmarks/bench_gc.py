@@ -0,0 +1,59 @@
+# Runtime benchmark: the semispace and the generational collector of runtime.c.
+#
+#   python benchmarks/bench_gc.py [--live CELLS] [--steps STEPS] [--heap BYTES] [--cflags FLAGS]
+#
+# The mutator is C that allocates the way ExposeAllocationPass does: it bumps free_ptr, and
+# calls collect when the tuple does not fit before fromspace_end. It keeps a ring of CELLS
+# tuples live, allocates short-lived tuples at every step, and at every 16th step stores a
+# new tuple in a cell of the ring, calling record_write. It prints a sum over the ring,
+# which must be the same for both collectors; the report gives the wall time of the run
+# and the counters the runtime writes at exit with IUP_GC_STATS set. The mutator is
+# tests/heap_programs.py, which the tests of the collectors run too.
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, ROOT)
+
+from tests.heap_programs import build_mutator, run_mutator
+
+
+def run(binary, args, collector):
+    start = time.perf_counter()
+    out, stats = run_mutator(binary, args.live, args.steps, args.heap, collector)
+    return out, time.perf_counter() - start, stats
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--live', type=int, default=50000)
+    parser.add_argument('--steps', type=int, default=5000000)
+    parser.add_argument('--heap', type=int, default=16384)
+    parser.add_argument('--cflags', default='-g -std=c99')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        binary = build_mutator(tmp, args.cflags.split())
+
+        print(f'{args.live} live cells, {args.steps} steps, {args.heap} byte initial heap, {args.cflags}')
+        print(f'{"collector":>13} {"time ms":>9} {"collections":>11} {"major":>6} '
+              f'{"copied MB":>10} {"pause ms":>9} {"max ms":>8} {"heap KB":>8}')
+        results = set()
+        for collector in ['semispace', 'generational']:
+            out, elapsed, stats = run(binary, args, collector)
+            results.add(out)
+            print(f'{collector:>13} {elapsed * 1000:9.1f} {stats["collections"]:>11} '
+                  f'{stats["major_collections"]:>6} {int(stats["bytes_copied"]) / 2**20:10.1f} '
+                  f'{float(stats["pause_ms"]):9.1f} {float(stats["max_pause_ms"]):8.2f} '
+                  f'{int(stats["heap_bytes"]) // 1024:8}')
+        if len(results) != 1:
+            sys.exit(f'the collectors disagree: {sorted(results)}')
+
+
+if __name__ == '__main__':
+    main()
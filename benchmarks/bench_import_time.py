@@ -0,0 +1,58 @@
+# Startup benchmark: import time of the iup modules and x86 parser construction.
+#
+#   python benchmarks/bench_import_time.py [-r REPEAT]
+#
+# Import times are the cumulative times reported by `python -X importtime`,
+# each measured in a fresh interpreter; the report gives the median.
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+MODULES = ['iup', 'iup.compiler', 'iup.x86.eval_x86']
+
+PARSER_BUILD = '''
+import time
+start = time.perf_counter()
+from iup.lark import Lark
+from iup.x86.parser_x86 import x86_grammar
+Lark(x86_grammar, start='prog', parser='lalr', cache={cache})
+print(time.perf_counter() - start)
+'''
+
+
+def run(args):
+    env = dict(os.environ)
+    src = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+    env['PYTHONPATH'] = src + os.pathsep + env.get('PYTHONPATH', '')
+    return subprocess.run([sys.executable] + args, env=env, capture_output=True, text=True, check=True)
+
+
+def import_time(module):
+    err = run(['-X', 'importtime', '-c', f'import {module}']).stderr
+    for line in err.splitlines():
+        _, _, cumulative, name = [s.strip() for s in line.replace(':', '|', 1).split('|')]
+        if name == module:
+            return int(cumulative)
+    raise Exception('no import time for ' + module)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-r', '--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    for module in MODULES:
+        times = [import_time(module) for _ in range(args.repeat)]
+        print(f'import {module:<20} {statistics.median(times) / 1000:8.1f} ms')
+
+    run(['-c', PARSER_BUILD.format(cache=True)])  # make sure the cache exists
+    for cache in [False, True]:
+        times = [float(run(['-c', PARSER_BUILD.format(cache=cache)]).stdout) for _ in range(args.repeat)]
+        print(f'x86 parser (cache={cache!s:<5})      {statistics.median(times) * 1000:8.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+# Incremental type checking benchmark on edits to a long program.
+#
+#   python benchmarks/bench_incremental_type_check.py [-n STATEMENTS ...] [-l LANG] [-r REPEAT]
+#
+# The program is the one of bench_type_check.py. Each edit changes a constant at the start,
+# in the middle or at the end of the program, or appends a print. After the edit the
+# program is checked again three ways: parsed and checked in full by the checker of LANG
+# in iup.type.TYPE_CHECKERS; parsed in full and checked by an IncrementalTypeChecker that
+# checked the program before the edit; and by the same incremental checker, on the module
+# from before the edit with only the edited statement parsed and put in, as an editor that
+# parses incrementally would do. The report gives the best time of each over REPEAT runs
+# and the number of statements the incremental checker checked.
+
+import argparse
+import ast
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from iup.type import TYPE_CHECKERS, IncrementalTypeChecker
+from bench_type_check import program
+
+
+def edits(n, lang):
+    lines = program(n, lang).splitlines()
+    for name, i in [('start', 1), ('middle', len(lines) // 2), ('end', len(lines) - 2)]:
+        while not lines[i].startswith('v'):
+            i += 1
+        yield name, lines[i], lines[i].rsplit('+', 1)[0] + '+ 9'
+    yield 'append', None, f'print(v{n - 1} + 1)'
+
+
+def edit(prog, line, new):
+    body = prog.body.copy()
+    stmt = ast.parse(new).body[0]
+    if line is None:
+        body.append(stmt)
+    else:
+        body[next(i for i, s in enumerate(body) if ast.unparse(s) == line)] = stmt
+    return ast.Module(body, [])
+
+
+def best(repeat, run, setup=lambda: None):
+    time_ = float('inf')
+    for _ in range(repeat):
+        setup()
+        start = time.perf_counter()
+        run()
+        time_ = min(time_, time.perf_counter() - start)
+    return time_ * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--statements', type=int, nargs='+', default=[5000, 20000])
+    parser.add_argument('-l', '--lang', default='Lwhile')
+    parser.add_argument('-r', '--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    checker = TYPE_CHECKERS[args.lang]
+    for n in args.statements:
+        source = program(n, args.lang)
+        before = ast.parse(source)
+        incremental = IncrementalTypeChecker(checker)
+        for name, line, new in edits(n, args.lang):
+            edited = source.replace(line, new) if line is not None else source + new + '\n'
+            full = best(args.repeat, lambda: checker.type_check(ast.parse(edited)))
+            reset = lambda: incremental.type_check(before)
+            reparse = best(args.repeat, lambda: incremental.type_check(ast.parse(edited)), reset)
+            checked = incremental.checked
+            modules = []
+            def splice_setup():
+                reset()
+                modules.append(edit(before, line, new))
+            splice = best(args.repeat, lambda: incremental.type_check(modules.pop()), splice_setup)
+            print(f'statements {n:6d}  edit {name:<7}  full {full:7.1f} ms  '
+                  f'incremental: reparse {reparse:7.1f} ms  splice {splice:6.1f} ms  '
+                  f'{checked} checked')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+# Benchmark: a tuple crossing typed/untyped function boundaries in InterpLcast.
+#
+#   python benchmarks/bench_lcast_proxies.py [-n ITERATIONS]
+#
+# The program calls an untyped identity function through a cast to a typed
+# signature on every loop iteration and reads the returned tuple:
+#
+#   def f(x):
+#       return x
+#   t = (1, 2)
+#   while i < n:
+#       t = (f : Callable[[Any], Any] => Callable[[T], T])(t)
+#       s = s + t[0]
+#       i = i + 1
+#   print(s)
+#
+# Each call casts the tuple T -> Any and back, so without proxy collapsing the
+# proxy chain of t grows by two wrappers per iteration.
+
+import argparse
+import ast
+import io
+import sys
+import time
+from contextlib import redirect_stdout
+
+from iup.interp.interp_Lcast import InterpLcast
+from iup.utils import AnyType, Cast, FunctionType, IntType, TupleType
+
+SOURCE = '''
+def f(x):
+    return x
+t = (1, 2)
+s = 0
+i = 0
+while i < {n}:
+    t = f(t)
+    s = s + t[0]
+    i = i + 1
+print(s)
+'''
+
+
+class CastCalls(ast.NodeTransformer):
+    def visit_Call(self, node):
+        if isinstance(node.func, ast.Name) and node.func.id == 'f':
+            tup = TupleType([IntType(), IntType()])
+            node.func = Cast(node.func, FunctionType([AnyType()], AnyType()),
+                             FunctionType([tup], tup))
+        return node
+
+
+class RecordingInterp(InterpLcast):
+    def interp(self, p):
+        self.env = {}
+        self.interp_stmts(p.body, self.env)
+
+
+def proxy_depth(v):
+    depth = 0
+    while not isinstance(v, list):
+        v = v.tup
+        depth += 1
+    return depth
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', type=int, default=300, help='boundary crossings')
+    args = parser.parse_args()
+
+    sys.setrecursionlimit(1000 * args.n + 10000)
+    prog = CastCalls().visit(ast.parse(SOURCE.format(n=args.n)))
+    interp = RecordingInterp()
+
+    output = io.StringIO()
+    start = time.perf_counter()
+    with redirect_stdout(output):
+        interp.interp(prog)
+    elapsed = time.perf_counter() - start
+
+    print(f'crossings:     {args.n}')
+    print(f'output:        {output.getvalue()}')
+    print(f'proxy depth:   {proxy_depth(interp.env["t"])}')
+    print(f'time/crossing: {elapsed / args.n * 1e6:.1f} us')
+
+
+if __name__ == '__main__':
+    main()
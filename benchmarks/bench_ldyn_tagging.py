@@ -0,0 +1,73 @@
+# Microbenchmark: tagged-value allocations in InterpLdyn arithmetic loops.
+#
+#   python benchmarks/bench_ldyn_tagging.py [-n ITERATIONS]
+#
+# Every loop iteration evaluates one comparison and three arithmetic
+# operations; the report gives Tagged objects allocated per operation and the
+# time per operation.
+
+import argparse
+import ast
+import io
+import sys
+import time
+from contextlib import redirect_stdout
+
+from iup.interp.interp_Ldyn import InterpLdyn, Tagged
+
+PROGRAM = '''
+i = 0
+s = 0
+while i < {n}:
+    s = s + i - 1
+    i = i + 1
+print(s)
+'''
+
+OPS_PER_ITERATION = 4
+
+
+def count_allocations(command):
+    count = 0
+    init = Tagged.__init__
+
+    def counting_init(self, *args):
+        nonlocal count
+        count += 1
+        init(self, *args)
+
+    Tagged.__init__ = counting_init
+    try:
+        command()
+    finally:
+        Tagged.__init__ = init
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', type=int, default=2000, help='loop iterations')
+    args = parser.parse_args()
+
+    sys.setrecursionlimit(100 * args.n + 10000)
+    prog = ast.parse(PROGRAM.format(n=args.n))
+    interp = InterpLdyn()
+    ops = OPS_PER_ITERATION * args.n
+
+    def run():
+        with redirect_stdout(io.StringIO()):
+            interp.interp(prog)
+
+    allocations = count_allocations(run)
+    start = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - start
+
+    print(f'iterations:        {args.n}')
+    print(f'operations:        {ops}')
+    print(f'Tagged allocs/op:  {allocations / ops:.2f}')
+    print(f'time/op:           {elapsed / ops * 1e6:.2f} us')
+
+
+if __name__ == '__main__':
+    main()
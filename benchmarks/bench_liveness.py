@@ -0,0 +1,53 @@
+# Liveness and interference benchmark.
+#
+#   python benchmarks/bench_liveness.py [-n STATEMENTS] [-r REPEAT]
+#
+# The source program keeps many variables live at once (every statement reads a variable
+# from halfway back), so both passes hash and compare operands heavily. It is lowered
+# through select instructions once; the report gives the best time of uncover_live and
+# build_interference over REPEAT runs.
+
+import argparse
+import ast
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from iup.compiler import PassManager, ShrinkPass, RCOPass, ExplicateControlPass, SelectInstrPass
+from iup.compiler import UncoverLivePass, BuildInterferencePass
+
+
+def program(n):
+    lines = ['v0 = input_int()']
+    for i in range(1, n):
+        lines.append(f'v{i} = v{i - 1} + {i % 7} - v{i // 2}')
+    lines.append('print(' + ' + '.join(f'v{i}' for i in range(n // 2, n)) + ')')
+    return ast.parse('\n'.join(lines) + '\n')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--statements', type=int, default=1000)
+    parser.add_argument('-r', '--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    manager = PassManager([ShrinkPass(), RCOPass(), ExplicateControlPass(), SelectInstrPass()],
+                          [UncoverLivePass(), BuildInterferencePass()])
+    manager.trace = False
+    prog = manager.run(program(args.statements), None) #type: ignore
+    ctx = manager.start(prog)
+    print(f'instructions: {sum(len(ss) for ss in prog.body.values())}') #type: ignore
+
+    for name in ['uncover_live', 'build_interference']:
+        best = float('inf')
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            ctx.run_analysis(name)
+            best = min(best, time.perf_counter() - start)
+        print(f'{name:<20} {best * 1000:8.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+# Parse cache benchmark on a sweep that reads every source several times.
+#
+#   python benchmarks/bench_parse_cache.py [-f FILES] [-n STATEMENTS] [-c CONSUMERS] [-r REPEAT]
+#
+# FILES different sources of about STATEMENTS statements are written to a temporary directory. A sweep
+# gets the module of every source CONSUMERS times, as the type checker and the managers of
+# a test sweep do, either by parsing the file each time or through iup.parse_cache. The
+# report gives the best time of a sweep over REPEAT runs; the cache is emptied before each.
+
+import argparse
+import ast
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from iup import parse_cache
+from bench_type_check import program
+
+
+def parse(path):
+    with open(path) as file:
+        return ast.parse(file.read())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-f', '--files', type=int, default=200)
+    parser.add_argument('-n', '--statements', type=int, default=500)
+    parser.add_argument('-c', '--consumers', type=int, nargs='+', default=[1, 2, 3])
+    parser.add_argument('-r', '--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as dir:
+        files = []
+        for i in range(args.files):
+            files.append(os.path.join(dir, f'p{i}.py'))
+            with open(files[-1], 'w') as file:
+                file.write(program(args.statements + i % 50, 'Lwhile') + f'print({i})\n')
+        for consumers in args.consumers:
+            for name, read in [('parse', parse), ('parse_cache', parse_cache.parse_file)]:
+                best = float('inf')
+                for _ in range(args.repeat):
+                    parse_cache.parsed.clear()
+                    start = time.perf_counter()
+                    for path in files:
+                        for _ in range(consumers):
+                            read(path)
+                    best = min(best, time.perf_counter() - start)
+                print(f'consumers {consumers}  {name:<11} {best * 1000:8.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+# Partial evaluation and copy propagation benchmark.
+#
+#   python benchmarks/bench_partial_eval.py [-n STATEMENTS] [-r REPEAT]
+#
+# The source program mixes constant arithmetic, copies and conditionals on constants with
+# real work, like code written with named constants. It is lowered through select
+# instructions with and without partial_eval and copy_propagation; the report gives the
+# variables and instructions of the X86Program and the best time of the passes and of
+# uncover_live + build_interference over REPEAT runs.
+
+import argparse
+import ast
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from iup.compiler import PassManager, PartialEvalPass, ShrinkPass, RCOPass, ExplicateControlPass
+from iup.compiler import CopyPropagationPass, SelectInstrPass, UncoverLivePass, BuildInterferencePass
+import iup.x86.x86_ast as x86
+
+
+def program(n):
+    lines = ['size = 8', 'v0 = input_int()', 'debug = 1 < 0']
+    for i in range(1, n):
+        match i % 4:
+            case 0:
+                lines.append(f'k{i} = size + {i % 5} - 2')
+                lines.append(f'v{i} = v{i - 1} + k{i}')
+            case 1:
+                lines.append(f'w{i} = v{i - 1}')
+                lines.append(f'v{i} = w{i} - (-(size - 3))')
+            case 2:
+                lines.append(f'v{i} = v{i - 1} + (1 if debug else size + 1)')
+            case 3:
+                lines.append(f'v{i} = v{i - 1} - v{i // 2}')
+    lines.append(f'print(v{n - 1})')
+    return ast.parse('\n'.join(lines) + '\n')
+
+
+def variables(prog):
+    return len({a for ss in prog.body.values() for i in ss if isinstance(i, x86.Instr)
+                for a in i.args if isinstance(a, x86.Variable)})
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--statements', type=int, default=2000)
+    parser.add_argument('-r', '--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    pipelines = {
+        'plain': lambda: [ShrinkPass(), RCOPass(), ExplicateControlPass(), SelectInstrPass()],
+        'simplified': lambda: [PartialEvalPass(), ShrinkPass(), RCOPass(), ExplicateControlPass(),
+                               CopyPropagationPass(), SelectInstrPass()],
+    }
+    for name, transforms in pipelines.items():
+        lower = analyse = float('inf')
+        for _ in range(args.repeat):
+            manager = PassManager(transforms(), [UncoverLivePass(), BuildInterferencePass()])
+            manager.trace = False
+            start = time.perf_counter()
+            prog = manager.run(program(args.statements), None) #type: ignore
+            lower = min(lower, time.perf_counter() - start)
+            ctx = manager.start(prog)
+            start = time.perf_counter()
+            ctx.run_analysis('build_interference')
+            analyse = min(analyse, time.perf_counter() - start)
+        instrs = sum(len(ss) for ss in prog.body.values()) #type: ignore
+        print(f'{name:<11} {variables(prog):6d} variables  {instrs:6d} instructions  '
+              f'lower {lower * 1000:7.1f} ms  liveness + interference {analyse * 1000:8.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
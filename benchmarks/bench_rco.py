@@ -0,0 +1,53 @@
+# Remove complex operands benchmark on long operand chains.
+#
+#   python benchmarks/bench_rco.py [-n OPERANDS ...] [--recursion-limit LIMIT]
+#
+# The program prints one left-leaning sum of OPERANDS terms (a + -b + a + -b ...), built
+# directly as an AST since the parser refuses expressions that deep. Every level makes a
+# temporary. The report gives the time of remove_complex_operands and the number of
+# statements it produced; --recursion-limit is only needed to time a recursive RCO.
+
+import argparse
+import ast
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from iup.compiler import PassManager, RCOPass
+
+
+def program(n):
+    e: ast.expr = ast.Name('a')
+    for i in range(1, n):
+        term = ast.Name('a') if i % 2 == 0 else ast.UnaryOp(ast.USub(), ast.Name('b'))
+        e = ast.BinOp(e, ast.Add(), term)
+    print_ = ast.Expr(ast.Call(ast.Name('print'), [e], []))
+    print_.lineno = 3
+    return ast.Module([ast.Assign([ast.Name('a')], ast.Constant(1)), ast.Assign([ast.Name('b')], ast.Constant(2)), print_])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--operands', type=int, nargs='+', default=[12500, 25000, 50000])
+    parser.add_argument('--recursion-limit', type=int)
+    args = parser.parse_args()
+    if args.recursion_limit:
+        sys.setrecursionlimit(args.recursion_limit)
+
+    for n in args.operands:
+        prog = program(n)
+        manager = PassManager([RCOPass()], [])
+        manager.trace = False
+        start = time.perf_counter()
+        try:
+            res = manager.run(prog, None) #type: ignore
+        except RecursionError:
+            print(f'operands {n:6d}  RecursionError')
+            continue
+        print(f'operands {n:6d}  {(time.perf_counter() - start) * 1000:8.1f} ms  {len(res.body)} statements') #type: ignore
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+# Sandbox benchmark: running compiled test binaries through a shell against iup.sandbox.
+#
+#   python benchmarks/bench_sandbox.py [-b BINARIES] [-w WORKERS ...]
+#
+# A small if program is compiled once and copied to BINARIES test binaries, each with its
+# input and golden output, so a run costs about what starting a process does. The shell run
+# is what tests/test_compiler.check_pass did: `binary < in > out` and `diff -b` with
+# os.system. The sandbox run is run_binaries with WORKERS at a time, comparing the output
+# in memory. The report gives the wall time for all the binaries, the number that passed,
+# and the largest runtime and max RSS among the sandboxed runs.
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from iup import compile
+from iup.compiler import LwhileManager
+from iup.sandbox import run_binaries
+
+PROGRAM = '''x = input_int()
+y = x + 3
+if x < 5:
+    print(y + x)
+else:
+    print(x - y)
+'''
+
+
+def shell_run(tests):
+    passed = 0
+    for binary, input_file, golden in tests:
+        os.system(f'{binary} < {input_file} > {binary}.out')
+        passed += os.system(f'diff --strip-trailing-cr -b {binary}.out {golden} > /dev/null') == 0
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-b', '--binaries', type=int, default=200)
+    parser.add_argument('-w', '--workers', type=int, nargs='+', default=[1, 2, 4])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as dir:
+        source = os.path.join(dir, 'prog.py')
+        with open(source, 'w') as file:
+            file.write(PROGRAM)
+        compile(source, os.path.join(dir, 'prog'), LwhileManager)
+        tests = []
+        for i in range(args.binaries):
+            binary = os.path.join(dir, f't{i}')
+            shutil.copy(os.path.join(dir, 'prog'), binary)
+            with open(binary + '.in', 'w') as file:
+                file.write(f'{i}\n')
+            with open(binary + '.golden', 'w') as file:
+                file.write(str(2 * i + 3 if i < 5 else -3))
+            tests.append((binary, binary + '.in', binary + '.golden'))
+
+        start = time.perf_counter()
+        passed = shell_run(tests)
+        print(f'binaries {args.binaries}  shell       {(time.perf_counter() - start) * 1000:8.1f} ms  {passed} passed')
+
+        jobs = []
+        goldens = []
+        for binary, input_file, golden in tests:
+            with open(input_file) as file:
+                jobs.append((binary, file.read()))
+            with open(golden) as file:
+                goldens.append(file.read())
+        for workers in args.workers:
+            start = time.perf_counter()
+            results = list(run_binaries(jobs, workers))
+            elapsed = time.perf_counter() - start
+            passed = sum(result['stdout'] == golden for result, golden in zip(results, goldens))
+            print(f'binaries {args.binaries}  workers {workers:2d}  {elapsed * 1000:8.1f} ms  {passed} passed  '
+                  f'max time {max(r["time"] for r in results):6.1f} ms  '
+                  f'max RSS {max(r["max_rss"] for r in results)} KB')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+# Type checker benchmark on long statement lists.
+#
+#   python benchmarks/bench_type_check.py [-n STATEMENTS ...] [-l LANG ...] [--recursion-limit LIMIT]
+#
+# The program is STATEMENTS top-level statements: assignments and prints, with an if and a
+# while every 100 statements where the language has them. Each language in LANG type
+# checks it with its checker in iup.type.TYPE_CHECKERS; the report gives the time.
+# --recursion-limit is only needed to time a checker that recurses on the statement list.
+
+import argparse
+import ast
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from iup.type import TYPE_CHECKERS
+
+
+def program(n, lang):
+    lines = ['v0 = input_int()']
+    for i in range(1, n):
+        if i % 100 == 0 and lang != 'Lvar':
+            lines.append(f'if v{i - 1} < {i}:')
+            lines.append(f'    print(v{i - 1})')
+            lines.append('else:')
+            lines.append(f'    print({i})')
+        if i % 100 == 0 and lang not in ['Lvar', 'Lif']:
+            lines.append(f'while v{i - 1} < {i}:')
+            lines.append(f'    v{i - 1} = v{i - 1} + 1')
+        lines.append(f'v{i} = v{i - 1} + {i % 7}')
+    lines.append(f'print(v{n - 1})')
+    return '\n'.join(lines) + '\n'
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--statements', type=int, nargs='+', default=[12500, 25000, 50000])
+    parser.add_argument('-l', '--lang', nargs='+', default=['Lvar', 'Lif', 'Lwhile'])
+    parser.add_argument('--recursion-limit', type=int)
+    args = parser.parse_args()
+    if args.recursion_limit:
+        sys.setrecursionlimit(args.recursion_limit)
+
+    for n in args.statements:
+        for lang in args.lang:
+            prog = ast.parse(program(n, lang))
+            start = time.perf_counter()
+            try:
+                TYPE_CHECKERS[lang].type_check(prog)
+            except RecursionError:
+                print(f'{lang:<8} statements {n:6d}  RecursionError')
+                continue
+            print(f'{lang:<8} statements {n:6d}  {(time.perf_counter() - start) * 1000:8.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+# Type construction and equality benchmark on large tuple and function types.
+#
+#   python benchmarks/bench_type_equality.py [-w WIDTH] [-d DEPTH ...] [-r REPEAT]
+#
+# Two copies of a type are built separately: a tree of tuples of WIDTH elements, DEPTH
+# levels deep, with a function type over the tuples of the level below at every level.
+# The report gives the time to build one copy and the best time over REPEAT runs of 1000
+# checks that the copies are equal with check_type_equal of TYPE_CHECKERS['Lwhile'].
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from iup.type import TYPE_CHECKERS
+from iup.utils import IntType, BoolType, TupleType, FunctionType
+
+
+def wide_type(width, depth):
+    if depth == 0:
+        return IntType() if width % 2 else BoolType()
+    elts = [wide_type(width, depth - 1) for _ in range(width - 1)]
+    return TupleType(elts + [FunctionType(elts, TupleType(elts))])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-w', '--width', type=int, default=4)
+    parser.add_argument('-d', '--depth', type=int, nargs='+', default=[3, 4, 5])
+    parser.add_argument('-r', '--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    checker = TYPE_CHECKERS['Lwhile']
+    for depth in args.depth:
+        start = time.perf_counter()
+        t1 = wide_type(args.width, depth)
+        build = time.perf_counter() - start
+        t2 = wide_type(args.width, depth)
+        check = float('inf')
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            for _ in range(1000):
+                checker.check_type_equal(t1, t2, None)
+            check = min(check, time.perf_counter() - start)
+        print(f'width {args.width}  depth {depth:2d}  build {build * 1000:8.1f} ms  '
+              f'1000 equality checks {check * 1000:9.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+# Memory benchmark: bytes per instruction of the X86Program made by select instructions.
+#
+#   python benchmarks/bench_x86_memory.py [-n STATEMENTS]
+#
+# The source program is straight-line arithmetic with a loop every 100 statements. It is
+# lowered to the C-like language first, then select instructions runs under tracemalloc;
+# the report gives the memory still allocated by its result, divided by the number of
+# instructions, and the same for the CProgram made by explicate control.
+
+import argparse
+import ast
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from iup.compiler import PassManager, ShrinkPass, RCOPass, ExplicateControlPass, SelectInstrPass
+
+
+def program(n):
+    lines = ['v0 = input_int()']
+    for i in range(1, n):
+        if i % 100 == 0:
+            lines.append(f'while v{i - 1} < {i}:')
+            lines.append(f'    v{i - 1} = v{i - 1} + 1')
+            lines.append(f'v{i} = v{i - 1}')
+        else:
+            lines.append(f'v{i} = v{i - 1} + {i % 7} - v{i // 2}')
+    lines.append(f'print(v{n - 1})')
+    return ast.parse('\n'.join(lines) + '\n')
+
+
+def measure(transforms, prog):
+    manager = PassManager(transforms, [])
+    manager.trace = False
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    res = manager.run(prog, None) #type: ignore
+    used = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    return res, used
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--statements', type=int, default=20000)
+    args = parser.parse_args()
+
+    cprog, cbytes = measure([ShrinkPass(), RCOPass(), ExplicateControlPass()], program(args.statements))
+    stmts = sum(len(ss) for ss in cprog.body.values())
+    print(f'C-like statements:  {stmts:8d}  {cbytes / stmts:7.1f} bytes/stmt')
+
+    xprog, xbytes = measure([SelectInstrPass()], cprog)
+    instrs = sum(len(ss) for ss in xprog.body.values())
+    print(f'x86 instructions:   {instrs:8d}  {xbytes / instrs:7.1f} bytes/instr')
+
+
+if __name__ == '__main__':
+    main()
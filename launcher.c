@@ -0,0 +1,68 @@
+// Runs a binary for iup.sandbox under resource limits:
+//   launcher report_fd cpu_seconds memory_bytes binary [args]
+// and writes its wait status and resource usage to report_fd:
+//   status user_us system_us max_rss
+// The usage of a child includes the peak RSS of the process it was
+// forked from, so the sandbox forks the binary from this small process
+// rather than from Python. The limits are set in the child, between
+// fork and exec; it gets SIGXCPU at cpu_seconds of CPU time and SIGKILL
+// one second later, and its allocations fail beyond memory_bytes of
+// address space. The binary inherits stdin, stdout and stderr.
+#define _DEFAULT_SOURCE
+#define _POSIX_C_SOURCE 200809L
+#include <errno.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <sys/resource.h>
+#include <sys/types.h>
+#include <sys/wait.h>
+#include <unistd.h>
+
+static void set_limit(int resource, rlim_t soft, rlim_t hard, const char* name)
+{
+  struct rlimit limit = { soft, hard };
+  if (setrlimit(resource, &limit) != 0) {
+    perror(name);
+    _exit(126);
+  }
+}
+
+int main(int argc, char** argv)
+{
+  if (argc < 5) {
+    fprintf(stderr, "usage: launcher report_fd cpu_seconds memory_bytes binary [args]\n");
+    return 2;
+  }
+  int report = atoi(argv[1]);
+  rlim_t cpu_seconds = strtoull(argv[2], NULL, 10);
+  rlim_t memory_bytes = strtoull(argv[3], NULL, 10);
+
+  pid_t pid = fork();
+  if (pid < 0) {
+    perror("launcher: fork");
+    return 2;
+  }
+  if (pid == 0) {
+    close(report);
+    set_limit(RLIMIT_CPU, cpu_seconds, cpu_seconds + 1, "launcher: RLIMIT_CPU");
+    set_limit(RLIMIT_AS, memory_bytes, memory_bytes, "launcher: RLIMIT_AS");
+    set_limit(RLIMIT_CORE, 0, 0, "launcher: RLIMIT_CORE");
+    execv(argv[4], argv + 4);
+    perror("launcher: exec");
+    _exit(127);
+  }
+
+  int status;
+  struct rusage usage;
+  while (wait4(pid, &status, 0, &usage) < 0) {
+    if (errno != EINTR) {
+      perror("launcher: wait4");
+      return 2;
+    }
+  }
+  dprintf(report, "%d %ld %ld %ld\n", status,
+          (long)usage.ru_utime.tv_sec * 1000000 + (long)usage.ru_utime.tv_usec,
+          (long)usage.ru_stime.tv_sec * 1000000 + (long)usage.ru_stime.tv_usec,
+          (long)usage.ru_maxrss);
+  return 0;
+}
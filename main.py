@@ -1,45 +1,75 @@
 import argparse
-from typing import List
-from iup.compiler import AnalysisPass, TransformPass, Pass, Program, LwhileManager
-from iup import ALL_PASSES, compile, PassManager
+import sys
+from typing import List, Optional, TYPE_CHECKING
 
-class MainPassManager(PassManager):
+if TYPE_CHECKING:
+    from iup.compiler import PassManager
 
-    test: str
-    test_dir: str
-
-    def run(self, prog: Program, manager: 'PassManager') -> Program:
-        self.prog = prog
-        
-        for trans in self.transforms:
-            # print(f"Run trans {trans.name}")
-            self.prog = trans.run(self.prog, self)
-            # print(f"result:\n{self.prog}\n")
-        
-        self.cache = {}
-        return self.prog
-    
 parser = argparse.ArgumentParser()
-parser.add_argument('source', type=str, help='source file')
+parser.add_argument('source', type=str, nargs='?', help='source file')
 parser.add_argument('-o', '--output', type=str, help='output file')
 parser.add_argument('-e', '--emulate', action='store_true', help='emulate the target assembly code')
 parser.add_argument('-p', '--passes', type=str, help='passes to run', nargs='+', default=['all'])
 parser.add_argument('-v', '--verbose', action="store_true")
+parser.add_argument('--profile', type=str, help='with -e, write an execution profile (.json or flat text) to this file')
+parser.add_argument('--use-profile', type=str, help='optimize register allocation and block layout with the block counts of a profile')
+parser.add_argument('--serve', type=str, metavar='SOCKET', help='serve compile requests on this Unix socket')
+parser.add_argument('--workers', type=int, help='with --serve, number of compiler processes; with --check-only, of type checking processes')
+parser.add_argument('--connect', type=str, metavar='SOCKET', help='send the compilation to the server on this Unix socket')
+parser.add_argument('--check-only', action='store_true', help='only type check the source file, or the sources in the source directory, writing one JSON line per source')
+parser.add_argument('--lang', type=str, help='with --check-only, the language to type check with (by default the language level of each source)')
 
-if __name__ == "__main__":
-    args = parser.parse_args()
-    if args.passes == ['all']:
-        if args.verbose:
-            manager = MainPassManager(LwhileManager.transforms, list(LwhileManager.analyses.values()))
+
+# The compiler is imported here rather than at the top, so the client of a compile server
+# does not pay for it.
+def make_manager(passes: List[str], verbose: bool, use_profile: Optional[str]) -> 'PassManager':
+    from iup.compiler import AnalysisPass, TransformPass, Pass, LwhileManager
+    from iup import ALL_PASSES, PassManager
+    if passes == ['all']:
+        if verbose:
+            manager = PassManager(LwhileManager.transforms, list(LwhileManager.analyses.values()), LwhileManager.lang)
+            manager.trace = False
         else:
             manager = LwhileManager
     else:
-        passes: List[Pass] = [ALL_PASSES[p] for p in args.passes if (p in ALL_PASSES)]
-        transforms: List[TransformPass] = [p for p in passes if not p.pure()] #type: ignore
-        analyses: List[AnalysisPass] = [p for p in passes if p.pure()] #type: ignore
+        selected: List[Pass] = [ALL_PASSES[p] for p in passes if (p in ALL_PASSES)]
+        transforms: List[TransformPass] = [p for p in selected if not p.pure()] #type: ignore
+        analyses: List[AnalysisPass] = [p for p in selected if p.pure()] #type: ignore
         manager = PassManager(transforms, analyses)
+    if use_profile:
+        from iup.x86.eval_x86 import read_block_counts
+        manager.block_counts = read_block_counts(use_profile)
+    return manager
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    if args.serve:
+        from iup.server import serve
+        serve(args.serve, make_manager, args.workers)
+        sys.exit(0)
+    if args.source is None:
+        parser.error('the source file is required')
+    if args.check_only:
+        import json
+        from iup.check import check_paths
+        failed = False
+        for result in check_paths([args.source], args.lang, args.workers):
+            print(json.dumps(result), flush=True)
+            failed = failed or not result['ok']
+        sys.exit(1 if failed else 0)
     if args.output:
         target = args.output
     else:
         target = args.source.split('.')[0]
-    compile(args.source, target, manager, args.emulate)
\ No newline at end of file
+    if args.connect:
+        from iup.server import request
+        input_data = sys.stdin.read() if args.emulate and not sys.stdin.isatty() else ''
+        res = request(args.connect, args.source, target, args.passes, args.verbose,
+                      args.emulate, args.profile, args.use_profile, input_data)
+        sys.stdout.write(res['output'])
+        if res['error'] is not None:
+            sys.stderr.write(res['error'])
+        sys.exit(res['status'])
+    from iup import compile
+    compile(args.source, target, make_manager(args.passes, args.verbose, args.use_profile), args.emulate, args.profile)
@@ -1,6 +1,9 @@
+#define _POSIX_C_SOURCE 199309L // for clock_gettime
 #include <inttypes.h>
 #include <stdlib.h>
 #include <stdio.h>
+#include <string.h>
+#include <time.h>
 #include <assert.h>
 #include "runtime.h"
 
@@ -16,6 +19,58 @@ static int64_t* tospace_end;
 // checked in order to ensure that initialization has occurred.
 static int initialized = 0;
 
+/*
+  The collector is chosen by the IUP_GC environment variable when the
+  heap is initialized. By default the heap is one pair of semispaces:
+  fromspace and tospace.
+
+  With IUP_GC=generational, fromspace is the nursery the program
+  allocates in, and there is an old generation, [old_begin, old_end),
+  allocated up to old_free. A minor collection copies the live objects
+  of the nursery to the end of the old generation, so the nursery is
+  empty after every collection. When the old generation might not have
+  room for the whole nursery, a major collection copies the live
+  objects of both generations to tospace instead, which then becomes
+  the old generation.
+
+  A minor collection only scans the roots and the remembered set, not
+  the old generation, so every old object that points into the nursery
+  must be in the remembered set: see record_write.
+*/
+static int generational = 0;
+static int64_t* old_begin;
+static int64_t* old_end;
+static int64_t* old_free;
+
+// The locations of the fields of old objects that were written a
+// pointer into the nursery since the last collection.
+static int64_t*** remembered_begin;
+static int64_t*** remembered_end;
+static int64_t*** remembered_ptr;
+
+// Set during a minor collection, in which copy_vector only copies
+// objects of the nursery.
+static int minor = 0;
+
+// The heap grows when more than half of it is live after a collection.
+static const int GROW_PERCENT = 50;
+
+// Counters of the collector, written to stderr at exit if the
+// IUP_GC_STATS environment variable is set.
+static struct {
+  uint64_t collections;
+  uint64_t major_collections;
+  uint64_t bytes_allocated;
+  uint64_t bytes_copied;
+  uint64_t heap_growths;
+  uint64_t remembered_writes;
+  uint64_t pause_ns;
+  uint64_t max_pause_ns;
+} stats;
+
+// Where the program started allocating after the last collection.
+static int64_t* allocation_start;
+
 /*
   Tuple Tag (64 bits)
   #b|- 7 bit unused -|- 50 bit field [50, 0] -| 6 bits length -| 1 bit isNotForwarding Pointer
@@ -115,6 +170,43 @@ int64_t* to_ptr(int64_t* p) {
 }
 
 
+// Allocate a space of the heap, of size bytes.
+static int64_t* allocate_space(uint64_t size, const char* name)
+{
+  int64_t* space = malloc(size);
+  if (!space) {
+    printf("Failed to malloc %" PRIu64 " byte %s\n", size, name);
+    exit(EXIT_FAILURE);
+  }
+  return space;
+}
+
+static uint64_t now_ns()
+{
+  struct timespec t;
+  clock_gettime(CLOCK_MONOTONIC, &t);
+  return (uint64_t)t.tv_sec * 1000000000 + t.tv_nsec;
+}
+
+static void print_gc_stats()
+{
+  uint64_t heap_bytes = (fromspace_end - fromspace_begin) * sizeof(int64_t);
+  if (generational)
+    heap_bytes += (old_end - old_begin) * sizeof(int64_t);
+  stats.bytes_allocated += (free_ptr - allocation_start) * sizeof(int64_t);
+  allocation_start = free_ptr;
+  fprintf(stderr, "gc: collector %s\n", generational ? "generational" : "semispace");
+  fprintf(stderr, "gc: collections %" PRIu64 "\n", stats.collections);
+  fprintf(stderr, "gc: major_collections %" PRIu64 "\n", stats.major_collections);
+  fprintf(stderr, "gc: heap_growths %" PRIu64 "\n", stats.heap_growths);
+  fprintf(stderr, "gc: heap_bytes %" PRIu64 "\n", heap_bytes);
+  fprintf(stderr, "gc: bytes_allocated %" PRIu64 "\n", stats.bytes_allocated);
+  fprintf(stderr, "gc: bytes_copied %" PRIu64 "\n", stats.bytes_copied);
+  fprintf(stderr, "gc: remembered_writes %" PRIu64 "\n", stats.remembered_writes);
+  fprintf(stderr, "gc: pause_ms %.3f\n", stats.pause_ns / 1e6);
+  fprintf(stderr, "gc: max_pause_ms %.3f\n", stats.max_pause_ns / 1e6);
+}
+
 // initialize the state of the collector so that allocations can occur
 void initialize(uint64_t rootstack_size, uint64_t heap_size)
 {
@@ -147,13 +239,57 @@ void initialize(uint64_t rootstack_size, uint64_t heap_size)
 
   // 3 Initialize the global free pointer
   free_ptr = fromspace_begin;
+  allocation_start = free_ptr;
+
+  // 4. The old generation starts as big as the nursery.
+  const char* collector = getenv("IUP_GC");
+  if (collector && strcmp(collector, "generational") == 0) {
+    generational = 1;
+    old_begin = allocate_space(heap_size, "old generation");
+    old_end = old_begin + (heap_size / sizeof(int64_t));
+    old_free = old_begin;
+    uint64_t remembered_size = 1024;
+    if (!(remembered_begin = malloc(remembered_size * sizeof(int64_t**)))) {
+      printf("Failed to malloc %" PRIu64 " entry remembered set\n", remembered_size);
+      exit(EXIT_FAILURE);
+    }
+    remembered_end = remembered_begin + remembered_size;
+    remembered_ptr = remembered_begin;
+  }
+
+  if (getenv("IUP_GC_STATS"))
+    atexit(print_gc_stats);
 
   // Useful for debugging
   initialized = 1;
 
 }
 
-void validate_vector(int64_t** scan_addr) {
+void record_write(int64_t** field_loc)
+{
+  int64_t* value = *field_loc;
+  int64_t* field = (int64_t*)field_loc;
+  if (!generational || !is_ptr(value))
+    return;
+  value = to_ptr(value);
+  if (old_begin <= field && field < old_free
+      && fromspace_begin <= value && value < fromspace_end) {
+    if (remembered_ptr == remembered_end) {
+      long size = remembered_end - remembered_begin;
+      if (!(remembered_begin = realloc(remembered_begin, 2 * size * sizeof(int64_t**)))) {
+        printf("Failed to grow the remembered set to %ld entries\n", 2 * size);
+        exit(EXIT_FAILURE);
+      }
+      remembered_ptr = remembered_begin + size;
+      remembered_end = remembered_begin + 2 * size;
+    }
+    *remembered_ptr++ = field_loc;
+    stats.remembered_writes++;
+  }
+}
+
+// Check that the pointers of a vector point into [begin, end).
+void validate_vector(int64_t** scan_addr, int64_t* begin, int64_t* end) {
   int64_t* scan_ptr = *scan_addr;
   int64_t tag = *scan_ptr;
   if (is_vecof(tag)) {
@@ -168,42 +304,29 @@ void validate_vector(int64_t** scan_addr) {
         int64_t* ptr = (int64_t*) data[i];
         if (is_ptr(ptr)) {
           int64_t* real_ptr = to_ptr(ptr);
-          assert(real_ptr < fromspace_end);
-          assert(real_ptr >= fromspace_begin);
+          assert(real_ptr < end);
+          assert(real_ptr >= begin);
         }
       }
     }
   }
 }
 
-void collect(int64_t** rootstack_ptr, uint64_t bytes_requested)
-{
-#if 0
-  printf("collecting, need %" PRIu64 "\n", bytes_requested);
-  print_heap(rootstack_ptr);
-#endif
-
-  // 1. Check our assumptions about the world
-  assert(initialized);
-  assert(rootstack_ptr >= rootstack_begin);
-  assert(rootstack_ptr < rootstack_end);
-
-#ifndef NDEBUG
-  // All pointers in the rootstack point to fromspace
-  for (unsigned int i = 0; rootstack_begin + i < rootstack_ptr; i++){
-    int64_t* root = rootstack_begin[i];
-    if (is_ptr(root)) {
-      int64_t* a_root = to_ptr(root);
-      assert(fromspace_begin <= a_root && a_root < fromspace_end);
-    }
-  }
-#endif
+// evacuate copies the objects reachable from the roots to free_ptr
+// onwards, which must be at scan_ptr. See cheney below.
+static void evacuate(int64_t** rootstack_ptr, int64_t* scan_ptr);
 
-  // 2. Perform collection
+static void collect_semispace(int64_t** rootstack_ptr, uint64_t bytes_requested)
+{
+  // 1. Perform collection
   cheney(rootstack_ptr);
 
-  // 3. Check if collection freed enough space in order to allocate
-  if (sizeof(int64_t) * (fromspace_end - free_ptr) < bytes_requested){
+  // 2. Check if collection freed enough space in order to allocate,
+  // and if it freed enough of the heap
+  unsigned long occupied_bytes = (free_ptr - fromspace_begin) * sizeof(int64_t);
+  unsigned long old_bytes = (fromspace_end - fromspace_begin) * sizeof(int64_t);
+  if (sizeof(int64_t) * (fromspace_end - free_ptr) < bytes_requested
+      || occupied_bytes * 100 > old_bytes * GROW_PERCENT){
     //printf("resizing the heap\n");
     /*
        If there is not enough room left for the bytes_requested,
@@ -217,6 +340,11 @@ void collect(int64_t** rootstack_ptr, uint64_t bytes_requested)
        more than half the size of the heap. No a very likely
        scenario but slightly more robust.
 
+       The heap also grows while the live data takes more than
+       GROW_PERCENT of it: otherwise a program whose data is mostly
+       live would collect every time it allocates a little, copying
+       all of its data each time.
+
        One corner case that isn't handled is if the heap is size
        zero. My thought is that malloc probably wouldn't give
        back a pointer if you asked for 0 bytes. Thus initialize
@@ -226,20 +354,19 @@ void collect(int64_t** rootstack_ptr, uint64_t bytes_requested)
        in reality.
     */
 
-    unsigned long occupied_bytes = (free_ptr - fromspace_begin) * sizeof(int64_t);
     unsigned long needed_bytes = occupied_bytes + bytes_requested;
-    unsigned long old_len = fromspace_end - fromspace_begin;
-    unsigned long old_bytes = old_len * sizeof(int64_t);
     unsigned long new_bytes = old_bytes;
 
 #if 0
     // this version is good for debugging purposes -Jeremy
     new_bytes = needed_bytes;
 #else
-    while (new_bytes <= needed_bytes) {
+    while (new_bytes <= needed_bytes
+           || occupied_bytes * 100 > new_bytes * GROW_PERCENT) {
       new_bytes = 2 * new_bytes;
     }
 #endif
+    stats.heap_growths++;
 
     // Free and allocate a new tospace of size new_bytes
     free(tospace_begin);
@@ -269,24 +396,168 @@ void collect(int64_t** rootstack_ptr, uint64_t bytes_requested)
 
     tospace_end = tospace_begin + new_bytes / (sizeof(int64_t));
   }
+}
+
+// Copy the live objects of both generations to tospace, which becomes
+// the old generation, and grow the old generation if they take more
+// than GROW_PERCENT of it or it has no room for a whole nursery.
+static void major_collection(int64_t** rootstack_ptr)
+{
+  uint64_t live_bytes = ((old_free - old_begin) + (free_ptr - fromspace_begin)) * sizeof(int64_t);
+  uint64_t to_bytes = (tospace_end - tospace_begin) * sizeof(int64_t);
+  if (to_bytes < live_bytes) {
+    while (to_bytes < live_bytes)
+      to_bytes = 2 * to_bytes;
+    free(tospace_begin);
+    tospace_begin = allocate_space(to_bytes, "tospace");
+    tospace_end = tospace_begin + to_bytes / sizeof(int64_t);
+  }
+
+  stats.major_collections++;
+  for (int copies = 0; copies != 2; copies++) {
+    free_ptr = tospace_begin;
+    evacuate(rootstack_ptr, tospace_begin);
+    int64_t* tmp_begin = tospace_begin;
+    int64_t* tmp_end = tospace_end;
+    tospace_begin = old_begin;
+    tospace_end = old_end;
+    old_begin = tmp_begin;
+    old_end = tmp_end;
+    old_free = free_ptr;
+
+    uint64_t occupied_bytes = (old_free - old_begin) * sizeof(int64_t);
+    uint64_t old_bytes = (old_end - old_begin) * sizeof(int64_t);
+    uint64_t nursery_bytes = (fromspace_end - fromspace_begin) * sizeof(int64_t);
+    uint64_t new_bytes = old_bytes;
+    while (occupied_bytes * 100 > new_bytes * GROW_PERCENT
+           || new_bytes - occupied_bytes < nursery_bytes)
+      new_bytes = 2 * new_bytes;
+    if (copies == 1 || new_bytes == old_bytes) {
+      // As in collect_semispace, the tospace freed is the one
+      // allocated last.
+      if ((uint64_t)(tospace_end - tospace_begin) * sizeof(int64_t) < old_bytes) {
+        free(tospace_begin);
+        tospace_begin = allocate_space(old_bytes, "tospace");
+        tospace_end = tospace_begin + old_bytes / sizeof(int64_t);
+      }
+      break;
+    }
+    // Copy the old generation again, to a bigger space.
+    stats.heap_growths++;
+    free(tospace_begin);
+    tospace_begin = allocate_space(new_bytes, "tospace");
+    tospace_end = tospace_begin + new_bytes / sizeof(int64_t);
+  }
+}
+
+// Empty the nursery, and return where the objects it copied begin.
+static int64_t* collect_generations(int64_t** rootstack_ptr, uint64_t bytes_requested)
+{
+  int64_t* copied;
+  uint64_t nursery_bytes = (fromspace_end - fromspace_begin) * sizeof(int64_t);
+  if (old_end - old_free < free_ptr - fromspace_begin) {
+    // The whole nursery might be live, and would not fit in the old generation.
+    major_collection(rootstack_ptr);
+    copied = old_begin;
+  } else {
+    copied = old_free;
+    free_ptr = old_free;
+    minor = 1;
+    evacuate(rootstack_ptr, old_free);
+    minor = 0;
+    old_free = free_ptr;
+    // Most of the nursery survived: objects die older than it is,
+    // unless it is already as big as the old generation.
+    uint64_t promoted_bytes = (old_free - copied) * sizeof(int64_t);
+    if (promoted_bytes * 100 > nursery_bytes * GROW_PERCENT
+        && 2 * nursery_bytes <= (uint64_t)(old_end - old_begin) * sizeof(int64_t))
+      nursery_bytes = 2 * nursery_bytes;
+  }
+  remembered_ptr = remembered_begin;
+
+  while (nursery_bytes < bytes_requested)
+    nursery_bytes = 2 * nursery_bytes;
+  if (nursery_bytes != (fromspace_end - fromspace_begin) * sizeof(int64_t)) {
+    // The nursery is empty, so it can simply be allocated again.
+    stats.heap_growths++;
+    free(fromspace_begin);
+    fromspace_begin = allocate_space(nursery_bytes, "nursery");
+    fromspace_end = fromspace_begin + nursery_bytes / sizeof(int64_t);
+  }
+  free_ptr = fromspace_begin;
+  return copied;
+}
+
+// Whether p points into the heap the program allocated in.
+static int in_heap(int64_t* p)
+{
+  return (fromspace_begin <= p && p < fromspace_end)
+    || (generational && old_begin <= p && p < old_free);
+}
+
+void collect(int64_t** rootstack_ptr, uint64_t bytes_requested)
+{
+#if 0
+  printf("collecting, need %" PRIu64 "\n", bytes_requested);
+  print_heap(rootstack_ptr);
+#endif
+  uint64_t start_ns = now_ns();
+
+  // 1. Check our assumptions about the world
+  assert(initialized);
+  assert(rootstack_ptr >= rootstack_begin);
+  assert(rootstack_ptr < rootstack_end);
+
+#ifndef NDEBUG
+  // All pointers in the rootstack point to the heap
+  for (unsigned int i = 0; rootstack_begin + i < rootstack_ptr; i++){
+    int64_t* root = rootstack_begin[i];
+    if (is_ptr(root)) {
+      int64_t* a_root = to_ptr(root);
+      assert(in_heap(a_root));
+    }
+  }
+#endif
+
+  // 2. Perform collection, and make room for the bytes requested.
+  stats.collections++;
+  stats.bytes_allocated += (free_ptr - allocation_start) * sizeof(int64_t);
+  int64_t* copied = fromspace_begin;
+  int64_t* live_begin = fromspace_begin;
+  int64_t* live_end = free_ptr;
+  if (generational) {
+    copied = collect_generations(rootstack_ptr, bytes_requested);
+    live_begin = old_begin;
+    live_end = old_free;
+  } else {
+    collect_semispace(rootstack_ptr, bytes_requested);
+    copied = live_begin = fromspace_begin;
+    live_end = free_ptr;
+  }
+  allocation_start = free_ptr;
+
+  uint64_t pause_ns = now_ns() - start_ns;
+  stats.pause_ns += pause_ns;
+  if (pause_ns > stats.max_pause_ns)
+    stats.max_pause_ns = pause_ns;
 
   assert(free_ptr < fromspace_end);
   assert(free_ptr >= fromspace_begin);
 #ifndef NDEBUG
-  // All pointers in the rootstack point to fromspace
+  // All pointers in the rootstack point to the live heap
   for (unsigned long i = 0; rootstack_begin + i < rootstack_ptr; i++){
     int64_t* root = rootstack_begin[i];
     if (is_ptr(root)) {
       int64_t* a_root = to_ptr(root);
-      assert(fromspace_begin <= a_root && a_root < fromspace_end);
+      assert(live_begin <= a_root && a_root < live_end);
     }
   }
-  // All pointers in fromspace point to fromspace
+  // All pointers in the copied objects point to the live heap
   /*printf("validating pointers in fromspace [%p, %p)\n",
     fromspace_begin, fromspace_end);*/
-  int64_t* scan_ptr = fromspace_begin;
-  while (scan_ptr != free_ptr){
-    validate_vector(&scan_ptr);
+  int64_t* scan_ptr = copied;
+  while (scan_ptr != live_end){
+    validate_vector(&scan_ptr, live_begin, live_end);
 #if 0 // this sanity test appears to be broken
     int64_t tag = *scan_ptr;
     unsigned char len = get_vector_length(tag);
@@ -401,8 +672,22 @@ void process_vector(int64_t** scan_addr) {
 void cheney(int64_t** rootstack_ptr)
 {
   // printf("cheney: starting copy, rootstack=%p\n", rootstack_ptr);
-  int64_t* scan_ptr = tospace_begin;
   free_ptr = tospace_begin;
+  evacuate(rootstack_ptr, tospace_begin);
+
+  /* swap the tospace and fromspace */
+  int64_t* tmp_begin = tospace_begin;
+  int64_t* tmp_end = tospace_end;
+  tospace_begin = fromspace_begin;
+  tospace_end = fromspace_end;
+  fromspace_begin = tmp_begin;
+  fromspace_end = tmp_end;
+  //printf("cheney: finished copy\n");
+}
+
+void evacuate(int64_t** rootstack_ptr, int64_t* scan_ptr)
+{
+  int64_t* copy_begin = scan_ptr;
 
   /* traverse the root set to create the initial queue */
   for (int64_t** root_loc = rootstack_begin;
@@ -416,6 +701,16 @@ void cheney(int64_t** rootstack_ptr)
     copy_vector(root_loc);
   }
 
+  /* in a minor collection, the old objects that point into the
+     nursery are roots as well */
+  if (minor) {
+    for (int64_t*** field_loc = remembered_begin;
+         field_loc != remembered_ptr;
+         ++field_loc) {
+      copy_vector(*field_loc);
+    }
+  }
+
   /*
      Here we need to scan tospace until we reach the free_ptr pointer.
      This will end up being a breadth first search of the pointers in
@@ -465,14 +760,7 @@ void cheney(int64_t** rootstack_ptr)
 #endif
   }
 
-  /* swap the tospace and fromspace */
-  int64_t* tmp_begin = tospace_begin;
-  int64_t* tmp_end = tospace_end;
-  tospace_begin = fromspace_begin;
-  tospace_end = fromspace_end;
-  fromspace_begin = tmp_begin;
-  fromspace_end = tmp_end;
-  //printf("cheney: finished copy\n");
+  stats.bytes_copied += (free_ptr - copy_begin) * sizeof(int64_t);
 }
 
 
@@ -535,6 +823,9 @@ void copy_vector(int64_t** vector_ptr_loc)
   if (! is_ptr(old_vector_ptr))
     return;
   old_vector_ptr = to_ptr(old_vector_ptr);
+  // A minor collection leaves the old generation where it is.
+  if (minor && !(fromspace_begin <= old_vector_ptr && old_vector_ptr < fromspace_end))
+    return;
 #if 0
   printf("copy_vector %p\n", old_vector_ptr);
 #endif
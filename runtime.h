@@ -29,6 +29,13 @@ void initialize(uint64_t rootstack_size, uint64_t heap_size);
 // heap are still live.
 void collect(int64_t** rootstack_ptr, uint64_t bytes_requested);
 
+// Record a write of a pointer to the field at field_loc, after it is
+// written. With IUP_GC=generational, a field of an old object that
+// points into the nursery must be recorded before the next collection.
+// Tuples are initialized right after they are allocated, in the
+// nursery, so only writes to existing tuples need to be recorded.
+void record_write(int64_t** field_loc);
+
 // Read an integer from stdin.
 int64_t read_int();
 
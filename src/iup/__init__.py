@@ -1,28 +1,62 @@
-from re import S
-from .compiler import PassManager, ALL_PASSES, LvarManager #type: ignore
-from .interp import INTERPRETERS # type: ignore
-from .type import TYPE_CHECKERS # type: ignore
-from .x86.eval_x86 import interp_x86 # type: ignore
-from ast import parse
+from importlib import import_module
+from typing import Optional, TYPE_CHECKING
 import os
-    
 
-def compile(source: str, target: str, manager: PassManager, emulate_x86: bool = False) -> None:
+if TYPE_CHECKING:
+    from .compiler import PassManager, ALL_PASSES, LvarManager #type: ignore
+    from .interp import INTERPRETERS # type: ignore
+    from .type import TYPE_CHECKERS # type: ignore
+    from .x86.eval_x86 import interp_x86 # type: ignore
+
+# The compiler, interpreters, type checkers and emulator are imported on first
+# use, so `import iup` stays cheap for short-lived compiler invocations.
+lazy_names = {
+    'PassManager': 'iup.compiler',
+    'ALL_PASSES': 'iup.compiler',
+    'LvarManager': 'iup.compiler',
+    'INTERPRETERS': 'iup.interp',
+    'TYPE_CHECKERS': 'iup.type',
+    'interp_x86': 'iup.x86.eval_x86',
+    'parse': 'ast',
+}
+
+
+def __getattr__(name: str):
+    if name in lazy_names:
+        value = getattr(import_module(lazy_names[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module 'iup' has no attribute {name!r}")
     
-    with open(source, 'r') as file:
-        program = parse(file.read())
-        
+
+def compile(source: str, target: str, manager: 'PassManager', emulate_x86: bool = False, profile_file: Optional[str] = None) -> None:
+    from .parse_cache import parse_file
+    from .type import TYPE_CHECKERS
+
+    program = parse_file(source)
+
     assert manager.target == 'X86'
     TYPE_CHECKERS[manager.lang].type_check(program)
     
     program = manager.run(program, None) #type: ignore
 
     if emulate_x86:
-        interp_x86(program)
+        from .x86.eval_x86 import interp_x86
+        interp_x86(program, profile_file)
     else:
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        script_dir = os.path.join(script_dir, '../../')
         with open(f'{target}.s', 'w') as file:
-            file.write(str(program))
-        os.system(f'gcc -c -g -std=c99 {script_dir}/runtime.c -o {script_dir}/runtime.o')
-        os.system(f'gcc {script_dir}/runtime.o {target}.s -o {target}')
+            program.write(file)
+        if os.system(f'gcc {runtime_object()} {target}.s -o {target}') != 0:
+            raise Exception(f'compile: gcc could not link {target}.s into {target}')
+
+
+# runtime.o is rebuilt only when runtime.c or runtime.h changed since it was compiled
+def runtime_object() -> str:
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    script_dir = os.path.join(script_dir, '../../')
+    obj = f'{script_dir}/runtime.o'
+    sources = [f'{script_dir}/runtime.c', f'{script_dir}/runtime.h']
+    if not os.path.exists(obj) or os.path.getmtime(obj) < max(os.path.getmtime(s) for s in sources):
+        if os.system(f'gcc -c -g -std=c99 {script_dir}/runtime.c -o {obj}') != 0:
+            raise Exception(f'runtime_object: gcc could not compile {script_dir}/runtime.c')
+    return obj
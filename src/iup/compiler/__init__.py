@@ -3,9 +3,12 @@ from .compiler_register_allocator import *
 from .compiler import *
 
 ALL_PASSES_LIST: List[Pass] = [
+    PartialEvalPass(),
     ShrinkPass(),
     RCOPass(),
     ExplicateControlPass(),
+    FrontEndPass(),
+    CopyPropagationPass(),
     SelectInstrPass(),
     AllocateRegPass(),
     AssignHomePass(),
@@ -34,9 +37,11 @@ LvarManager = PassManager(LvarTransforms, LvarAnalyses)
 
 
 LwhileTransforms: List[TransformPass] = [
+    PartialEvalPass(),
     ShrinkPass(),
     RCOPass(),
     ExplicateControlPass(),
+    CopyPropagationPass(),
     SelectInstrPass(),
     AllocateRegPass(),
     PatchInsPass(),
@@ -49,3 +54,16 @@ LwhileAnalyses: List[AnalysisPass] = [
 LwhileManager = PassManager(LwhileTransforms, LwhileAnalyses, 'Lwhile')
 
 
+# shrink, remove complex operands and explicate control fused in one pass
+LwhileFusedTransforms: List[TransformPass] = [
+    PartialEvalPass(),
+    FrontEndPass(),
+    CopyPropagationPass(),
+    SelectInstrPass(),
+    AllocateRegPass(),
+    PatchInsPass(),
+    PreConPass()
+]
+LwhileFusedManager = PassManager(LwhileFusedTransforms, LwhileAnalyses, 'Lwhile')
+
+
@@ -1,15 +1,99 @@
-import select
-from typing import List, Dict, Tuple
+from typing import Any, Generator, List, Dict, Optional, Tuple
 
-from pytest import mark
-from iup.utils import generate_name, align, Begin
-from iup.utils.utils import Allocate, Collect, GlobalValue, Goto, label_name, CProgram
+from iup.utils import align, Begin
+from iup.utils.utils import Allocate, Collect, GlobalValue, Goto, add64, label_name, neg64, sub64, CProgram
 import iup.x86.x86_ast as x86
 import ast
-from iup.compiler.pass_manager import TransformPass, PassManager
+from iup.compiler.pass_manager import Compilation, TransformPass
+
+############################################################################
+# Partial Evaluation Pass (fold operations on constants)
+############################################################################
+def int_constant(e: ast.expr) -> bool:
+    return isinstance(e, ast.Constant) and type(e.value) is int
+
+def bool_constant(e: ast.expr) -> bool:
+    return isinstance(e, ast.Constant) and type(e.value) is bool
+
+compare_ops = {
+    ast.Eq: lambda l, r: l == r,
+    ast.NotEq: lambda l, r: l != r,
+    ast.Lt: lambda l, r: l < r,
+    ast.LtE: lambda l, r: l <= r,
+    ast.Gt: lambda l, r: l > r,
+    ast.GtE: lambda l, r: l >= r,
+}
+
+# fold one operation whose operands are already folded, with the 64-bit semantics of the generated code
+def fold_exp(e: ast.expr) -> ast.expr:
+    match e:
+        case ast.BinOp(left, ast.Add(), right) if int_constant(left) and int_constant(right):
+            return ast.Constant(add64(left.value, right.value)) #type: ignore
+        case ast.BinOp(left, ast.Sub(), right) if int_constant(left) and int_constant(right):
+            return ast.Constant(sub64(left.value, right.value)) #type: ignore
+        case ast.UnaryOp(ast.USub(), v) if int_constant(v):
+            return ast.Constant(neg64(v.value)) #type: ignore
+        case ast.UnaryOp(ast.Not(), v) if bool_constant(v):
+            return ast.Constant(not v.value) #type: ignore
+        case ast.Compare(ast.Constant(l), [op], [ast.Constant(r)]) if type(op) in compare_ops and type(l) is type(r):
+            return ast.Constant(compare_ops[type(op)](l, r))
+        case ast.BoolOp(ast.And(), [left, right]) if bool_constant(left):
+            return right if left.value else left #type: ignore
+        case ast.BoolOp(ast.Or(), [left, right]) if bool_constant(left):
+            return left if left.value else right #type: ignore
+        case ast.IfExp(test, body, orelse) if bool_constant(test):
+            return body if test.value else orelse #type: ignore
+        case _:
+            return e
+
+class PartialEvalPass(TransformPass):
+    '''
+    Fold arithmetic, comparisons and conditionals whose operands are constants, so that
+    they need neither temporaries nor instructions.
+    '''
+    name = 'partial_eval'
+    source = 'Py'
+    target = 'Py'
+
+    def pe_exp(self, e: ast.expr) -> ast.expr:
+        match e:
+            case ast.BinOp(left, op, right):
+                return fold_exp(ast.BinOp(self.pe_exp(left), op, self.pe_exp(right)))
+            case ast.UnaryOp(op, v):
+                return fold_exp(ast.UnaryOp(op, self.pe_exp(v)))
+            case ast.Compare(left, [op], [right]):
+                return fold_exp(ast.Compare(self.pe_exp(left), [op], [self.pe_exp(right)]))
+            case ast.BoolOp(op, [left, right]):
+                return fold_exp(ast.BoolOp(op, [self.pe_exp(left), self.pe_exp(right)]))
+            case ast.IfExp(test, body, orelse):
+                return fold_exp(ast.IfExp(self.pe_exp(test), self.pe_exp(body), self.pe_exp(orelse)))
+            case ast.Call(func, args, keywords):
+                return ast.Call(func, [self.pe_exp(arg) for arg in args], keywords)
+            case _:
+                return e
+
+    def pe_stmt(self, s: ast.stmt) -> ast.stmt:
+        match s:
+            case ast.Assign(targets, value):
+                return ast.Assign(targets, self.pe_exp(value))
+            case ast.Expr(value):
+                return ast.Expr(self.pe_exp(value))
+            case ast.If(test, body, orelse):
+                new_body = [self.pe_located(stmt) for stmt in body]
+                new_orelse = [self.pe_located(stmt) for stmt in orelse]
+                return ast.If(self.pe_exp(test), new_body, new_orelse)
+            case ast.While(test, body, []):
+                new_body = [self.pe_located(stmt) for stmt in body]
+                return ast.While(self.pe_exp(test), new_body, [])
+            case _:
+                return s
+
+    def pe_located(self, s: ast.stmt) -> ast.stmt:
+        return ast.copy_location(self.pe_stmt(s), s)
+
+    def run(self, prog: ast.Module, ctx: Compilation) -> ast.Module:
+        return ast.Module([self.pe_located(stmt) for stmt in prog.body])
 
-Binding = Tuple[ast.Name, ast.expr]
-Temporaries = List[Binding]
 
 ############################################################################
 # Shrink Pass (convert and/or to if)
@@ -57,68 +141,111 @@ class ShrinkPass(TransformPass):
             # tail of the basic block
             case ast.If(test, body, orelse):
                 new_test = self.shrink_exp(test)
-                new_body = [self.shrink_stmt(stmt) for stmt in body]
-                new_orelse = [self.shrink_stmt(stmt) for stmt in orelse]
+                new_body = [self.shrink_located(stmt) for stmt in body]
+                new_orelse = [self.shrink_located(stmt) for stmt in orelse]
                 return ast.If(new_test, new_body, new_orelse)
             case ast.While(test, body, []):
                 new_test = self.shrink_exp(test)
-                new_body = [self.shrink_stmt(stmt) for stmt in body]
+                new_body = [self.shrink_located(stmt) for stmt in body]
                 return ast.While(new_test, new_body, [])
             case _:
                 raise Exception('rco_stmt: unexpected ' + repr(s))
     
+    # source positions are kept for the block labels of explicate control
+    def shrink_located(self, s: ast.stmt) -> ast.stmt:
+        return ast.copy_location(self.shrink_stmt(s), s)
+    
     # assume just one block currenctly
-    def run(self, prog: ast.Module, manager: PassManager) -> ast.Module:
-        stmts = [self.shrink_stmt(stmt) for stmt in prog.body]
+    def run(self, prog: ast.Module, ctx: Compilation) -> ast.Module:
+        stmts = [self.shrink_located(stmt) for stmt in prog.body]
         return ast.Module(stmts)
             
 
 ############################################################################
 # Expose Allocation Pass
 ############################################################################
+# collect unless bytes_ fit between free_ptr and fromspace_end
+def heap_check(bytes_: int) -> ast.If:
+    return ast.If(ast.Compare(
+        ast.BinOp(GlobalValue("free_ptr"), ast.Add(), ast.Constant(bytes_)),
+        [ast.Lt()],
+        [GlobalValue("fromspace_end")]
+        ),[],[Collect(bytes_)])
+
+def heap_check_bytes(s: ast.stmt) -> Optional[int]:
+    match s:
+        case ast.If(ast.Compare(ast.BinOp(GlobalValue("free_ptr"), ast.Add(), ast.Constant(bytes_)),
+                                [ast.Lt()], [GlobalValue("fromspace_end")]), [], [Collect(_)]):
+            return bytes_
+        case _:
+            return None
+
+# neither allocates, collects nor branches
+def straight_line(s: ast.stmt) -> bool:
+    return not any(isinstance(node, (Begin, Allocate, Collect, ast.If, ast.While)) for node in ast.walk(s))
+
 class ExposeAllocationPass(TransformPass):
-    
-    def expose_exp(self, e: ast.expr) -> ast.expr:
+    '''
+    Make the allocation of tuples explicit: a heap check, which collects unless the tuple
+    fits in fromspace, the allocation, and the initialization of its fields.
+    A field that is a variable, a constant or a tuple initializes the tuple directly;
+    the allocation of a tuple field joins the statements of the tuple that contains it.
+    A statement that assigns or prints a tuple is replaced by the statements of its
+    allocation, so that those of a basic block form one list, in which `coalesce` merges
+    the heap checks of consecutive allocations.
+    '''
+    name = 'expose_allocation'
+    source = 'Py'
+    target = 'Py'
+
+    coalescing = True
+    # a coalesced check asks for at most the initial heap size of the runtime
+    coalesced_bytes = 16384
+
+    def expose_exp(self, e: ast.expr, ctx: Compilation) -> ast.expr:
         match e:
             case ast.Name(id):
                 return ast.Name(id)
             case ast.BinOp(left, op, right):
-                new_left = self.expose_exp(left)
-                new_right = self.expose_exp(right)
+                new_left = self.expose_exp(left, ctx)
+                new_right = self.expose_exp(right, ctx)
                 return ast.BinOp(new_left, op, new_right)
             case ast.UnaryOp(ast.USub(), v):
-                return ast.UnaryOp(ast.USub(), self.expose_exp(v))
+                return ast.UnaryOp(ast.USub(), self.expose_exp(v, ctx))
             case ast.Constant(value):
                 return ast.Constant(value)
             case ast.Call(ast.Name('input_int'), [], keywords):
                 return ast.Call(ast.Name('input_int'), [], keywords)
             case ast.IfExp(test, body, orelse):
-                new_test = self.expose_exp(test)
-                new_body = self.expose_exp(body) 
-                new_orelse = self.expose_exp(orelse) 
+                new_test = self.expose_exp(test, ctx)
+                new_body = self.expose_exp(body, ctx) 
+                new_orelse = self.expose_exp(orelse, ctx) 
                 return ast.IfExp(new_test, new_body, new_orelse)
             case ast.Compare(left, [op], [right]):
-                new_left= self.expose_exp(left)
-                new_right = self.expose_exp(right)
+                new_left= self.expose_exp(left, ctx)
+                new_right = self.expose_exp(right, ctx)
                 return ast.Compare(new_left, [op], [new_right])
             case ast.Tuple(es, ast.Load()):
-                inits = []
-                xs = []
+                inits: List[ast.stmt] = []
+                xs: List[ast.expr] = []
                 len_ = len(es)
                 bytes_ = len_ * 8 + 8
                 
-                for e in es:
-                    x = ast.Name(generate_name('init.'))
-                    xs.append(x)
-                    inits.append(ast.Assign([x], self.expose_exp(e)))
+                for elt in es:
+                    match self.expose_exp(elt, ctx):
+                        case ast.Name(_) | ast.Constant(_) as atm:
+                            xs.append(atm)
+                        case Begin(body, result):
+                            inits.extend(body)
+                            xs.append(result)
+                        case new_elt:
+                            x = ast.Name(ctx.names.fresh('init', ctx.line))
+                            xs.append(x)
+                            inits.append(ast.Assign([x], new_elt))
                 
-                v = ast.Name(generate_name('alloc.'))
+                v = ast.Name(ctx.names.fresh('alloc', ctx.line))
                 inits.extend([
-                        ast.If(ast.Compare(
-                            ast.BinOp(GlobalValue("free_ptr"), ast.Add(), ast.Constant(bytes_)),
-                            [ast.Lt()], 
-                            [GlobalValue("fromspace_end")]
-                            ),[],[Collect(bytes_)]),
+                        heap_check(bytes_),
                         ast.Assign([v], Allocate(len_, e.has_type)) #type: ignore
                 ])    
                 
@@ -129,7 +256,7 @@ class ExposeAllocationPass(TransformPass):
                             )
                         )
                     
-                return Begin(inits, v)
+                return Begin(self.coalesce(inits), v)
             case ast.Subscript(tup, index, ast.Load()):
                 return ast.Subscript(tup, index, ast.Load())
             case ast.Call(ast.Name('len'), [tup]):
@@ -137,30 +264,79 @@ class ExposeAllocationPass(TransformPass):
             case _:
                 raise Exception('error in interp_exp, unexpected ' + repr(e))
 
+    def coalesce(self, ss: List[ast.stmt]) -> List[ast.stmt]:
+        '''
+        Merge the heap checks of the allocations in each run of straight-line statements
+        into the first of them, which checks for the bytes of all of them. Nothing can
+        collect between the first allocation of a run and the last, so none of its tuples
+        is seen by the collector before it is initialized. A check that would ask for
+        more than `coalesced_bytes` stays in place and starts the next run, so that a
+        long run does not make the collector grow the heap for tuples far ahead.
+        '''
+        if not self.coalescing:
+            return ss
+        new_ss: List[ast.stmt] = []
+        check = None  # the index of the check of the current run in new_ss
+        total = 0
+        for s in ss:
+            bytes_ = heap_check_bytes(s)
+            if bytes_ is not None and check is not None and total + bytes_ <= self.coalesced_bytes:
+                total += bytes_
+                new_ss[check] = ast.copy_location(heap_check(total), new_ss[check])
+                continue
+            if bytes_ is not None:
+                check = len(new_ss)
+                total = bytes_
+            elif not (isinstance(s, ast.Assign) and isinstance(s.value, Allocate)) and not straight_line(s):
+                check = None
+            new_ss.append(s)
+        return new_ss
+
+    def expose_stmts(self, ss: List[ast.stmt], ctx: Compilation) -> List[ast.stmt]:
+        return self.coalesce([stmt for s in ss for stmt in self.expose_stmt(s, ctx)])
     
-    def expose_stmt(self, s: ast.stmt) -> ast.stmt:
+    def expose_stmt(self, s: ast.stmt, ctx: Compilation) -> List[ast.stmt]:
+        line = ctx.line
+        ctx.line = getattr(s, 'lineno', line)
+        try:
+            return [ast.copy_location(stmt, s) for stmt in self.expose_located(s, ctx)]
+        finally:
+            ctx.line = line
+
+    def expose_located(self, s: ast.stmt, ctx: Compilation) -> List[ast.stmt]:
         match s:
             case ast.Assign([ast.Name(id)], value):
-                return ast.Assign([ast.Name(id)], self.expose_exp(value))
+                match self.expose_exp(value, ctx):
+                    case Begin(body, result):
+                        return body + [ast.Assign([ast.Name(id)], result)]
+                    case new_value:
+                        return [ast.Assign([ast.Name(id)], new_value)]
             case ast.Expr(ast.Call(ast.Name('print'), [arg], keywords)):
-                return ast.Expr(ast.Call(ast.Name('print'), [self.expose_exp(arg)], keywords))
+                match self.expose_exp(arg, ctx):
+                    case Begin(body, result):
+                        return body + [ast.Expr(ast.Call(ast.Name('print'), [result], keywords))]
+                    case new_arg:
+                        return [ast.Expr(ast.Call(ast.Name('print'), [new_arg], keywords))]
             case ast.Expr(value):
-                return ast.Expr(self.expose_exp(value))
+                match self.expose_exp(value, ctx):
+                    case Begin(body, result):
+                        return body + [ast.Expr(result)]
+                    case new_value:
+                        return [ast.Expr(new_value)]
             case ast.If(test, body, orelse):
-                new_test = self.expose_exp(test)
-                new_body = [self.expose_stmt(s) for s in body ]
-                new_orelse = [self.expose_stmt(s) for s in orelse]
-                return ast.If(new_test, new_body, new_orelse)
+                new_test = self.expose_exp(test, ctx)
+                new_body = self.expose_stmts(body, ctx)
+                new_orelse = self.expose_stmts(orelse, ctx)
+                return [ast.If(new_test, new_body, new_orelse)]
             case ast.While(test, body, []):
-                new_test= self.expose_exp(test)
-                new_body = [self.expose_stmt(s) for s in body]
-                return ast.While(new_test, new_body, [])
+                new_test= self.expose_exp(test, ctx)
+                new_body = self.expose_stmts(body, ctx)
+                return [ast.While(new_test, new_body, [])]
             case _:
                 raise Exception('rco_stmt: unexpected ' + repr(s))
 
-    def run(self, prog: ast.Module, manager: PassManager) -> ast.Module: #type: ignore
-        stmts = [self.expose_stmt(s) for s in prog.body]
-        return ast.Module(stmts)
+    def run(self, prog: ast.Module, ctx: Compilation) -> ast.Module: #type: ignore
+        return ast.Module(self.expose_stmts(prog.body, ctx))
  
 ############################################################################
 # Remove Complex Operands
@@ -173,145 +349,144 @@ class RCOPass(TransformPass):
     
     '''
     Flatten Expression.
+    The assignments of the temporaries are appended to `out`, shared by the whole statement.
+    The expression is walked with an explicit stack, so long operand chains in generated code
+    neither copy lists of temporaries at every level nor hit the recursion limit.
     Parameters:	
         need_atomic: if return expr should be one of [const, name], determined by the corresponding x86 instr
     '''
 
-    def rco_exp(self, e: ast.expr, need_atomic: bool) -> Tuple[ast.expr, Temporaries]:
+    def rco_exp(self, e: ast.expr, need_atomic: bool, out: List[ast.stmt], ctx: Compilation) -> ast.expr:
+        # ('visit', expr, need_atomic, out) lowers an expression and pushes the result on `results`,
+        # ('build', expr, need_atomic, out, data) combines the results of the operands of expr
+        work: List[Tuple] = [('visit', e, need_atomic, out)]
+        results: List[ast.expr] = []
+        while work:
+            frame = work.pop()
+            if frame[0] == 'visit':
+                self.rco_visit(frame[1], frame[2], frame[3], work, results, ctx)
+            else:
+                self.rco_build(frame[1], frame[2], frame[3], frame[4], results, ctx)
+        return results.pop()
+
+    def rco_visit(self, e: ast.expr, need_atomic: bool, out: List[ast.stmt], work: List[Tuple], results: List[ast.expr], ctx: Compilation) -> None:
         match e:
             case ast.Name(id):
-                return (ast.Name(id), [])
-            case ast.BinOp(left, op, right):
-                new_left, left_temps = self.rco_exp(left, True)
-                new_right, right_temps = self.rco_exp(right, True)
-                if need_atomic:
-                    temp = ast.Name(generate_name("_t"))
-                    return (temp, left_temps + right_temps + [(temp, ast.BinOp(new_left, op, new_right))])
-                return (ast.BinOp(new_left, op, new_right), left_temps + right_temps)
-            case ast.UnaryOp(ast.USub(), v):
-                new_v, temps = self.rco_exp(v, True)
-                if need_atomic:
-                    temp = ast.Name(generate_name("_t"))
-                    return (temp, temps + [(temp, ast.UnaryOp(ast.USub(), new_v))])
-                return (ast.UnaryOp(ast.USub(), new_v), temps)
+                results.append(ast.Name(id))
             case ast.Constant(value):
-                return (ast.Constant(value), [])
+                results.append(ast.Constant(value))
             case ast.Call(ast.Name('input_int'), [], keywords):
-                if need_atomic:
-                    temp = ast.Name(generate_name("_t"))
-                    return (temp, [(temp, ast.Call(ast.Name('input_int'), [], keywords))])
-                return (ast.Call(ast.Name('input_int'), [], keywords), [])
-            case ast.IfExp(test, body, orelse):
-                new_test, temps1 = self.rco_exp(test, False)
-                test_init: list[ast.stmt] = [ast.Assign([name], exp)
-                                for (name, exp) in temps1]
-                if len(test_init) != 0:
-                    new_test = Begin(test_init, new_test)
-                else:
-                    new_test = new_test
-                
-                new_body, temps2 = self.rco_exp(body, False) 
-                body_stmts: list[ast.stmt] = [ast.Assign([name], exp)
-                                for (name, exp) in temps2]
-                if len(body_stmts) != 0:
-                    new_body = Begin(body_stmts, new_body)
-                else:
-                    new_body = new_body
-                
-                new_orelse, temps3 = self.rco_exp(orelse, False) 
-                orelse_stmts: list[ast.stmt] = [ast.Assign([name], exp)
-                                for (name, exp) in temps3]
-                if len(orelse_stmts) != 0:
-                    new_orelse = Begin(orelse_stmts, new_orelse)
-                else:
-                    new_orelse = new_orelse
-                
-                if need_atomic:
-                    temp = ast.Name(generate_name("_t"))
-                    return (temp, [(temp, ast.IfExp(new_test, new_body, new_orelse))])
-                
-                return ast.IfExp(new_test, new_body, new_orelse), []
-            case ast.Compare(left, [op], [right]):
-                new_left, left_temps = self.rco_exp(left, True)
-                new_right, right_temps = self.rco_exp(right, True)
-                if need_atomic:
-                    temp = ast.Name(generate_name("_t"))
-                    return (temp, left_temps + right_temps + [(temp, ast.Compare(new_left, [op], [new_right]))])
-                return (ast.Compare(new_left, [op], [new_right]), left_temps + right_temps)
-            case Begin(inits, val):
-                new_inits = [stmt for s in inits for stmt in self.rco_stmt(s)]
-                new_val, temps = self.rco_exp(val, False)
-                return (Begin(new_inits, new_val), temps)
+                results.append(self.atomic(ast.Call(ast.Name('input_int'), [], keywords), need_atomic, out, ctx))
             case Allocate(len_, type):
-                return (Allocate(len_, type), [])
+                results.append(Allocate(len_, type))
             case GlobalValue(name):
-                return (GlobalValue(name), [])
-            case ast.Call(ast.Name('len'), [tup]):
-                new_tup, temps = self.rco_exp(tup, True)
-                return (ast.Call(ast.Name('len'), [new_tup]), temps)
-            case ast.Subscript(tup, idx, ast.Load()):
-                new_tup, temps1 = self.rco_exp(tup, True)
-                new_idx, temps2 = self.rco_exp(idx, True)
-                return (ast.Subscript(new_tup, new_idx, ast.Load()), temps1 + temps2)
+                results.append(GlobalValue(name))
+            case ast.BinOp(left, _, right) | ast.Compare(left, [_], [right]) | ast.Subscript(left, right, ast.Load()):
+                work.append(('build', e, need_atomic, out, None))
+                work.append(('visit', right, True, out))
+                work.append(('visit', left, True, out))
+            case ast.UnaryOp(ast.USub(), v) | ast.Call(ast.Name('len'), [v]):
+                work.append(('build', e, need_atomic, out, None))
+                work.append(('visit', v, True, out))
+            case ast.IfExp(test, body, orelse):
+                # the temporaries of each branch stay in the branch
+                branches: Tuple[List[ast.stmt], ...] = ([], [], [])
+                work.append(('build', e, need_atomic, out, branches))
+                work.append(('visit', orelse, False, branches[2]))
+                work.append(('visit', body, False, branches[1]))
+                work.append(('visit', test, False, branches[0]))
+            case Begin(inits, val):
+                new_inits = [stmt for s in inits for stmt in self.rco_stmt(s, ctx)]
+                work.append(('build', e, need_atomic, out, new_inits))
+                work.append(('visit', val, False, out))
             case _:
                 raise Exception('error in interp_exp, unexpected ' + repr(e))
 
+    def rco_build(self, e: ast.expr, need_atomic: bool, out: List[ast.stmt], data: Any, results: List[ast.expr], ctx: Compilation) -> None:
+        match e:
+            case ast.BinOp(_, op, _):
+                new_right = results.pop()
+                new_left = results.pop()
+                results.append(self.atomic(ast.BinOp(new_left, op, new_right), need_atomic, out, ctx))
+            case ast.Compare(_, [op], [_]):
+                new_right = results.pop()
+                new_left = results.pop()
+                results.append(self.atomic(ast.Compare(new_left, [op], [new_right]), need_atomic, out, ctx))
+            case ast.Subscript(_, _, ast.Load()):
+                new_idx = results.pop()
+                new_tup = results.pop()
+                results.append(ast.Subscript(new_tup, new_idx, ast.Load()))
+            case ast.UnaryOp(ast.USub(), _):
+                results.append(self.atomic(ast.UnaryOp(ast.USub(), results.pop()), need_atomic, out, ctx))
+            case ast.Call(ast.Name('len'), [_]):
+                results.append(ast.Call(ast.Name('len'), [results.pop()]))
+            case ast.IfExp(_, _, _):
+                new_orelse = results.pop()
+                new_body = results.pop()
+                new_test = results.pop()
+                new_test, new_body, new_orelse = [Begin(inits, new_e) if len(inits) != 0 else new_e
+                                                  for inits, new_e in zip(data, [new_test, new_body, new_orelse])]
+                results.append(self.atomic(ast.IfExp(new_test, new_body, new_orelse), need_atomic, out, ctx))
+            case Begin(_, _):
+                results.append(Begin(data, results.pop()))
+            case _:
+                raise Exception('error in rco_build, unexpected ' + repr(e))
+
+    def atomic(self, e: ast.expr, need_atomic: bool, out: List[ast.stmt], ctx: Compilation) -> ast.expr:
+        if not need_atomic:
+            return e
+        temp = ast.Name(ctx.names.fresh('_t', ctx.line))
+        out.append(ast.Assign([temp], e))
+        return temp
+
     '''
     Convert to 3AC actually...
     '''
 
-    def rco_stmt(self, s: ast.stmt) -> list[ast.stmt]:
-        stmts: list[ast.stmt]
-        temp_assigns: list[ast.stmt]
+    def rco_stmt(self, s: ast.stmt, ctx: Compilation) -> list[ast.stmt]:
+        line = ctx.line
+        ctx.line = getattr(s, 'lineno', line)
+        try:
+            return self.rco_located(s, ctx)
+        finally:
+            ctx.line = line
+
+    def rco_located(self, s: ast.stmt, ctx: Compilation) -> list[ast.stmt]:
+        stmts: list[ast.stmt] = []
         match s:
             case ast.Assign([ast.Name(id)], value):
-                new_value, temps1 = self.rco_exp(value, False)
-                temp_assigns = [ast.Assign([name], exp)
-                                for (name, exp) in temps1]
-                stmts = temp_assigns + [ast.Assign([ast.Name(id)], new_value)]
+                new_value = self.rco_exp(value, False, stmts, ctx)
+                stmts.append(ast.Assign([ast.Name(id)], new_value))
             case ast.Expr(ast.Call(ast.Name('print'), [arg], keywords)):
-                new_arg, temps1 = self.rco_exp(arg, True)
-                temp_assigns = [ast.Assign([name], exp)
-                                for (name, exp) in temps1]
-                stmts = temp_assigns + \
-                    [ast.Expr(ast.Call(ast.Name('print'), [new_arg], keywords))]
+                new_arg = self.rco_exp(arg, True, stmts, ctx)
+                stmts.append(ast.Expr(ast.Call(ast.Name('print'), [new_arg], keywords)))
             case ast.Expr(value):  # may have side effects in production
-                new_value, temps1 = self.rco_exp(value, False)
-                temp_assigns = [ast.Assign([name], exp)
-                                for (name, exp) in temps1]
-                stmts = temp_assigns + [ast.Expr(new_value)]
+                new_value = self.rco_exp(value, False, stmts, ctx)
+                stmts.append(ast.Expr(new_value))
             case ast.If(test, body, orelse):
-                new_test, temps1 = self.rco_exp(test, False)
-                temp_assigns = [ast.Assign([name], exp)
-                                for (name, exp) in temps1]
-                new_body = [stmt for s in body for stmt in self.rco_stmt(s)]
-                new_orelse = [stmt for s in orelse for stmt in self.rco_stmt(s)]
-                stmts = temp_assigns + [ast.If(new_test, new_body, new_orelse)]
+                new_test = self.rco_exp(test, False, stmts, ctx)
+                new_body = [stmt for s in body for stmt in self.rco_stmt(s, ctx)]
+                new_orelse = [stmt for s in orelse for stmt in self.rco_stmt(s, ctx)]
+                stmts.append(ast.If(new_test, new_body, new_orelse))
             case ast.While(test, body, []):
-                new_test, temps1 = self.rco_exp(test, False)
-                temp_assigns = [ast.Assign([name], exp)
-                                for (name, exp) in temps1]
-                new_body = [stmt for s in body for stmt in self.rco_stmt(s)]
-                stmts = temp_assigns + [ast.While(new_test, new_body, [])]
+                new_test = self.rco_exp(test, False, stmts, ctx)
+                new_body = [stmt for s in body for stmt in self.rco_stmt(s, ctx)]
+                stmts.append(ast.While(new_test, new_body, []))
             case Collect(bytes_):
-                stmts = [Collect(bytes_)]
+                stmts.append(Collect(bytes_))
             case ast.Assign([ast.Subscript(tup, idx, ast.Load())], value):
-                new_tup, temps1 = self.rco_exp(tup, True)
-                temp_assigns = [ast.Assign([name], exp)
-                                for (name, exp) in temps1]
-                new_idx, temps2 = self.rco_exp(idx, True)
-                temp_assigns += [ast.Assign([name], exp)
-                                for (name, exp) in temps2]
-                new_val, temps3 = self.rco_exp(value, True)
-                temp_assigns += [ast.Assign([name], exp)
-                                for (name, exp) in temps3]
-                stmts = temp_assigns + [ast.Assign([ast.Subscript(new_tup, new_idx, ast.Load())], new_val)]
+                new_tup = self.rco_exp(tup, True, stmts, ctx)
+                new_idx = self.rco_exp(idx, True, stmts, ctx)
+                new_val = self.rco_exp(value, True, stmts, ctx)
+                stmts.append(ast.Assign([ast.Subscript(new_tup, new_idx, ast.Load())], new_val))
             case _:
                 raise Exception('rco_stmt: unexpected ' + repr(s))
+        for stmt in stmts:
+            ast.copy_location(stmt, s)
         return stmts
 
-    def run(self, prog: ast.Module, manager: PassManager) -> ast.Module: #type: ignore
-        stmts = [stmt for s in prog.body for stmt in self.rco_stmt(s)]
+    def run(self, prog: ast.Module, ctx: Compilation) -> ast.Module: #type: ignore
+        stmts = [stmt for s in prog.body for stmt in self.rco_stmt(s, ctx)]
         return ast.Module(stmts)
 
 
@@ -324,117 +499,164 @@ class RCOPass(TransformPass):
 Change Ifs to Gotos
 (And make every if corresponding to a compare)
 '''
+# The statements that follow, as a linked list (stmt, rest) ending in None: prepending a
+# statement takes constant time and both branches of a conditional can share one tail.
+Cont = Optional[Tuple[ast.stmt, 'Cont']]
+# A generator that yields the explications it depends on, is sent back their
+# continuations, and returns its own.
+Explication = Generator['Explication', Cont, Cont]
+
+def cont_list(cont: Cont) -> List[ast.stmt]:
+    stmts = []
+    while cont is not None:
+        stmt, cont = cont
+        stmts.append(stmt)
+    return stmts
+
 class ExplicateControlPass(TransformPass):
     name = 'explicate_control'
     source = 'Py'
     target = 'CLike'
     
-    def create_block(self, stmts: list[ast.stmt], basick_blocks: dict[str, list[ast.stmt]]) -> list[ast.stmt]: 
+    '''
+    Block labels are derived from the source line of the statement being explicated
+    (block_<line>_<n>), so the labels of a program are the same in every compilation
+    and a block-frequency profile of one compilation applies to the next.
+    '''
+    def block_label(self, ctx: Compilation) -> str:
+        return label_name(ctx.names.fresh('block_', ctx.line))
+    
+    def create_block(self, stmts: Cont, basick_blocks: dict[str, list[ast.stmt]], ctx: Compilation) -> Cont: 
         match stmts:
-            case [Goto(_)]:
+            case (Goto(_), None):
                 return stmts
             case _:
-                label = label_name(generate_name('block'))
-                basick_blocks[label] = stmts
-                return [Goto(label)]
+                label = self.block_label(ctx)
+                basick_blocks[label] = cont_list(stmts)
+                return (Goto(label), None)
+
+    '''
+    Run an explication to its continuation. The explications it depends on are kept on
+    an explicit stack, so deeply nested conditionals do not hit the recursion limit.
+    '''
+    def explicate(self, explication: Explication) -> Cont:
+        stack = [explication]
+        cont = None
+        while stack:
+            try:
+                stack.append(stack[-1].send(cont))
+                cont = None
+            except StopIteration as done:
+                stack.pop()
+                cont = done.value
+        return cont
     
-    def explicate_effect(self, e, cont, basic_blocks) -> list[ast.stmt]:
+    def explicate_effect(self, e, cont, basic_blocks, ctx: Compilation) -> Explication:
         match e:
             case ast.IfExp(test, body, orelse):
-                curr = self.create_block(cont, basic_blocks)
-                new_body = self.explicate_effect(body, curr, basic_blocks) # new block
-                new_orelse = self.explicate_effect(orelse, curr, basic_blocks)
-                return self.explicate_pred(test, new_body, new_orelse, basic_blocks)
+                curr = self.create_block(cont, basic_blocks, ctx)
+                new_body = yield self.explicate_effect(body, curr, basic_blocks, ctx) # new block
+                new_orelse = yield self.explicate_effect(orelse, curr, basic_blocks, ctx)
+                return (yield self.explicate_pred(test, new_body, new_orelse, basic_blocks, ctx))
             case ast.Call(func, args):
-                return [ast.Expr(e)] + cont
+                return (ast.Expr(e), cont)
             case Begin(body, result):
                 for s in reversed(body):
-                    cont = self.explicate_stmt(s, cont, basic_blocks)
+                    cont = yield self.explicate_stmt(s, cont, basic_blocks, ctx)
                 return cont
             case Allocate(len_, type):
-                return [ast.Expr(e)] + cont
+                return (ast.Expr(e), cont)
             case _:
                 return cont
                 
-    def explicate_assign(self, rhs, lhs, cont, basic_blocks) -> list[ast.stmt]:
+    def explicate_assign(self, rhs, lhs, cont, basic_blocks, ctx: Compilation) -> Explication:
         match rhs:
             case ast.IfExp(test, body, orelse):
-                curr = self.create_block(cont, basic_blocks)
+                curr = self.create_block(cont, basic_blocks, ctx)
                 # holly shit, so smart, not explicate_effect but explicate_assign! don't deconstruct but translate!
-                new_body = self.explicate_assign(body, lhs, curr, basic_blocks)
-                new_orelse = self.explicate_assign(orelse, lhs, curr, basic_blocks)
-                return self.explicate_pred(test, new_body, new_orelse, basic_blocks)
+                new_body = yield self.explicate_assign(body, lhs, curr, basic_blocks, ctx)
+                new_orelse = yield self.explicate_assign(orelse, lhs, curr, basic_blocks, ctx)
+                return (yield self.explicate_pred(test, new_body, new_orelse, basic_blocks, ctx))
             case Begin(body, result):
-                cont = [ast.Assign([lhs], result)] + cont
+                cont = (ast.Assign([lhs], result), cont)
                 for s in reversed(body):
-                    cont = self.explicate_stmt(s, cont, basic_blocks)
+                    cont = yield self.explicate_stmt(s, cont, basic_blocks, ctx)
                 return cont
             case _:
-                return [ast.Assign([lhs], rhs)] + cont
+                return (ast.Assign([lhs], rhs), cont)
         
 
-    def explicate_pred(self, cnd, thn, els, basic_blocks) -> list[ast.stmt]:
+    def explicate_pred(self, cnd, thn, els, basic_blocks, ctx: Compilation) -> Explication:
         match cnd:
             case ast.Compare(left, [op], [right]):
-                goto_thn = self.create_block(thn, basic_blocks)
-                goto_els = self.create_block(els, basic_blocks)
-                return [ast.If(cnd, goto_thn, goto_els)]
+                goto_thn = self.create_block(thn, basic_blocks, ctx)
+                goto_els = self.create_block(els, basic_blocks, ctx)
+                return (ast.If(cnd, cont_list(goto_thn), cont_list(goto_els)), None)
             case ast.Constant(True):
                 return thn
             case ast.Constant(False):
                 return els
             case ast.UnaryOp(ast.Not(), operand):
-                goto_thn = self.create_block(thn, basic_blocks)
-                goto_els = self.create_block(els, basic_blocks)
-                return [ast.If(cnd, goto_thn, goto_els)]
+                goto_thn = self.create_block(thn, basic_blocks, ctx)
+                goto_els = self.create_block(els, basic_blocks, ctx)
+                return (ast.If(cnd, cont_list(goto_thn), cont_list(goto_els)), None)
             case ast.IfExp(test, body, orelse):
                 # holly recursion
-                goto_thn = self.explicate_pred(body, thn, els, basic_blocks)
-                goto_els = self.explicate_pred(orelse, thn, els, basic_blocks)
-                return self.explicate_pred(test, goto_thn, goto_els, basic_blocks)
+                goto_thn = yield self.explicate_pred(body, thn, els, basic_blocks, ctx)
+                goto_els = yield self.explicate_pred(orelse, thn, els, basic_blocks, ctx)
+                return (yield self.explicate_pred(test, goto_thn, goto_els, basic_blocks, ctx))
             case Begin(body, result):
-                cont = self.explicate_pred(result, thn, els, basic_blocks)
+                cont = yield self.explicate_pred(result, thn, els, basic_blocks, ctx)
                 for s in reversed(body):
-                    cont = self.explicate_stmt(s, cont, basic_blocks)
+                    cont = yield self.explicate_stmt(s, cont, basic_blocks, ctx)
                 return cont
             case _:
-                return [ast.If(ast.Compare(cnd, [ast.Eq()], [ast.Constant(False)]),
-                    self.create_block(els, basic_blocks),
-                    self.create_block(thn, basic_blocks))]
+                return (ast.If(ast.Compare(cnd, [ast.Eq()], [ast.Constant(False)]),
+                    cont_list(self.create_block(els, basic_blocks, ctx)),
+                    cont_list(self.create_block(thn, basic_blocks, ctx))), None)
                 
 
-    def explicate_stmt(self, s, cont, basic_blocks) -> list[ast.stmt]:
+    def explicate_stmt(self, s, cont, basic_blocks, ctx: Compilation) -> Explication:
+        line = ctx.line
+        ctx.line = getattr(s, 'lineno', line)
+        try:
+            return (yield self.explicate_located(s, cont, basic_blocks, ctx))
+        finally:
+            ctx.line = line
+
+    def explicate_located(self, s, cont, basic_blocks, ctx: Compilation) -> Explication:
         match s:
             case ast.Assign([lhs], rhs):
-                return self.explicate_assign(rhs, lhs, cont, basic_blocks)
+                return (yield self.explicate_assign(rhs, lhs, cont, basic_blocks, ctx))
             case ast.Expr(value):
-                return self.explicate_effect(value, cont, basic_blocks)
+                return (yield self.explicate_effect(value, cont, basic_blocks, ctx))
             case ast.If(test, body, orelse):
-                curr = self.create_block(cont, basic_blocks)
+                curr = self.create_block(cont, basic_blocks, ctx)
                 
                 new_body = curr
                 for s in reversed(body):
-                    new_body = self.explicate_stmt(s, new_body, basic_blocks)
+                    new_body = yield self.explicate_stmt(s, new_body, basic_blocks, ctx)
 
                 new_orelse = curr
                 for s in reversed(orelse):
-                    new_orelse = self.explicate_stmt(s, new_orelse, basic_blocks)
+                    new_orelse = yield self.explicate_stmt(s, new_orelse, basic_blocks, ctx)
                     
-                return self.explicate_pred(test, new_body, new_orelse, basic_blocks)
+                return (yield self.explicate_pred(test, new_body, new_orelse, basic_blocks, ctx))
             case ast.While(test, body, []):
-                curr = self.create_block(cont, basic_blocks)
+                curr = self.create_block(cont, basic_blocks, ctx)
                 
-                new_body = []
+                new_body = None
                 for s in reversed(body):
-                    new_body = self.explicate_stmt(s, new_body, basic_blocks)
+                    new_body = yield self.explicate_stmt(s, new_body, basic_blocks, ctx)
                 
-                new_body_label = self.create_block(new_body, basic_blocks)
+                new_body_label = self.create_block(new_body, basic_blocks, ctx)
                 
-                loop_head = self.explicate_pred(test, new_body_label, curr, basic_blocks)
-                loop_head = self.create_block(loop_head, basic_blocks)
+                loop_head = yield self.explicate_pred(test, new_body_label, curr, basic_blocks, ctx)
+                loop_head = self.create_block(loop_head, basic_blocks, ctx)
                 
-                # a liitle hack
-                new_body.extend(loop_head)
+                # a liitle hack: the block of the body jumps back to the loop head
+                if new_body_label is not new_body:
+                    basic_blocks[new_body_label[0].label].extend(cont_list(loop_head))
                 
                 return loop_head
                 
@@ -444,17 +666,271 @@ class ExplicateControlPass(TransformPass):
 
         
     # generate backward...
-    def run(self, p: ast.Module, manager: PassManager) -> CProgram: #type: ignore
+    def run(self, p: ast.Module, ctx: Compilation) -> CProgram: #type: ignore
         match p:
             case ast.Module(body):
-                new_body = [ast.Return(ast.Constant(0))]
+                new_body: Cont = (ast.Return(ast.Constant(0)), None)
                 basic_blocks = {}
                 for s in reversed(body):
-                    new_body = self.explicate_stmt(s, new_body, basic_blocks)
-                basic_blocks[label_name('start')] = new_body
+                    new_body = self.explicate(self.explicate_stmt(s, new_body, basic_blocks, ctx))
+                basic_blocks[label_name('start')] = cont_list(new_body)
                 return CProgram(basic_blocks)
 
 
+############################################################################
+# Fused Front End (shrink + remove complex operands + explicate control)
+############################################################################
+class FrontEndPass(ExplicateControlPass, RCOPass):
+    '''
+    Shrink, remove complex operands and explicate control in one traversal of the source.
+    Produces the same CProgram as the three passes: temporaries and block labels come from
+    the same name supply, and the statements of one source line are lowered in source
+    order before they are explicated, as the separate passes do.
+    Expressions are lowered with the explicit stack of RCOPass.rco_exp, which shrinks
+    `and` and `or` on the way, so deeply nested expressions do not hit the recursion limit.
+    '''
+    name = 'front_end'
+    source = 'Py'
+    target = 'CLike'
+
+    def rco_visit(self, e: ast.expr, need_atomic: bool, out: List[ast.stmt], work: List[Tuple], results: List[ast.expr], ctx: Compilation) -> None:
+        if not isinstance(e, ast.BoolOp):
+            return RCOPass.rco_visit(self, e, need_atomic, out, work, results, ctx)
+        match e:
+            case ast.BoolOp(ast.And(), [left, right]):
+                work.append(('visit', ast.IfExp(left, right, ast.Constant(False)), need_atomic, out))
+            case ast.BoolOp(ast.Or(), [left, right]):
+                work.append(('visit', ast.IfExp(left, ast.Constant(True), right), need_atomic, out))
+            case _:
+                raise Exception('error in lower_exp, unexpected ' + repr(e))
+
+    def lower_stmt(self, s: ast.stmt, out: List[ast.stmt], ctx: Compilation) -> None:
+        line = ctx.line
+        ctx.line = getattr(s, 'lineno', line)
+        start = len(out)
+        try:
+            self.lower_located(s, out, ctx)
+        finally:
+            ctx.line = line
+        for stmt in out[start:]:
+            ast.copy_location(stmt, s)
+
+    def lower_located(self, s: ast.stmt, out: List[ast.stmt], ctx: Compilation) -> None:
+        match s:
+            case ast.Assign([ast.Name(id)], value):
+                new_value = self.rco_exp(value, False, out, ctx)
+                out.append(ast.Assign([ast.Name(id)], new_value))
+            case ast.Expr(ast.Call(ast.Name('print'), [arg], keywords)):
+                new_arg = self.rco_exp(arg, True, out, ctx)
+                out.append(ast.Expr(ast.Call(ast.Name('print'), [new_arg], keywords)))
+            case ast.Expr(value):
+                new_value = self.rco_exp(value, False, out, ctx)
+                out.append(ast.Expr(new_value))
+            case ast.If(test, body, orelse):
+                new_test = self.rco_exp(test, False, out, ctx)
+                new_body: List[ast.stmt] = []
+                for b in body:
+                    self.lower_stmt(b, new_body, ctx)
+                new_orelse: List[ast.stmt] = []
+                for b in orelse:
+                    self.lower_stmt(b, new_orelse, ctx)
+                out.append(ast.If(new_test, new_body, new_orelse))
+            case ast.While(test, body, []):
+                new_test = self.rco_exp(test, False, out, ctx)
+                new_body = []
+                for b in body:
+                    self.lower_stmt(b, new_body, ctx)
+                out.append(ast.While(new_test, new_body, []))
+            case _:
+                raise Exception('error in lower_stmt, unexpected ' + repr(s))
+
+    # consecutive statements on the same source line
+    @staticmethod
+    def line_groups(body: List[ast.stmt]) -> List[List[ast.stmt]]:
+        groups: List[List[ast.stmt]] = []
+        for s in body:
+            if groups and getattr(groups[-1][0], 'lineno', None) == getattr(s, 'lineno', None):
+                groups[-1].append(s)
+            else:
+                groups.append([s])
+        return groups
+
+    def run(self, p: ast.Module, ctx: Compilation) -> CProgram: #type: ignore
+        new_body: Cont = (ast.Return(ast.Constant(0)), None)
+        basic_blocks: Dict[str, List[ast.stmt]] = {}
+        for group in reversed(self.line_groups(p.body)):
+            stmts: List[ast.stmt] = []
+            for s in group:
+                self.lower_stmt(s, stmts, ctx)
+            for s in reversed(stmts):
+                new_body = self.explicate(self.explicate_stmt(s, new_body, basic_blocks, ctx))
+        basic_blocks[label_name('start')] = cont_list(new_body)
+        return CProgram(basic_blocks)
+
+
+############################################################################
+# Copy Propagation (on the C-like program)
+############################################################################
+class CopyPropagationPass(TransformPass):
+    '''
+    Replace uses of a variable that holds a copy of another variable or of a constant by
+    the original inside each block, folding what becomes constant, then remove the
+    assignments without side effects whose variable is not live afterwards. Fewer
+    variables reach select instructions, uncover_live and build_interference.
+    '''
+    name = 'copy_propagation'
+    source = 'CLike'
+    target = 'CLike'
+
+    # the target of an assignment is never substituted into its own right-hand side,
+    # select instructions only handles x = x op y
+    def propagate_exp(self, e: ast.expr, copies: Dict[str, ast.expr], target: Optional[str] = None) -> ast.expr:
+        match e:
+            case ast.Name(id):
+                copy = copies.get(id)
+                if copy is None or (isinstance(copy, ast.Name) and copy.id == target):
+                    return e
+                return copy
+            case ast.BinOp(left, op, right):
+                return fold_exp(ast.BinOp(self.propagate_exp(left, copies, target), op, self.propagate_exp(right, copies, target)))
+            case ast.UnaryOp(op, v):
+                return fold_exp(ast.UnaryOp(op, self.propagate_exp(v, copies, target)))
+            case ast.Compare(left, [op], [right]):
+                return fold_exp(ast.Compare(self.propagate_exp(left, copies, target), [op], [self.propagate_exp(right, copies, target)]))
+            case ast.Call(func, args, keywords):
+                return ast.Call(func, [self.propagate_exp(arg, copies, target) for arg in args], keywords)
+            case _:
+                return e
+
+    def propagate_block(self, ss: List[ast.stmt]) -> List[ast.stmt]:
+        copies: Dict[str, ast.expr] = {}
+        # variables whose copy is the key
+        copied_to: Dict[str, List[str]] = {}
+
+        def assigned(id: str) -> None:
+            copies.pop(id, None)
+            for var in copied_to.pop(id, []):
+                copy = copies.get(var)
+                if isinstance(copy, ast.Name) and copy.id == id:
+                    del copies[var]
+
+        new_ss: List[ast.stmt] = []
+        for s in ss:
+            match s:
+                case ast.Assign([ast.Name(id)], value):
+                    new_value = self.propagate_exp(value, copies, id)
+                    assigned(id)
+                    match new_value:
+                        case ast.Name(src) if src != id:
+                            copies[id] = new_value
+                            copied_to.setdefault(src, []).append(id)
+                        case ast.Constant(_):
+                            copies[id] = new_value
+                    new_ss.append(ast.Assign([ast.Name(id)], new_value))
+                case ast.Expr(value):
+                    new_ss.append(ast.Expr(self.propagate_exp(value, copies)))
+                case ast.If(test, body, orelse):
+                    new_test = self.propagate_exp(test, copies)
+                    if bool_constant(new_test):
+                        new_ss.extend(body if new_test.value else orelse) #type: ignore
+                    else:
+                        new_ss.append(ast.If(new_test, body, orelse))
+                case Goto(_) | ast.Return(ast.Constant(_)):
+                    new_ss.append(s)
+                case _:
+                    copies.clear()
+                    copied_to.clear()
+                    new_ss.append(s)
+        return new_ss
+
+    @staticmethod
+    def successors(ss: List[ast.stmt]) -> List[str]:
+        labels = []
+        for s in ss:
+            match s:
+                case Goto(label):
+                    labels.append(label)
+                case ast.If(_, body, orelse):
+                    labels.extend(g.label for g in body + orelse if isinstance(g, Goto))
+        return labels
+
+    def uses(self, s: ast.AST) -> List[str]:
+        match s:
+            case ast.Name(id):
+                return [id]
+            case ast.Constant(_) | Goto(_):
+                return []
+            case ast.BinOp(left, _, right) | ast.Compare(left, [_], [right]):
+                return self.uses(left) + self.uses(right)
+            case ast.UnaryOp(_, v) | ast.Expr(v) | ast.Return(v) | ast.If(v, _, _):
+                return self.uses(v)
+            case ast.Call(_, args, _):
+                return [id for arg in args for id in self.uses(arg)]
+            case _:
+                return [n.id for n in ast.walk(s) if isinstance(n, ast.Name)]
+
+    # variables read before they are written, and variables written, by a block
+    def gen_kill(self, ss: List[ast.stmt]) -> Tuple[set, set]:
+        gen: set = set()
+        kill: set = set()
+        for s in reversed(ss):
+            match s:
+                case ast.Assign([ast.Name(id)], value):
+                    gen.discard(id)
+                    kill.add(id)
+                    gen.update(self.uses(value))
+                case _:
+                    gen.update(self.uses(s))
+        return gen, kill
+
+    def live_after_blocks(self, body: Dict[str, List[ast.stmt]]) -> Dict[str, set]:
+        succs = {label: [l for l in self.successors(ss) if l in body] for label, ss in body.items()}
+        preds: Dict[str, List[str]] = {label: [] for label in body}
+        for label, ls in succs.items():
+            for l in ls:
+                preds[l].append(label)
+        gen_kill = {label: self.gen_kill(ss) for label, ss in body.items()}
+        live_in: Dict[str, set] = {label: set() for label in body}
+        live_out: Dict[str, set] = {label: set() for label in body}
+        # explicate control makes the blocks at the end of the program first
+        worklist = list(reversed(body))
+        pending = set(worklist)
+        while worklist:
+            label = worklist.pop()
+            pending.discard(label)
+            live_out[label] = set().union(*(live_in[l] for l in succs[label]))
+            gen, kill = gen_kill[label]
+            new_in = gen | (live_out[label] - kill)
+            if new_in != live_in[label]:
+                live_in[label] = new_in
+                for l in preds[label]:
+                    if l not in pending:
+                        pending.add(l)
+                        worklist.append(l)
+        return live_out
+
+    def remove_dead(self, ss: List[ast.stmt], live: set) -> List[ast.stmt]:
+        live = set(live)
+        new_ss: List[ast.stmt] = []
+        for s in reversed(ss):
+            match s:
+                case ast.Assign([ast.Name(id)], ast.Name(_) | ast.Constant(_) | ast.BinOp(_, _, _) | ast.UnaryOp(_, _) | ast.Compare(_, _, _)) if id not in live:
+                    continue
+                case ast.Assign([ast.Name(id)], value):
+                    live.discard(id)
+                    live.update(self.uses(value))
+                case _:
+                    live.update(self.uses(s))
+            new_ss.append(s)
+        new_ss.reverse()
+        return new_ss
+
+    def run(self, p: CProgram, ctx: Compilation) -> CProgram: #type: ignore
+        body = {label: self.propagate_block(ss) for label, ss in p.body.items()}
+        live_out = self.live_after_blocks(body)
+        return CProgram({label: self.remove_dead(ss, live_out[label]) for label, ss in body.items()})
+
+
 ############################################################################
 # Select Instructions
 ############################################################################
@@ -464,8 +940,14 @@ class SelectInstrPass(TransformPass):
     source = 'Py'
     target = 'X86'
     
+    # one Variable per name, operands are compared by identity from here on
+    def variable(self, id: str, ctx: Compilation) -> x86.Variable:
+        v = ctx.variables.get(id)
+        if v is None:
+            v = ctx.variables[id] = x86.Variable(id)
+        return v
     
-    def select_arg(self, e: ast.expr) -> x86.arg:
+    def select_arg(self, e: ast.expr, ctx: Compilation) -> x86.arg:
         match e:
             case ast.Constant(True):
                 return x86.Immediate(1)
@@ -474,7 +956,7 @@ class SelectInstrPass(TransformPass):
             case ast.Constant(value):
                 return x86.Immediate(value)
             case ast.Name(id):
-                return x86.Variable(id)
+                return self.variable(id, ctx)
             case _:
                 raise Exception('select_stmt: unexpected ' + repr(e))
 
@@ -493,41 +975,41 @@ class SelectInstrPass(TransformPass):
             case _:
                 raise Exception("unknow" + repr(cmp))
 
-    def select_stmt(self, s: ast.stmt) -> List[x86.instr]:
+    def select_stmt(self, s: ast.stmt, ctx: Compilation) -> List[x86.instr]:
         match s:
             # Assign
             ## Special Cases
             case ast.Assign([ast.Name(id1)], ast.BinOp(ast.Name(id2), ast.Add(), right)) if id1 == id2:
-                return [x86.Instr('addq', [self.select_arg(right), x86.Variable(id1)])]
+                return [x86.Instr('addq', [self.select_arg(right, ctx), self.variable(id1, ctx)])]
             case ast.Assign([ast.Name(id)], ast.BinOp(left, ast.Add(), right)):
-                return [x86.Instr('movq', [self.select_arg(right), x86.Variable(id)]),
-                        x86.Instr('addq', [self.select_arg(left), x86.Variable(id)])]
+                return [x86.Instr('movq', [self.select_arg(right, ctx), self.variable(id, ctx)]),
+                        x86.Instr('addq', [self.select_arg(left, ctx), self.variable(id, ctx)])]
             case ast.Assign([ast.Name(id1)], ast.BinOp(ast.Name(id2), ast.Sub(), right)) if id1 == id2:
-                return [x86.Instr('subq', [self.select_arg(right), x86.Variable(id1)])]
+                return [x86.Instr('subq', [self.select_arg(right, ctx), self.variable(id1, ctx)])]
             case ast.Assign([ast.Name(id)], ast.BinOp(left, ast.Sub(), right)):
-                return [x86.Instr('movq', [self.select_arg(left), x86.Variable(id)]),
-                        x86.Instr('subq', [self.select_arg(right), x86.Variable(id)])]
+                return [x86.Instr('movq', [self.select_arg(left, ctx), self.variable(id, ctx)]),
+                        x86.Instr('subq', [self.select_arg(right, ctx), self.variable(id, ctx)])]
             case ast.Assign([ast.Name(id1)], ast.UnaryOp(ast.Not(), ast.Name(id2))) if id1 == id2:
-                return [x86.Instr('xorq', [x86.Immediate(1), x86.Variable(id1)])]
+                return [x86.Instr('xorq', [x86.Immediate(1), self.variable(id1, ctx)])]
             ## Common Cases
             case ast.Assign([ast.Name(id)], ast.UnaryOp(ast.USub(), arg)):
-                return [x86.Instr('movq', [self.select_arg(arg), x86.Variable(id)]),
-                        x86.Instr('negq', [x86.Variable(id)])]
+                return [x86.Instr('movq', [self.select_arg(arg, ctx), self.variable(id, ctx)]),
+                        x86.Instr('negq', [self.variable(id, ctx)])]
             case ast.Assign([ast.Name(id)], ast.Constant(_) | ast.Name(_)):
-                return [x86.Instr('movq', [self.select_arg(s.value), x86.Variable(id)])]
+                return [x86.Instr('movq', [self.select_arg(s.value, ctx), self.variable(id, ctx)])]
             case ast.Assign([ast.Name(id)], ast.Call(ast.Name('input_int'), [], _)):
                 return [x86.Callq('read_int', 1),
-                        x86.Instr('movq', [x86.Reg('rax'), x86.Variable(id)])]
+                        x86.Instr('movq', [x86.Reg('rax'), self.variable(id, ctx)])]
             case ast.Assign([ast.Name(id)], ast.Compare(left,[cmp],[right])):
-                return [x86.Instr('cmpq', [self.select_arg(right), self.select_arg(left)]),
+                return [x86.Instr('cmpq', [self.select_arg(right, ctx), self.select_arg(left, ctx)]),
                         x86.Instr('set' + self.get_cc(cmp), [x86.Reg('al')]),
-                        x86.Instr('movzq', [x86.Reg('al'), x86.Variable(id)])]
+                        x86.Instr('movzq', [x86.Reg('al'), self.variable(id, ctx)])]
             case ast.Assign([ast.Name(id)], ast.UnaryOp(ast.Not(), arg)):
-                return [x86.Instr('movq', [self.select_arg(arg), x86.Variable(id)]),
-                        x86.Instr('xorq', [x86.Immediate(1), x86.Variable(id)])]
+                return [x86.Instr('movq', [self.select_arg(arg, ctx), self.variable(id, ctx)]),
+                        x86.Instr('xorq', [x86.Immediate(1), self.variable(id, ctx)])]
             # Expr
             case ast.Expr(ast.Call(ast.Name('print'), [arg], _)):
-                return [x86.Instr('movq', [self.select_arg(arg), x86.Reg('rdi')]),
+                return [x86.Instr('movq', [self.select_arg(arg, ctx), x86.Reg('rdi')]),
                         x86.Callq('print_int', 1)]
             case ast.Expr(ast.Call(ast.Name('input_int'), [arg], _)):
                 return [x86.Callq('read_int', 1)]
@@ -537,7 +1019,7 @@ class SelectInstrPass(TransformPass):
             case Goto(label):
                 return [x86.Jump(label)]
             case ast.If(ast.Compare(left,[cmp],[right]), [Goto(label1)], [Goto(label2)]):
-                return [x86.Instr('cmpq', [self.select_arg(right), self.select_arg(left)]),
+                return [x86.Instr('cmpq', [self.select_arg(right, ctx), self.select_arg(left, ctx)]),
                         x86.JumpIf(self.get_cc(cmp), label1),
                         x86.Jump(label2)]
             case ast.Return(v):
@@ -545,10 +1027,10 @@ class SelectInstrPass(TransformPass):
             case _:
                 raise Exception('select_stmt: unexpected ' + repr(s))
 
-    def run(self, p: CProgram, manager: PassManager) -> x86.X86Program: #type: ignore
+    def run(self, p: CProgram, ctx: Compilation) -> x86.X86Program: #type: ignore
         body = {}
         for bk, ss in p.body.items():
-            body[bk] = [stmt for s in ss for stmt in self.select_stmt(s)]
+            body[bk] = [stmt for s in ss for stmt in self.select_stmt(s, ctx)]
         return x86.X86Program(body)
 
 
@@ -562,12 +1044,12 @@ class AssignHomePass(TransformPass):
     source = 'X86'
     target = 'X86'
     
-    def assign_homes_arg(self, a: x86.arg, home: Dict[x86.Variable, x86.arg]) -> x86.arg:
+    def assign_homes_arg(self, a: x86.arg, home: Dict[x86.Variable, x86.arg], ctx: Compilation) -> x86.arg:
         match a:
             case x86.Variable(_):
                 if not a in home:
-                    self.stack_space += 8
-                    home[a] = x86.Deref('rbp', -self.stack_space)
+                    ctx.stack_space += 8
+                    home[a] = x86.Deref('rbp', -ctx.stack_space)
                 return home[a]
             case x86.Reg(_) | x86.Immediate(_) as ri:
                 return ri
@@ -575,14 +1057,14 @@ class AssignHomePass(TransformPass):
                 raise Exception('assign_homes_arg: unexpected ' + repr(a))
 
     def assign_homes_instr(self, i: x86.instr,
-                           home: Dict[x86.Variable, x86.arg]) -> x86.instr:
+                           home: Dict[x86.Variable, x86.arg], ctx: Compilation) -> x86.instr:
         match i:
             case x86.Instr(op, [left, right]):
-                left = self.assign_homes_arg(left, home)
-                right = self.assign_homes_arg(right, home)
+                left = self.assign_homes_arg(left, home, ctx)
+                right = self.assign_homes_arg(right, home, ctx)
                 return x86.Instr(op, [left, right])
             case x86.Instr(op, [arg]):
-                arg = self.assign_homes_arg(arg, home)
+                arg = self.assign_homes_arg(arg, home, ctx)
                 return x86.Instr(op, [arg])
             case x86.Callq(_, _) as call:
                 return call
@@ -596,16 +1078,15 @@ class AssignHomePass(TransformPass):
                 raise Exception('assign_homes_instr: unexpected ' + repr(i))
 
     def assign_homes_instrs(self, inss: List[x86.instr],
-                            home: Dict[x86.Variable, x86.arg]) -> List[x86.instr]:
+                            home: Dict[x86.Variable, x86.arg], ctx: Compilation) -> List[x86.instr]:
         instrs: List[x86.instr] = []
         for i in inss:
-            instrs.append(self.assign_homes_instr(i, home))
+            instrs.append(self.assign_homes_instr(i, home, ctx))
         return instrs
 
-    def run(self, p: x86.X86Program, manager: PassManager) -> x86.X86Program: #type: ignore
-        self.stack_space = 0
-        instrs = self.assign_homes_instrs(p.body, {}) #type: ignore
-        return x86.X86Program(instrs, self.stack_space)
+    def run(self, p: x86.X86Program, ctx: Compilation) -> x86.X86Program: #type: ignore
+        instrs = self.assign_homes_instrs(p.body, {}, ctx) #type: ignore
+        return x86.X86Program(instrs, ctx.stack_space)
 
 
 
@@ -646,7 +1127,7 @@ class PatchInsPass(TransformPass):
     def patch_instrs(self, ss: List[x86.instr]) -> List[x86.instr]:
         return [instr for s in ss for instr in self.patch_instr(s)]
 
-    def run(self, p: x86.X86Program, manager: PassManager) -> x86.X86Program: #type: ignore
+    def run(self, p: x86.X86Program, ctx: Compilation) -> x86.X86Program: #type: ignore
         
         body = {}
         for lb, bk in p.body.items(): #type: ignore
@@ -679,7 +1160,7 @@ class PreConPass(TransformPass):
     source = 'X86'
     target = 'X86'
     
-    def run(self, p: x86.X86Program, manager: PassManager) -> x86.X86Program: #type: ignore
+    def run(self, p: x86.X86Program, ctx: Compilation) -> x86.X86Program: #type: ignore
         sp = p.stack_space
         offset = align(sp, 16) - 8 * len(p.used_callee)
         prelude = [
@@ -703,6 +1184,13 @@ class PreConPass(TransformPass):
             
         p.body['main'] = prelude #type: ignore
         p.body['conclusion'] = conlusion #type: ignore
+        if ctx.block_counts is not None:
+            p.body = self.layout(p.body, ctx.block_counts) #type: ignore
         return p
 
+    # Emit main first and the remaining blocks from hottest to coldest.
+    def layout(self, body: Dict[str, List[x86.instr]], block_counts: Dict[str, int]) -> Dict[str, List[x86.instr]]:
+        labels = sorted(body.keys(), key=lambda lb: (lb != label_name('main'), -block_counts.get(lb, 0)))
+        return {lb: body[lb] for lb in labels}
+
 
@@ -1,12 +1,10 @@
-from optparse import Option
-
 from ..utils.graph import DirectedAdjList, UndirectedAdjList, topological_sort, transpose
 from ..utils.priority_queue import PriorityQueue
 from ..utils.dict import TwoWayDict
 from typing import Any, Optional, Tuple, Set, Dict, List
 import iup.x86.x86_ast as x86
 from typing import Set, Dict, Tuple
-from .pass_manager import AnalysisPass, TransformPass, PassManager
+from .pass_manager import AnalysisPass, Compilation, TransformPass
 from .dataflow_analysis import analyze_dataflow
 
 
@@ -81,7 +79,7 @@ class UncoverLivePass(AnalysisPass):
             case _:
                 return set()
 
-    def run(self, p: x86.X86Program, manager: PassManager) -> Dict[str, Dict[x86.instr, Set[x86.location]]]: #type: ignore
+    def run(self, p: x86.X86Program, ctx: Compilation) -> Dict[str, Dict[x86.instr, Set[x86.location]]]: #type: ignore
         res : Dict[str, Dict[x86.instr, Set[x86.location]]] = {}
         
         def get_target(bk: List[x86.instr]) -> List[str]:
@@ -130,9 +128,9 @@ class BuildInterferencePass(AnalysisPass):
     
     name = "build_interference"
     
-    def run(self, p: x86.X86Program, manager: PassManager) -> UndirectedAdjList: #type: ignore
+    def run(self, p: x86.X86Program, ctx: Compilation) -> UndirectedAdjList: #type: ignore
         
-        live_after: Dict[str, Dict[x86.instr, Set[x86.location]]] = manager.get_result("uncover_live")
+        live_after: Dict[str, Dict[x86.instr, Set[x86.location]]] = ctx.get_result("uncover_live")
         
         graph = UndirectedAdjList()
         # simple O(n^2) implementation
@@ -173,9 +171,58 @@ class AllocateRegPass(TransformPass):
     target = 'X86' 
     
     
-    # Returns the coloring and the set of spilled variables.
+    # Dynamic number of uses of each variable, from the block counts of a profile.
+    @staticmethod
+    def use_counts(p: x86.X86Program, block_counts: Dict[str, int]) -> Dict[x86.location, int]:
+        weights: Dict[x86.location, int] = {}
+        for lb, bk in p.body.items(): #type: ignore
+            n = block_counts.get(lb, 0)
+            for i in bk:
+                match i:
+                    case x86.Instr(_, args):
+                        for a in args:
+                            if isinstance(a, x86.Variable):
+                                weights[a] = weights.get(a, 0) + n
+                    case _:
+                        pass
+        return weights
+
+    '''
+    Swapping two colors keeps a coloring valid unless a variable moves into a register it interferes with.
+    Give the registers to the classes of variables that are used most often at runtime.
+    '''
+    def prefer_hot(self, graph: UndirectedAdjList, colors: Dict[x86.location, int],
+                   spilled: Set[x86.location], weights: Dict[x86.location, int]) -> None:
+        classes: Dict[int, List[x86.location]] = {}
+        for v, c in colors.items():
+            if isinstance(v, x86.Variable):
+                classes.setdefault(c, []).append(v)
+
+        def weight(c: int) -> int:
+            return sum(weights.get(v, 0) for v in classes.get(c, []))
+
+        def fits(c: int, reg: int) -> bool:
+            return all(not graph.has_edge(v, reg_map[reg]) for v in classes.get(c, [])) #type: ignore
+
+        for c in sorted([c for c in classes if c >= 11], key=weight, reverse=True):
+            candidates = [r for r in range(11) if weight(r) < weight(c) and fits(c, r)]
+            if not candidates:
+                continue
+            r = min(candidates, key=weight)
+            classes[c], classes[r] = classes.get(r, []), classes[c]
+            for v in classes[r]:
+                colors[v] = r
+                spilled.discard(v)
+            for v in classes[c]:
+                colors[v] = c
+                spilled.add(v)
+
+    # Returns the coloring and the set of spilled variables. Variables and registers hash by
+    # identity, so sets of them iterate in an order that depends on memory layout; the
+    # variables come in the order of their first write instead, and ties in saturation go
+    # to the first pushed, so a program gets the same registers in every process.
     def color_graph(self, graph: UndirectedAdjList,
-                    variables: Set[x86.location]) -> Tuple[Dict[x86.location, int], Set[x86.location]]:
+                    variables: List[x86.location]) -> Tuple[Dict[x86.location, int], Set[x86.location]]:
 
         colors: Dict[x86.location, int] = dict({v: k for k, v in reg_map.items()}) #type: ignore
         spilled: Set[x86.location] = set()
@@ -201,18 +248,23 @@ class AllocateRegPass(TransformPass):
 
         return colors, spilled
 
-    def run(self, p: x86.X86Program, manager: PassManager) -> x86.X86Program: #type: ignore
-        graph = manager.get_result('build_interference')
-        vars = set()
+    def run(self, p: x86.X86Program, ctx: Compilation) -> x86.X86Program: #type: ignore
+        graph = ctx.get_result('build_interference')
+        # in the order of their first write
+        vars: Dict[x86.location, None] = {}
         for bk in p.body.values(): #type: ignore
             for i in bk:
-                for v in UncoverLivePass.write_vars(i):
-                    if isinstance(v, x86.Variable):
-                        vars.add(v)
+                match i:
+                    case x86.Instr(_, [*_, x86.Variable(_) as v]):
+                        vars[v] = None
+                    case _:
+                        pass
 
         for v in vars:
             graph.add_vertex(v)
-        colors, spilled = self.color_graph(graph, vars) #type: ignore
+        colors, spilled = self.color_graph(graph, list(vars)) #type: ignore
+        if ctx.block_counts is not None:
+            self.prefer_hot(graph, colors, spilled, self.use_counts(p, ctx.block_counts))
 
         def alloc_reg(a: Any) -> x86.Reg | x86.Deref:
             if a in spilled:
@@ -245,7 +297,7 @@ class AllocateRegPass(TransformPass):
                     case _:
                         pass
 
-        used_callee = [r for r in regs if r in callee_saved]
+        used_callee = [r for r in callee_saved if r in regs]
         prog = x86.X86Program(body)
         prog.stack_space = (len(spilled) + len(used_callee)) * 8
         prog.used_callee = used_callee
@@ -1,6 +1,8 @@
 from abc import abstractmethod
 import ast
-from typing import List, Any,Literal, TypeAlias, Dict
+import io
+import sys
+from typing import Callable, List, Any,Literal, Optional, Tuple, TypeAlias, Dict
 from abc import ABC
 from iup.utils.utils import CProgram
 
@@ -16,7 +18,7 @@ class Pass(ABC):
     name: PassName
 
     @abstractmethod
-    def run(self, prog: Program, manager: 'PassManager') -> Any: ...
+    def run(self, prog: Program, ctx: 'Compilation') -> Any: ...
     
     @abstractmethod
     def pure(self) -> bool: ...
@@ -25,7 +27,7 @@ class TransformPass(Pass):
     source: Language
     target: Language
     @abstractmethod
-    def run(self, prog: Program, manager: 'PassManager') -> Program: ...
+    def run(self, prog: Program, ctx: 'Compilation') -> Program: ...
     
     def pure(self) -> bool:
         return False
@@ -33,18 +35,84 @@ class TransformPass(Pass):
 
 class AnalysisPass(Pass):
     @abstractmethod
-    def run(self, prog: Program, manager: 'PassManager') -> Any: ...
+    def run(self, prog: Program, ctx: 'Compilation') -> Any: ...
     
     def pure(self) -> bool:
         return True
 
 
+class NameSupply:
+    '''
+    Fresh names of one compilation.
+    A name is made of a prefix chosen by the pass, the source line of the statement being
+    transformed and a counter per (prefix, line), so a program gets the same temporaries and
+    labels whatever was compiled before it in the process.
+    '''
+
+    def __init__(self) -> None:
+        self.counters: Dict[Tuple[str, int], int] = {}
+
+    def fresh(self, prefix: str, line: int = 0) -> str:
+        n = self.counters.get((prefix, line), 0)
+        self.counters[(prefix, line)] = n + 1
+        return f'{prefix}{line}_{n}'
+
+
+class Compilation:
+    '''
+    The state of one run of a PassManager: the program between transforms, the results of the
+    analyses of it, its fresh names, and what a pass keeps while it walks the program.
+    The managers and their passes are shared, by the module-level managers and by the threads
+    that compile with them, so a pass keeps nothing of a run on itself: `run` creates a
+    Compilation and passes it to every pass, which passes it down to its helpers.
+    '''
+
+    def __init__(self, manager: 'PassManager', prog: Program) -> None:
+        self.manager = manager
+        self.prog = prog
+        self.cache: Dict[PassName, Any] = {}
+        self.names = NameSupply()
+        # source line of the statement being transformed, for the fresh names
+        self.line = 0
+        # the operand of each variable of select_instructions, so that a variable is one object
+        self.variables: Dict[str, x86.Variable] = {}
+        # bytes of the stack frame of assign_homes
+        self.stack_space = 0
+
+    @property
+    def lang(self) -> str:
+        return self.manager.lang
+
+    @property
+    def block_counts(self) -> Optional[Dict[str, int]]:
+        return self.manager.block_counts
+
+    def interp_lang(self, target: Language) -> str:
+        return self.manager.interp_lang(target)
+
+    def invalidate(self, passes: List[PassName]):
+        for p in passes:
+            if p in self.cache:
+                self.cache[p] = None
+                
+    def get_result(self, name: PassName):
+        if not name in self.cache:
+            self.cache[name] = self.manager.analyses[name].run(self.prog, self)
+        return self.cache[name]
+    
+    def run_analysis(self, name: PassName):
+        self.cache[name] = self.manager.analyses[name].run(self.prog, self)
+
+
 class PassManager(TransformPass):
     transforms: List[TransformPass]
     analyses: Dict[PassName, AnalysisPass]
-    cache: Dict[PassName, Any]
-    prog: Program
     lang: str
+    # print the program after every transform
+    trace: bool = True
+    validation: Optional['Validation'] = None
+    # execution count of each block label, from an emulator profile
+    block_counts: Optional[Dict[str, int]] = None
     
     def __init__(self, transforms: List[TransformPass], analyses: List[AnalysisPass], lang='Lvar') -> None:
         self.transforms = transforms
@@ -53,34 +121,157 @@ class PassManager(TransformPass):
         self.analyses = {}
         for p in analyses:
             self.analyses[p.name] = p
-        self.cache = {}
         self.lang = lang
 
-    
-    def invalidate(self, passes: List[PassName]):
-        for p in passes:
-            if p in self.cache:
-                self.cache[p] = None
-                
-    def get_result(self, name: PassName):
-        if not name in self.cache:
-            self.cache[name] = self.analyses[name].run(self.prog, self)
-        return self.cache[name]
-    
-    def run_analysis(self, name: PassName):
-        self.cache[name] = self.analyses[name].run(self.prog, self)
+    def interp_lang(self, target: Language) -> str:
+        match target:
+            case 'Py':
+                return self.lang
+            case 'CLike':
+                return 'C' + self.lang[1:]
+            case _:
+                return target
 
-    def run(self, prog: Program, manager: 'PassManager') -> Program:
-        self.prog = prog
+    # every compilation starts with its own name supply and analyses
+    def start(self, prog: Program) -> Compilation:
+        return Compilation(self, prog)
+
+    # the transforms of a manager run in a compilation of their own, even inside another one
+    def run(self, prog: Program, outer: Optional[Compilation]) -> Program:
+        ctx = self.start(prog)
         
         for trans in self.transforms:
-            self.prog = trans.run(self.prog, self)
-            print('after ' + trans.name + ' :\n')
-            print(str(self.prog))
+            ctx.prog = trans.run(ctx.prog, ctx)
+            if self.trace:
+                print('after ' + trans.name + ' :\n')
+                print(str(ctx.prog))
+            if self.validation is not None:
+                self.validation.check(trans, ctx.prog, self)
         
-        self.cache = {}
-        return self.prog
+        return ctx.prog
+
+    def run_validated(self, prog: ast.Module, input_data: str = '') -> Program:
+        assert self.validation is not None
+        self.validation.start(prog, input_data)
+        res = self.run(prog, None) #type: ignore
+        self.validation.finish(res, self)
+        return res
         
 
 
+############################################################################
+# Semantic Validation
+############################################################################
+VALIDATED_PASSES: List[PassName] = ['partial_eval', 'shrink', 'remove_complex_operands', 'explicate_control', 'front_end',
+                                    'copy_propagation']
+ValidationMode = Literal['every', 'sample', 'on_failure']
+
+
+class ValidationError(Exception):
+    pass
+
+
+def run_with_io(command: Callable[[], Any], input_data: str) -> str:
+    stdin = sys.stdin
+    stdout = sys.stdout
+    sys.stdin = io.StringIO(input_data)
+    sys.stdout = io.StringIO()
+    try:
+        command()
+        return sys.stdout.getvalue()
+    finally:
+        sys.stdin = stdin
+        sys.stdout = stdout
+
+
+class Validation:
+    '''
+    Interpret the program after selected transforms and compare its output with the source program.
+    Parameters:
+        passes: names of the transforms whose result is interpreted
+        mode: 'every' checks every program, 'sample' checks every `period`-th program,
+              'on_failure' only checks the final X86 and re-runs the transforms with per-pass checks when it is wrong
+        period: sampling period of the 'sample' mode
+    '''
+
+    def __init__(self, passes: List[PassName] = VALIDATED_PASSES, mode: ValidationMode = 'every', period: int = 1) -> None:
+        self.passes = passes
+        self.mode = mode
+        self.period = period
+        self.programs = 0
+        self.active = False
+        self.source: Optional[ast.Module] = None
+        self.input_data = ''
+        # key of the source program and its input in `reference`, set by start() when they are checked
+        self.key: Optional[Tuple[str, str]] = None
+        # reference output of each source program, computed once
+        self.reference: Dict[Tuple[str, str], str] = {}
+
+    def start(self, prog: ast.Module, input_data: str = '') -> None:
+        self.source = prog
+        self.input_data = input_data
+        match self.mode:
+            case 'every':
+                self.active = True
+            case 'sample':
+                self.active = self.programs % self.period == 0
+            case 'on_failure':
+                self.active = False
+        self.programs += 1
+        # the source is dumped once per program, not at every checked pass
+        self.key = (ast.dump(prog), input_data) if self.active or self.mode == 'on_failure' else None
+
+    def expected(self, manager: PassManager) -> str:
+        from iup.interp import INTERPRETERS
+        assert self.source is not None and self.key is not None
+        if self.key not in self.reference:
+            self.reference[self.key] = run_with_io(lambda: INTERPRETERS[manager.lang].interp(self.source), self.input_data)
+        return self.reference[self.key]
+
+    # the result of a transform is checked if it is selected and its language can be interpreted
+    def checks(self, trans: TransformPass, manager: PassManager) -> bool:
+        from iup.interp import INTERPRETERS
+        return trans.name in self.passes and manager.interp_lang(trans.target) in INTERPRETERS
+
+    def check(self, trans: TransformPass, prog: Program, manager: PassManager) -> None:
+        from iup.interp import INTERPRETERS
+        from iup.type import TYPE_CHECKERS
+        if not self.active or trans.name not in self.passes:
+            return
+        lang = manager.interp_lang(trans.target)
+        if lang in TYPE_CHECKERS:
+            TYPE_CHECKERS[lang].type_check(prog) #type: ignore
+        if lang not in INTERPRETERS:
+            return
+        output = run_with_io(lambda: INTERPRETERS[lang].interp(prog), self.input_data) #type: ignore
+        if output.split() != self.expected(manager).split():
+            raise ValidationError(f'wrong output after {trans.name}: {output!r} != {self.expected(manager)!r}')
+
+    def locate(self, manager: PassManager) -> None:
+        '''
+        Re-run the transforms on the source with per-pass checks, raising at the first wrong pass.
+        The transforms run without what a subclass of PassManager does around them, such as
+        running the result, so when every check passes the error names what was not checked:
+        the passes whose result cannot be interpreted, and the run of the final program.
+        '''
+        assert self.source is not None
+        active = self.active
+        self.active = True
+        try:
+            PassManager.run(manager, self.source, None) #type: ignore
+        finally:
+            self.active = active
+        unchecked = [trans.name for trans in manager.transforms if not self.checks(trans, manager)]
+        raise ValidationError('wrong output, but right after every checked pass: the culprit is one of '
+                              + ', '.join(unchecked + ['the run of the ' + manager.target + ' program']))
+
+    def finish(self, prog: Program, manager: PassManager) -> None:
+        from iup.x86.eval_x86 import interp_x86
+        if self.mode != 'on_failure' or manager.target != 'X86':
+            return
+        output = run_with_io(lambda: interp_x86(prog), self.input_data)
+        if output.split() != self.expected(manager).split():
+            self.locate(manager)
+
+
 CompilerConfig = List[Pass]
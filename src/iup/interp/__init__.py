@@ -2,7 +2,14 @@ from ..compiler import Language
 from typing import Dict
 from .interp import Intepreter
 from .interp_Lvar import InterpLvar
+from .interp_Lif import InterpLif
+from .interp_Lwhile import InterpLwhile
+from .interp_Cif import InterpCif
 
 INTERPRETERS: Dict[Language, Intepreter] = {
     "Lvar": InterpLvar(),
-}
\ No newline at end of file
+    "Lif": InterpLif(),
+    "Lwhile": InterpLwhile(),
+    "Cif": InterpCif(),
+    "Cwhile": InterpCif(),
+}
@@ -1,5 +1,5 @@
 from ast import *
-from interp_Lif import InterpLif
+from .interp_Lif import InterpLif
 from iup.utils import *
 
 class InterpCif(InterpLif):
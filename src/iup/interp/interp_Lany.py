@@ -1,7 +1,7 @@
 from ast import *
-from interp_Lfun import Function
-from interp_Llambda import InterpLlambda, ClosureTuple
-from interp_Ldyn import Tagged
+from .interp_Lfun import Function
+from .interp_Llambda import InterpLlambda, ClosureTuple
+from .interp_Ldyn import Tagged
 from iup.utils import *
     
 class InterpLany(InterpLlambda):
@@ -1,5 +1,5 @@
 from ast import *
-from interp_Ltup import InterpLtup
+from .interp_Ltup import InterpLtup
 from iup.utils import *
 
 class InterpLarray(InterpLtup):
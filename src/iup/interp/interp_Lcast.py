@@ -1,12 +1,122 @@
 from ast import *
-from interp_Lfun import Function
-from interp_Llambda import InterpLlambda, ClosureTuple
-from interp_Lany import InterpLany
-from interp_Ldyn import Tagged
+from .interp_Lfun import Function
+from .interp_Llambda import InterpLlambda, ClosureTuple
+from .interp_Lany import InterpLany
+from .interp_Ldyn import Tagged
 from iup.utils import *
     
+# A function wrapped by a (collapsed) chain of function casts.
+class CastFunction(Function):
+  def __init__(self, fun, param_chains, ret_chain, params, body):
+    super().__init__('cast', params, body, {'cast.fun': fun})
+    self.fun = fun
+    self.param_chains = param_chains
+    self.ret_chain = ret_chain
+
 class InterpLcast(InterpLany):
 
+  def __init__(self):
+    super().__init__()
+    # cast functions, keyed by the chain of types they cast through
+    self.cast_cache = {}
+    # the chains of the cached reads of tuple and list proxies
+    self.proxy_chains = {}
+
+  # The greatest lower bound of two types, None if they are not consistent.
+  def meet(self, t1, t2):
+    match (t1, t2):
+      case (AnyType(), _):
+        return t2
+      case (_, AnyType()):
+        return t1
+      case (TupleType(ts1), TupleType(ts2)) if len(ts1) == len(ts2):
+        ts = [self.meet(u1, u2) for (u1, u2) in zip(ts1, ts2)]
+        return None if any(t is None for t in ts) else TupleType(ts)
+      case (ListType(u1), ListType(u2)):
+        u = self.meet(u1, u2)
+        return None if u is None else ListType(u)
+      case (FunctionType(ps1, rt1), FunctionType(ps2, rt2)) if len(ps1) == len(ps2):
+        ps = [self.meet(p1, p2) for (p1, p2) in zip(ps1, ps2)]
+        rt = self.meet(rt1, rt2)
+        if rt is None or any(p is None for p in ps):
+          return None
+        return FunctionType(ps, rt)
+      case _ if t1 == t2:
+        return t1
+      case _:
+        return None
+
+  # Casting t => t and t => Any => t is the identity. Beyond that, a chain of
+  # casts does what the cast from its first type to its last through the meet
+  # of all its types does, so a chain whose types have a meet collapses to at
+  # most three types. A chain through inconsistent types is kept: it fails when
+  # a value goes through it.
+  def collapse(self, chain):
+    result = []
+    for t in chain:
+      if len(result) > 0 and result[-1] == t:
+        continue
+      if len(result) > 1 and result[-1] == AnyType() and result[-2] == t:
+        result.pop()
+        continue
+      result.append(t)
+    if len(result) > 3:
+      m = result[0]
+      for t in result[1:]:
+        m = self.meet(m, t)
+        if m is None:
+          return result
+      return self.collapse([result[0], m, result[-1]])
+    return result
+
+  def cast_chain_exp(self, e, chain):
+    for (t1, t2) in zip(chain, chain[1:]):
+      e = Cast(e, t1, t2)
+    return e
+
+  def cached(self, key, make):
+    k = repr(key)
+    if k not in self.cast_cache:
+      self.cast_cache[k] = make()
+    return self.cast_cache[k]
+
+  def cast_fun(self, chain):
+    x = generate_name('x')
+    return Function('cast', [x], [Return(self.cast_chain_exp(Name(x), chain))], {})
+
+  def proxy_tuple(self, tup, chains):
+    chains = [self.collapse(c) for c in chains]
+    if all(len(c) == 1 for c in chains):
+      return tup
+    reads = self.cached(('tuple', chains),
+                        lambda: [self.cast_fun(c) for c in chains])
+    self.proxy_chains[id(reads)] = chains
+    return ProxiedTuple(tup, reads)
+
+  def proxy_list(self, lst, chain):
+    chain = self.collapse(chain)
+    if len(chain) == 1:
+      return lst
+    read, write = self.cached(('list', chain),
+                              lambda: (self.cast_fun(chain),
+                                       self.cast_fun(list(reversed(chain)))))
+    self.proxy_chains[id(read)] = chain
+    return ProxiedList(lst, read, write)
+
+  def cast_function(self, fun, param_chains, ret_chain):
+    param_chains = [self.collapse(c) for c in param_chains]
+    ret_chain = self.collapse(ret_chain)
+    if all(len(c) == 1 for c in param_chains) and len(ret_chain) == 1:
+      return fun
+    def make():
+      params = [generate_name('x') for c in param_chains]
+      args = [self.cast_chain_exp(Name(x), list(reversed(c)))
+              for (x, c) in zip(params, param_chains)]
+      body = self.cast_chain_exp(Call(Name('cast.fun'), args), ret_chain)
+      return (params, [Return(body)])
+    params, body = self.cached(('function', param_chains, ret_chain), make)
+    return CastFunction(fun, param_chains, ret_chain, params, body)
+
   def apply_inject(self, value, source):
     return Tagged(value, self.type_to_tag(source))
 
@@ -46,22 +156,30 @@ class InterpLcast(InterpLany):
         return self.apply_inject(self.apply_cast(value, source, anylist), anylist)
       case (_, AnyType()):
         return self.apply_inject(value, source)
+      # successive casts of a proxy are composed into a single proxy
       case (FunctionType(ps1, rt1), FunctionType(ps2, rt2)):
-        params = [generate_name('x') for p in ps2]
-        args = [Cast(Name(x), t2, t1)
-                for (x,(t1,t2)) in zip(params, zip(ps1, ps2))]
-        body = Cast(Call(ValueExp(value), args), rt1, rt2)
-        return Function('cast', params, [Return(body)], {})
+        match value:
+          case CastFunction():
+            return self.cast_function(value.fun,
+                                      [c + [t2] for (c, t2) in zip(value.param_chains, ps2)],
+                                      value.ret_chain + [rt2])
+          case _:
+            return self.cast_function(value,
+                                      [[t1, t2] for (t1, t2) in zip(ps1, ps2)],
+                                      [rt1, rt2])
       case (TupleType(ts1), TupleType(ts2)):
-        x = generate_name('x')
-        reads = [Function('cast', [x], [Return(Cast(Name(x), t1, t2))], {})
-                 for (t1,t2) in zip(ts1,ts2)]
-        return ProxiedTuple(value, reads)
+        match value:
+          case ProxiedTuple(tup, reads) if id(reads) in self.proxy_chains:
+            return self.proxy_tuple(tup, [c + [t2] for (c, t2) in
+                                          zip(self.proxy_chains[id(reads)], ts2)])
+          case _:
+            return self.proxy_tuple(value, [[t1, t2] for (t1, t2) in zip(ts1, ts2)])
       case (ListType(t1), ListType(t2)):
-        x = generate_name('x')
-        read = Function('cast', [x], [Return(Cast(Name(x), t1, t2))], {})
-        write = Function('cast', [x], [Return(Cast(Name(x), t2, t1))], {})
-        return ProxiedList(value, read, write)
+        match value:
+          case ProxiedList(lst, read, write) if id(read) in self.proxy_chains:
+            return self.proxy_list(lst, self.proxy_chains[id(read)] + [t2])
+          case _:
+            return self.proxy_list(value, [t1, t2])
       case (t1, t2) if t1 == t2:
         return value
       case (t1, t2):
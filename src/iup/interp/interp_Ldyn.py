@@ -1,45 +1,63 @@
 from ast import *
-from interp_Lfun import Function
-from interp_Llambda import InterpLlambda
+from .interp_Lfun import Function
+from .interp_Llambda import InterpLlambda
 from iup.utils import *
-from dataclasses import dataclass
 
-@dataclass(eq=True)
 class Tagged(Value):
-  value : Value
-  tag : str
+  __slots__ = ("value", "tag")
   __match_args__ = ("value", "tag")
+  def __init__(self, value, tag):
+    self.value = value
+    self.tag = tag
+  def __eq__(self, other):
+    if isinstance(other, Tagged):
+      return self.value == other.value and self.tag == other.tag
+    return NotImplemented
+  __hash__ = None # type: ignore
+  def __repr__(self):
+    return 'Tagged(value=' + repr(self.value) + ', tag=' + repr(self.tag) + ')'
   def __str__(self):
     return str(self.value)
 
+# Tagged values are never mutated, so the booleans, None and small
+# integers are shared instead of allocated for every intermediate result.
+small_int_min = -128
+small_int_max = 1024
+small_ints = [Tagged(n, 'int') for n in range(small_int_min, small_int_max)]
+tagged_true = Tagged(True, 'bool')
+tagged_false = Tagged(False, 'bool')
+tagged_none = Tagged(None, 'none')
+
 # todo: refactor the primitive operations
     
 class InterpLdyn(InterpLlambda):
 
   def tag(self, v):
-      if v is True or v is False:
-          return Tagged(v, 'bool')
+      if v is True:
+          return tagged_true
+      elif v is False:
+          return tagged_false
       elif isinstance(v, int):
+          if small_int_min <= v < small_int_max:
+              return small_ints[v - small_int_min]
           return Tagged(v, 'int')
       elif isinstance(v, Function):
           return Tagged(v, 'function')
       elif isinstance(v, list):
           return Tagged(v, 'tuple')
-      elif isinstance(v, type(None)):
-          return Tagged(v, 'none')
+      elif v is None:
+          return tagged_none
       else:
           raise Exception('tag: unexpected ' + repr(v))
 
   def untag(self, v, expected_tag, ast):
-      match v:
-        case Tagged(val, tag):
-          if tag != expected_tag:
+      if isinstance(v, Tagged):
+          if v.tag != expected_tag:
             raise TrappedError('expected tag ' + expected_tag \
                                + ', not ' + ' ' + repr(v))
-          return val
-        case _:
-          raise Exception('expected Tagged value with ' + expected_tag \
-                          + ', not ' + ' ' + repr(v))
+          return v.value
+      raise Exception('expected Tagged value with ' + expected_tag \
+                      + ', not ' + ' ' + repr(v))
 
   def apply_fun(self, fun, args, e):
       f = self.untag(fun, 'function', e)
@@ -1,6 +1,6 @@
 from ast import *
-from interp_Larray import InterpLarray
-from utils import *
+from .interp_Larray import InterpLarray
+from iup.utils import *
 
 class Function:
     __match_args__ = ("name", "params", "body", "env")
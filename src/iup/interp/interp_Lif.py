@@ -1,5 +1,5 @@
 from ast import *
-from interp_Lvar import InterpLvar
+from .interp_Lvar import InterpLvar
 from iup.utils import *
 
 class InterpLif(InterpLvar):
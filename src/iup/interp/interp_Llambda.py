@@ -1,6 +1,6 @@
 from ast import *
-from interp_Lfun import InterpLfun, Function
-from utils import *
+from .interp_Lfun import InterpLfun, Function
+from iup.utils import *
 
 class ClosureTuple(Value):
   __match_args__ = ("args", "arity")
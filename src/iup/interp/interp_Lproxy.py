@@ -1,9 +1,9 @@
 from ast import *
-from interp_Lfun import Function
-from interp_Llambda import InterpLlambda, ClosureTuple
-from interp_Ldyn import Tagged
-from interp_Lcast import InterpLcast
-from utils import *
+from .interp_Lfun import Function
+from .interp_Llambda import InterpLlambda, ClosureTuple
+from .interp_Ldyn import Tagged
+from .interp_Lcast import InterpLcast
+from iup.utils import *
     
 class InterpLproxy(InterpLcast):
 
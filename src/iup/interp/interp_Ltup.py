@@ -1,6 +1,6 @@
 from ast import *
-from interp_Lwhile import InterpLwhile
-from utils import *
+from .interp_Lwhile import InterpLwhile
+from iup.utils import *
 
 class InterpLtup(InterpLwhile):
 
@@ -1,6 +1,6 @@
 from ast import *
-from interp_Lif import InterpLif
-from utils import *
+from .interp_Lif import InterpLif
+from iup.utils import *
 
 class InterpLwhile(InterpLif):
 
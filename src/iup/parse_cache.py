@@ -0,0 +1,36 @@
+'''
+Parse cache.
+
+`parse_file` parses each distinct source once for the consumers that read it in turn: the
+managers a test sweep puts one source through, or the requests a compile server worker
+gets for an unchanged file. They share one ast.Module, keyed by a hash of the content of
+the file. The passes build new nodes instead of changing the module in place, and callers
+of `parse_file` must not change it either. The one exception is the type checkers, which
+annotate the nodes in place with `has_type`: `compile()` type-checks the shared module, so
+every checker must be idempotent, writing the same annotation each time it checks a node.
+
+Only the last few modules are kept: every module kept alive makes the collections of the
+cyclic garbage collector slower, and keeping 64 small modules already makes parsing half
+as slow again. Nor is the cache kept on disk: loading a pickled ast.Module takes longer
+than parsing its source again, and the pickle is about ten times the size of the source.
+'''
+import ast
+import hashlib
+from typing import Dict
+
+# the most recently used modules, the last used last
+parsed: Dict[bytes, ast.Module] = {}
+capacity = 4
+
+
+def parse_file(path: str) -> ast.Module:
+    with open(path, 'rb') as file:
+        source = file.read()
+    key = hashlib.blake2b(source, digest_size=16).digest()
+    prog = parsed.pop(key, None)
+    if prog is None:
+        prog = ast.parse(source, path)
+        if len(parsed) >= capacity:
+            del parsed[next(iter(parsed))]
+    parsed[key] = prog
+    return prog
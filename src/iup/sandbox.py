@@ -0,0 +1,105 @@
+'''
+Sandboxed execution of compiled programs.
+
+`run_binary` runs a binary without a shell, under resource limits: CPU seconds, address
+space and no core files. It feeds the input through a pipe, captures stdout and stderr in
+memory, and kills the binary after a wall clock timeout. It returns one result per run:
+    {"binary": path, "status": exit status | -signal, "stdout": str, "stderr": str,
+     "timed_out": bool, "time": wall ms, "cpu": user + system ms | null, "max_rss": KB | null}
+`run_binaries` runs many binaries with at most `workers` of them at a time.
+
+The binary is started by launcher.c, which sets the limits with setrlimit between fork and
+exec, and reports the wait4 usage of the binary alone. Forked from Python, the max RSS of
+a binary would be at least the RSS of the Python process, some hundred MB in a test run,
+and Python would have to fork rather than vfork to call setrlimit in the child, which is
+not safe with the threads of `run_binaries` either. A binary killed at the timeout takes
+its launcher with it, so its usage is unknown.
+'''
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+CPU_SECONDS = 10
+MEMORY_BYTES = 1 << 30
+TIMEOUT = 30.0
+
+# a job of run_binaries: the binary and its input
+Job = Tuple[str, str]
+
+build_lock = threading.Lock()
+
+
+# the launcher is rebuilt only when launcher.c changed since it was compiled, as runtime.o is
+def launcher_binary() -> str:
+    script_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../')
+    binary = os.path.join(script_dir, 'launcher')
+    source = os.path.join(script_dir, 'launcher.c')
+    with build_lock:
+        if not os.path.exists(binary) or os.path.getmtime(binary) < os.path.getmtime(source):
+            subprocess.run(['gcc', '-O2', '-std=c99', source, '-o', binary], check=True)
+    return binary
+
+
+def run_binary(binary: str, input_data: str = '', cpu_seconds: int = CPU_SECONDS,
+               memory_bytes: int = MEMORY_BYTES, timeout: float = TIMEOUT) -> Dict[str, Any]:
+    '''
+    Run `binary` with `input_data` on its stdin, under the limits. A binary over its CPU
+    limit gets SIGXCPU, one over the wall clock timeout SIGKILL; one over its memory limit
+    sees its allocations fail.
+    '''
+    report_read, report_write = os.pipe()
+    start = time.perf_counter()
+    try:
+        # in a session of its own, so the timeout kills the launcher and the binary together
+        proc = subprocess.Popen([launcher_binary(), str(report_write), str(cpu_seconds), str(memory_bytes), binary],
+                                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                pass_fds=(report_write,), start_new_session=True)
+    finally:
+        os.close(report_write)
+    timed_out = False
+    try:
+        stdout, stderr = proc.communicate(input_data.encode(), timeout)
+    except subprocess.TimeoutExpired:
+        # the launcher is not reaped yet, so its process group is still the one it started
+        os.killpg(proc.pid, signal.SIGKILL)
+        stdout, stderr = proc.communicate()
+        timed_out = True
+    elapsed = time.perf_counter() - start
+    with os.fdopen(report_read) as file:
+        report = file.read().split()
+
+    result: Dict[str, Any] = {
+        'binary': binary,
+        'status': proc.returncode,
+        'stdout': stdout.decode(errors='replace'),
+        'stderr': stderr.decode(errors='replace'),
+        'timed_out': timed_out,
+        'time': round(elapsed * 1000, 3),
+        'cpu': None,
+        'max_rss': None,
+    }
+    if len(report) == 4:
+        status, user_us, system_us, max_rss = map(int, report)
+        result['status'] = os.waitstatus_to_exitcode(status)
+        result['cpu'] = round((user_us + system_us) / 1000, 3)
+        # ru_maxrss is in KB on Linux and in bytes on macOS
+        result['max_rss'] = max_rss // 1024 if sys.platform == 'darwin' else max_rss
+    return result
+
+
+def run_binaries(jobs: List[Job], workers: Optional[int] = None, cpu_seconds: int = CPU_SECONDS,
+                 memory_bytes: int = MEMORY_BYTES, timeout: float = TIMEOUT) -> Iterator[Dict[str, Any]]:
+    '''
+    Run the binaries of `jobs` with their inputs, at most `workers` at a time (one per CPU by
+    default), and yield their results in the order of the jobs. The binaries are processes of
+    their own, so threads are enough to wait for them.
+    '''
+    launcher_binary()
+    workers = workers or os.cpu_count() or 1
+    with ThreadPoolExecutor(workers) as pool:
+        yield from pool.map(lambda job: run_binary(job[0], job[1], cpu_seconds, memory_bytes, timeout), jobs)
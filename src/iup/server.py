@@ -0,0 +1,133 @@
+'''
+Compile server.
+
+`serve` keeps warm compiler processes behind a Unix socket, so a compile request does not pay
+interpreter startup, imports, parser construction and the runtime build again.
+`request` is the thin client: it only imports the standard library.
+
+Protocol: the client sends one JSON object per connection, terminated by a newline:
+    {"source": path, "target": path, "passes": [...], "verbose": bool, "emulate": bool,
+     "profile": path | null, "use_profile": path | null, "input": str}
+and receives one JSON object back:
+    {"status": 0 | 1, "output": stdout of the compilation, "error": traceback | null}
+Paths are absolute, the server does not share the working directory of the client.
+'''
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import traceback
+from typing import Any, Callable, Dict, List, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+    from iup.compiler import PassManager
+
+# builds the manager of a request from its passes, verbose flag and profile
+ManagerFactory = Callable[[List[str], bool, Optional[str]], 'PassManager']
+
+worker_factory: Optional[ManagerFactory] = None
+
+
+def warm_up() -> None:
+    import iup.compiler
+    import iup.interp
+    import iup.type
+    from iup import runtime_object
+    from iup.x86.parser_x86 import x86_parser, x86_parser_instrs
+    x86_parser()
+    x86_parser_instrs()
+    runtime_object()
+
+
+# an interrupt stops the server, which then shuts the workers down
+def init_worker(factory: ManagerFactory) -> None:
+    global worker_factory
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    worker_factory = factory
+
+
+def compile_request(req: Dict[str, Any]) -> Dict[str, Any]:
+    from iup import compile
+    from iup.compiler.pass_manager import run_with_io
+    assert worker_factory is not None
+    result: Dict[str, Any] = {'status': 0, 'output': '', 'error': None}
+
+    def command():
+        manager = worker_factory(req['passes'], req['verbose'], req['use_profile']) #type: ignore
+        try:
+            compile(req['source'], req['target'], manager, req['emulate'], req['profile'])
+        except Exception:
+            result['status'] = 1
+            result['error'] = traceback.format_exc()
+
+    result['output'] = run_with_io(command, req['input'])
+    return result
+
+
+class CompileHandler(socketserver.StreamRequestHandler):
+
+    def handle(self) -> None:
+        server: CompileServer = self.server #type: ignore
+        try:
+            req = json.loads(self.rfile.readline())
+            res = server.pool.submit(compile_request, req).result()
+        except Exception:
+            res = {'status': 1, 'output': '', 'error': traceback.format_exc()}
+        self.wfile.write(json.dumps(res).encode() + b'\n')
+
+
+class CompileServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    pool: 'ProcessPoolExecutor'
+
+
+def serve(path: str, factory: ManagerFactory, workers: Optional[int] = None) -> None:
+    '''
+    Serve compile requests on the Unix socket `path` until interrupted.
+    Each connection is handled in a thread that hands the request to a pool of `workers`
+    processes, forked after the compiler is imported and the runtime is built.
+    '''
+    from concurrent.futures import ProcessPoolExecutor
+    import multiprocessing
+    warm_up()
+    if os.path.exists(path):
+        os.unlink(path)
+    context = multiprocessing.get_context('fork')
+    server = CompileServer(path, CompileHandler)
+    server.pool = ProcessPoolExecutor(workers, mp_context=context, initializer=init_worker, initargs=(factory,))
+    # fork the workers now, before the server has threads
+    server.pool.submit(int).result()
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    print(f'serving on {path}', file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.pool.shutdown()
+        os.unlink(path)
+
+
+def request(path: str, source: str, target: str, passes: List[str], verbose: bool = False,
+            emulate: bool = False, profile: Optional[str] = None, use_profile: Optional[str] = None,
+            input_data: str = '') -> Dict[str, Any]:
+    absolute = lambda p: None if p is None else os.path.abspath(p)
+    req = {
+        'source': absolute(source),
+        'target': absolute(target),
+        'passes': passes,
+        'verbose': verbose,
+        'emulate': emulate,
+        'profile': absolute(profile),
+        'use_profile': absolute(use_profile),
+        'input': input_data,
+    }
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        sock.sendall(json.dumps(req).encode() + b'\n')
+        with sock.makefile('rb') as file:
+            return json.loads(file.readline())
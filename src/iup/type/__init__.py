@@ -5,11 +5,14 @@ from .type_check_Lvar import TypeCheckLvar
 from .type_check_Lif import TypeCheckLif
 from .type_check_Cif import TypeCheckCif
 from .type_check_Lwhile import TypeCheckLwhile
+from .type_check_Cwhile import TypeCheckCwhile
+from .incremental import IncrementalTypeChecker
 
         
 TYPE_CHECKERS: Dict[str, TypeChecker] = {
     "Lvar": TypeCheckLvar(),
     "Lif": TypeCheckLif(),
     "Lwhile": TypeCheckLwhile(),
+    "Cif": TypeCheckCif(), #type: ignore
+    "Cwhile": TypeCheckCwhile(), #type: ignore
 }
-
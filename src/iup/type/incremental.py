@@ -0,0 +1,173 @@
+import ast
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from .type_check import TypeChecker
+
+# the recorded type of a variable that was read before it was defined
+missing = object()
+
+class RecordingEnv(dict):
+  '''
+  A type environment that records, for one statement at a time, the types of
+  the variables the statement read before writing them, and the types it wrote.
+  A statement that looks at the whole environment (to copy it for a function
+  body, say) depends on all of it, which is kept in `whole` instead.
+  '''
+  def start(self):
+    self.reads: Dict[str, Any] = {}
+    self.writes: Dict[str, Any] = {}
+    self.before: Dict[str, Any] = {}
+    self.whole: Optional[Dict[str, Any]] = None
+
+  def read(self, x):
+    if x not in self.reads and x not in self.writes:
+      self.reads[x] = super().get(x, missing)
+
+  # the environment as it was before the statement
+  def read_all(self):
+    if self.whole is None:
+      self.whole = dict(super().items())
+      for x, t in self.before.items():
+        if t is missing:
+          del self.whole[x]
+        else:
+          self.whole[x] = t
+
+  def __contains__(self, x):
+    self.read(x)
+    return super().__contains__(x)
+
+  def get(self, x, default=None):
+    self.read(x)
+    return super().get(x, default)
+
+  def __getitem__(self, x):
+    self.read(x)
+    return super().__getitem__(x)
+
+  def __setitem__(self, x, t):
+    if x not in self.writes:
+      self.before[x] = super().get(x, missing)
+    self.writes[x] = t
+    super().__setitem__(x, t)
+
+  def __iter__(self):
+    self.read_all()
+    return super().__iter__()
+
+  def __len__(self):
+    self.read_all()
+    return super().__len__()
+
+  def keys(self):
+    self.read_all()
+    return super().keys()
+
+  def values(self):
+    self.read_all()
+    return super().values()
+
+  def items(self):
+    self.read_all()
+    return super().items()
+
+  def copy(self):
+    self.read_all()
+    return dict(super().items())
+
+@dataclass
+class Checked:
+  stmt: ast.stmt
+  reads: Dict[str, Any]
+  whole: Optional[Dict[str, Any]]
+  writes: Dict[str, Any]
+  type: Any
+
+  def matches(self, env: RecordingEnv) -> bool:
+    if self.whole is not None:
+      return dict(dict.items(env)) == self.whole
+    for x, t in self.reads.items():
+      u = dict.get(env, x, missing)
+      if u is not t and u != t:
+        return False
+    return True
+
+class IncrementalTypeChecker:
+  '''
+  Type checks successive versions of a program, such as the buffer of an
+  editor after each edit, rechecking only what an edit can affect.
+
+  The result of each top-level statement (a FunctionDef included) is cached
+  under its structural dump, whether it ends the program, and the types of the
+  variables it read. A statement is checked again only if it changed or one of
+  those types changed; otherwise its writes are replayed from the cache. The
+  dump of a statement object seen in the previous version is not recomputed,
+  so an unchanged prefix costs a lookup per statement when the new version
+  keeps its statement objects; a statement must then not be changed in place.
+
+  The checker must check a Module with `type_check_stmt` over `module_env`, as
+  TypeCheckLvar and its subclasses up to TypeCheckLfun do. A statement taken
+  from the cache replaces the new one in the module, so the annotations the
+  checker made on it are kept.
+  '''
+  def __init__(self, checker: TypeChecker):
+    self.checker: Any = checker
+    self.cache: Dict[Tuple[str, bool], List[Checked]] = {}
+    self.dumps: Dict[int, Tuple[ast.stmt, str]] = {}
+    self.checked = 0
+    self.reused = 0
+
+  def dump(self, s: ast.stmt) -> str:
+    known = self.dumps.get(id(s))
+    if known is not None and known[0] is s:
+      return known[1]
+    return ast.dump(s)
+
+  # Type checks the module like `checker.type_check` and returns the types of
+  # its top-level variables.
+  def type_check(self, p: ast.Module) -> Dict[str, Any]:
+    match p:
+      case ast.Module(body):
+        cache: Dict[Tuple[str, bool], List[Checked]] = {}
+        dumps: Dict[int, Tuple[ast.stmt, str]] = {}
+        env = RecordingEnv(self.checker.module_env(body))
+        self.checked = self.reused = 0
+        try:
+          last = len(body) - 1
+          for i, s in enumerate(body):
+            key = (self.dump(s), i == last)
+            hit = None
+            for c in self.cache.get(key, ()):
+              if c.matches(env):
+                hit = c
+                break
+            if hit is not None and hit.stmt is not s and id(hit.stmt) in dumps:
+              hit = None  # a repeated statement; the module must not share nodes
+            if hit is None:
+              env.start()
+              t = self.checker.type_check_stmt(s, env, i == last)
+              hit = Checked(s, env.reads, env.whole, env.writes, t)
+              self.checked += 1
+            else:
+              for x, t in hit.writes.items():
+                dict.__setitem__(env, x, t)
+              body[i] = hit.stmt
+              self.reused += 1
+            hits = cache.setdefault(key, [])
+            if not any(h is hit for h in hits):
+              hits.append(hit)
+            dumps[id(hit.stmt)] = (hit.stmt, key[0])
+            if hit.type is not None:
+              break
+        except Exception:
+          # keep the statements after an error, so that fixing it only
+          # rechecks from the error on
+          for key, hits in self.cache.items():
+            cache.setdefault(key, hits)
+          raise
+        finally:
+          self.cache = cache
+          self.dumps = dumps
+        return dict(dict.items(env))
+      case _:
+        raise Exception('type_check: unexpected ' + repr(p))
@@ -1,4 +1,4 @@
-from type_check_Clambda import TypeCheckClambda
+from .type_check_Clambda import TypeCheckClambda
 from iup.utils import ValueOf, TagOf, Call, Name, AnyType, IntType, Bottom, TupleType, FunctionType
 
 class TypeCheckCany(TypeCheckClambda):
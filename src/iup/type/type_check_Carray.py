@@ -1,6 +1,6 @@
 from ast import *
-from type_check_Ctup import TypeCheckCtup
-from utils import Allocate, Begin, GlobalValue, Collect, TupleType, Bottom, \
+from .type_check_Ctup import TypeCheckCtup
+from iup.utils import Allocate, Begin, GlobalValue, Collect, TupleType, Bottom, \
   IntType, BoolType, ListType, AllocateArray, VoidType
 
 class TypeCheckCarray(TypeCheckCtup):
@@ -1,11 +1,13 @@
 from ast import *
-from utils import *
-from type_check_Carray import TypeCheckCarray
-import copy
+from iup.utils import *
+from .type_check_Carray import TypeCheckCarray
+from .type_check_Cif import TypeEnv
 
 class TypeCheckCfun(TypeCheckCarray):
 
   def check_type_equal(self, t1, t2, e):
+    if t1 is t2:  # types are hash-consed
+      return
     if t1 == Bottom() or t2 == Bottom():
       return
     match t1:
@@ -65,25 +67,21 @@ class TypeCheckCfun(TypeCheckCarray):
   def type_check_def(self, d, env):
     match d:
       case FunctionDef(name, params, blocks, dl, returns, comment):
-        new_env = {x: t for (x,t) in env.items()}
+        new_env = TypeEnv(env)
         for (x,t) in params:
             new_env[x] = t
-        while True:
-            old_env = copy.deepcopy(new_env)
-            for (l,ss) in blocks.items():
-                self.type_check_stmts(ss[:-1], new_env)
-                if len(ss) > 0:  # blocks should only be empty if they are unreachable, but we don't check this 
-                    t = self.type_check_tail(ss[-1], new_env)
-                    if t != None:  # block ended in Return with this type
-                       self.check_type_equal(returns,t,ss[-1])
-            # trace('type_check_Cfun iterating ' + repr(new_env))
-            if new_env == old_env:
-                break
+        def type_check_block(ss, new_env):
+            self.type_check_stmts(ss[:-1], new_env)
+            if len(ss) > 0:  # blocks should only be empty if they are unreachable, but we don't check this 
+                t = self.type_check_tail(ss[-1], new_env)
+                if t != None:  # block ended in Return with this type
+                   self.check_type_equal(returns,t,ss[-1])
+        self.rounds += self.infer_blocks(blocks, new_env, type_check_block)
         # following is too strong, because in some variants unused variables may never get assigned a type              
         # undefs = [x for x,t in new_env.items() if t == Bottom()]
         # if undefs:
         #    raise Exception('type_check_def: undefined type for ' + str(undefs)) 
-        d.var_types = new_env
+        d.var_types = new_env.copy()
         # trace('type_check_Cfun var_types for ' + name)
         # trace(d.var_types)
       case _:
@@ -93,6 +91,7 @@ class TypeCheckCfun(TypeCheckCarray):
     match p:
       case CProgramDefs(defs):
         env = {}
+        self.rounds = 0
         for d in defs:
             match d:
               case FunctionDef(name, params, bod, dl, returns, comment):
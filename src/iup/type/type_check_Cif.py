@@ -1,6 +1,36 @@
 from ast import *
 from iup.utils import CProgram, Goto, Bottom, IntType, BoolType, Begin
-import copy
+
+class TypeEnv(dict):
+  '''
+  The type environment of block type inference. It counts the changes of each
+  variable, and records the version of every variable a block reads, so that
+  a block is checked again only when a type it read has changed since.
+  A variable that is not in the environment has the type Bottom.
+  '''
+  def __init__(self, *args):
+    super().__init__(*args)
+    self.versions = {}
+    self.reads = {}
+    self.changed = set()
+
+  def read(self, x):
+    if x not in self.reads:
+      self.reads[x] = self.versions.get(x, 0)
+
+  def get(self, x, default=None):
+    self.read(x)
+    return super().get(x, default)
+
+  def __getitem__(self, x):
+    self.read(x)
+    return super().__getitem__(x)
+
+  def __setitem__(self, x, t):
+    if super().get(x, Bottom()) != t:
+      self.versions[x] = self.versions.get(x, 0) + 1
+      self.changed.add(x)
+    super().__setitem__(x, t)
 
 class TypeCheckCif:
 
@@ -105,21 +135,51 @@ class TypeCheckCif:
       case _:
         raise Exception('error in type_check_tail, unexpected' + repr(s))
 
+  def type_check_block(self, ss, env):
+    self.type_check_stmts(ss[:-1], env)
+    if len(ss) > 0:  # blocks should only be empty if they are unreachable
+      self.type_check_tail(ss[-1], env)
+
+  def infer_blocks(self, blocks, env, type_check_block):
+    '''
+    Check the blocks until the types of their variables stop changing.
+    The first round checks every block; every later round checks the blocks
+    that read a variable whose type changed after they read it.
+    Returns the number of rounds.
+    '''
+    readers = {}
+    seen = {}
+    work = list(blocks)
+    rounds = 0
+    while work:
+      rounds += 1
+      queued = {}
+      for label in work:
+        reads = seen.get(label)
+        if reads is not None and all(env.versions.get(x, 0) == v for x, v in reads.items()):
+          continue
+        env.reads = {}
+        env.changed = set()
+        type_check_block(blocks[label], env)
+        seen[label] = env.reads
+        for x in env.reads:
+          readers.setdefault(x, {})[label] = None
+        for x in env.changed:
+          for reader in readers.get(x, ()):
+            if seen[reader].get(x) != env.versions[x]:
+              queued[reader] = None
+      work = list(queued)
+    return rounds
+
   def type_check(self, p):
     match p:
       case CProgram(body):
-          env = {}
-          while True:
-              old_env = copy.deepcopy(env)
-              for (l, ss) in body.items():
-                  self.type_check_stmts(ss[:-1], env)
-              self.type_check_tail(ss[-1], env)
-              if env == old_env:
-                  break
+          env = TypeEnv()
+          self.rounds = self.infer_blocks(body, env, self.type_check_block)
           # because of explicate_control there can be undefined vars -Jeremy
           # undefs = [x for x,t in env.items() if t == Bottom()]
           # if undefs:
           #     raise Exception('error: undefined type for ' + str(undefs)) 
-          p.var_types = env
+          p.var_types = env.copy()
       case _:
         raise Exception('error in type_check, unexpected ' + repr(p))
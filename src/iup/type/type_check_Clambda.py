@@ -1,5 +1,5 @@
-from utils import AllocateClosure, Uninitialized, UncheckedCast
-from type_check_Cfun import TypeCheckCfun
+from iup.utils import AllocateClosure, Uninitialized, UncheckedCast
+from .type_check_Cfun import TypeCheckCfun
 
 class TypeCheckClambda(TypeCheckCfun):
     
@@ -1,5 +1,5 @@
-from type_check_Cany import TypeCheckCany
-from utils import *
+from .type_check_Cany import TypeCheckCany
+from iup.utils import *
 
 class TypeCheckCproxy(TypeCheckCany):
 
@@ -1,11 +1,13 @@
 from ast import *
-from type_check_Cwhile import TypeCheckCwhile
-from utils import Allocate, Begin, GlobalValue, Collect, TupleType, Bottom, \
+from .type_check_Cwhile import TypeCheckCwhile
+from iup.utils import Allocate, Begin, GlobalValue, Collect, TupleType, Bottom, \
   IntType, BoolType
 
 class TypeCheckCtup(TypeCheckCwhile):
 
   def check_type_equal(self, t1, t2, e):
+    if t1 is t2:  # types are hash-consed
+      return
     match t1:
       case TupleType(ts1):
         match t2:
@@ -1,4 +1,4 @@
-from type_check_Cif import TypeCheckCif
+from .type_check_Cif import TypeCheckCif
 
 class TypeCheckCwhile(TypeCheckCif):
     pass
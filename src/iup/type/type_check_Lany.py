@@ -1,7 +1,7 @@
 import ast
 from ast import *
-from type_check_Llambda import TypeCheckLlambda
-from utils import *
+from .type_check_Llambda import TypeCheckLlambda
+from iup.utils import *
 import typing
 
 class TypeCheckLany(TypeCheckLlambda):
@@ -1,11 +1,13 @@
 from ast import *
-from type_check_Ltup import TypeCheckLtup
-from utils import *
+from .type_check_Ltup import TypeCheckLtup
+from iup.utils import *
 import typing
 
 class TypeCheckLarray(TypeCheckLtup):
 
   def check_type_equal(self, t1, t2, e):
+    if t1 is t2:  # types are hash-consed
+      return
     match t1:
       case ListType(ty1):
         match t2:
@@ -97,10 +99,11 @@ class TypeCheckLarray(TypeCheckLtup):
       case _:
         return super().type_check_exp(e, env)
 
-  def type_check_stmts(self, ss, env):
-    if len(ss) == 0:
-      return VoidType()
-    match ss[0]:
+  def type_check_end(self):
+    return VoidType()
+
+  def type_check_stmt(self, s, env, tail):
+    match s:
       case Assign([Subscript(tup, index, Store())], value):
         tup_t = self.type_check_exp(tup, env)
         tup.has_type = tup_t
@@ -112,20 +115,19 @@ class TypeCheckLarray(TypeCheckLtup):
             match index:
               case Constant(i):
                 if 0 <= i and i < len(ts):
-                  self.check_type_equal(ts[i], value_t, ss[0])
+                  self.check_type_equal(ts[i], value_t, s)
                 else:
                   raise Exception('subscript ' + str(i) + ' not in range of '
-                                  + str(tup_t) + ' in\n' + str(ss[0]))
+                                  + str(tup_t) + ' in\n' + str(s))
               case _:
                 raise Exception('subscript required constant integer index')
           case ListType(ty):
-            self.check_type_equal(ty, value_t, ss[0])          
+            self.check_type_equal(ty, value_t, s)          
           case Bottom():
             pass
           case _:
             raise Exception('type_check_stmts: expected a list or tuple, not ' \
                             + repr(tup_t))
-        return self.type_check_stmts(ss[1:], env)
       case _:
-        return super().type_check_stmts(ss, env)
+        return super().type_check_stmt(s, env, tail)
     
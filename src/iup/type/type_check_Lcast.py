@@ -1,8 +1,8 @@
 import ast
 from ast import *
-from type_check_Llambda import TypeCheckLlambda
-from type_check_Lgrad import TypeCheckLgrad
-from utils import *
+from .type_check_Llambda import TypeCheckLlambda
+from .type_check_Lgrad import TypeCheckLgrad
+from iup.utils import *
 import typing
 
 class TypeCheckLcast(TypeCheckLlambda):
@@ -1,12 +1,14 @@
 import ast
 from ast import *
-from type_check_Larray import TypeCheckLarray
-from utils import *
+from .type_check_Larray import TypeCheckLarray
+from iup.utils import *
 import typing
 
 class TypeCheckLfun(TypeCheckLarray):
 
   def check_type_equal(self, t1, t2, e):
+    if t1 is t2:  # types are hash-consed
+      return
     if t1 == Bottom() or t2 == Bottom():
       return
     match t1:
@@ -86,18 +88,16 @@ class TypeCheckLfun(TypeCheckLarray):
       case _:
         return super().type_check_exp(e, env)
 
-  def type_check_stmts(self, ss, env):
-    if len(ss) == 0:
-      return VoidType()
-    match ss[0]:
+  def type_check_stmt(self, s, env, tail):
+    match s:
       case FunctionDef(name, params, body, dl, returns, comment):
         new_env = {x: t for (x,t) in env.items()}
         if isinstance(params, ast.arguments):
             new_params = [(p.arg, self.parse_type_annot(p.annotation)) \
                           for p in params.args]
-            ss[0].args = new_params
+            s.args = new_params
             new_returns = self.parse_type_annot(returns)
-            ss[0].returns = new_returns
+            s.returns = new_returns
         else:
             new_params = params
             new_returns = returns
@@ -107,28 +107,23 @@ class TypeCheckLfun(TypeCheckLarray):
         for x,t in new_params:
             new_env[x] = t
         rt = self.type_check_stmts(body, new_env)
-        self.check_type_equal(new_returns, rt, ss[0])
-        return self.type_check_stmts(ss[1:], env)
+        self.check_type_equal(new_returns, rt, s)
       case Return(value):
         return self.type_check_exp(value, env)
       case _:
-        return super().type_check_stmts(ss, env)
+        return super().type_check_stmt(s, env, tail)
 
-  def type_check(self, p):
-    match p:
-      case Module(body):
-        env = {}
-        for s in body:
-            match s:
-              case FunctionDef(name, params, bod, dl, returns, comment):
-                if isinstance(params, ast.arguments):
-                    params_t = [self.parse_type_annot(p.annotation) \
-                                for p in params.args]
-                else:
-                    params_t = [t for (x,t) in params]
-                if name in env:
-                    raise Exception('type_check: duplicate function name ' + name)
-                env[name] = FunctionType(params_t, self.parse_type_annot(returns))
-        self.type_check_stmts(body, env)
-      case _:
-        raise Exception('type_check: unexpected ' + repr(p))
+  def module_env(self, body):
+    env = {}
+    for s in body:
+        match s:
+          case FunctionDef(name, params, bod, dl, returns, comment):
+            if isinstance(params, ast.arguments):
+                params_t = [self.parse_type_annot(p.annotation) \
+                            for p in params.args]
+            else:
+                params_t = [t for (x,t) in params]
+            if name in env:
+                raise Exception('type_check: duplicate function name ' + name)
+            env[name] = FunctionType(params_t, self.parse_type_annot(returns))
+    return env
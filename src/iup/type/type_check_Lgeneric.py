@@ -1,12 +1,21 @@
 import ast
 from ast import *
-from type_check_Llambda import TypeCheckLlambda
-from utils import *
+from .type_check_Llambda import TypeCheckLlambda
+from iup.utils import *
 import typing
-import copy
+import functools
+
+# substitute_type depends only on the (hash-consed) type and the substitution, so the
+# results of the latest pairs are kept, in a bounded cache that a compile server does not grow
+CACHED_SUBSTITUTIONS = 4096
 
 class TypeCheckLgeneric(TypeCheckLlambda):
 
+  def __init__(self):
+    super().__init__()
+    # the cache belongs to the checker, and goes away with it
+    self.cached_substitute = functools.lru_cache(maxsize=CACHED_SUBSTITUTIONS)(self.substitute_items)
+
   def check_type_equal(self, t1, t2, e):
       match (t1, t2):
         case (AllType(ps1, ty1), AllType(ps2, ty2)):
@@ -86,11 +95,17 @@ class TypeCheckLgeneric(TypeCheckLlambda):
         raise Exception('mismatch: ' + str(param_ty) + '\n!= ' + str(arg_ty))
 
   def substitute_type(self, ty, var_map):
+    return self.cached_substitute(ty, tuple(var_map.items()))
+
+  def substitute_items(self, ty, var_items):
+    return self.substitute(ty, dict(var_items))
+
+  def substitute(self, ty, var_map):
     match ty:
       case GenericVar(id):
         return var_map[id]
       case AllType(ps, ty):
-        new_map = copy.deepcopy(var_map)
+        new_map = var_map.copy()
         for p in ps:
           new_map[p] = GenericVar(p)
         return AllType(ps, self.substitute_type(ty, new_map))
@@ -137,35 +152,31 @@ class TypeCheckLgeneric(TypeCheckLlambda):
       case _:
         return super().type_check_exp(e, env)
         
-  def check_stmts(self, ss, return_ty, env):
-    if len(ss) == 0:
-      return
-    trace('*** Lgeneric check_stmts ' + repr(ss[0]) + '\n')
-    match ss[0]:
+  def check_stmt(self, s, return_ty, env):
+    trace('*** Lgeneric check_stmts ' + repr(s) + '\n')
+    match s:
       case ImportFrom():
         # ignore for now
-        return self.check_stmts(ss[1:], return_ty, env)
+        return True
       case Assign([Name(id)], Call(Name('TypeVar'), args)):
         # ignore for now
-        return self.check_stmts(ss[1:], return_ty, env)
+        return True
       case _:
-        return super().check_stmts(ss, return_ty, env)
+        return super().check_stmt(s, return_ty, env)
     
-  def type_check_stmts(self, ss, env):
-    if len(ss) == 0:
-      return
-    trace('*** Lgeneric type_check_stmts ' + repr(ss[0]) + '\n')      
-    match ss[0]:
+  def type_check_stmt(self, s, env, tail):
+    trace('*** Lgeneric type_check_stmts ' + repr(s) + '\n')      
+    match s:
       case ImportFrom():
         # ignore for now
-        return self.type_check_stmts(ss[1:], env)
+        pass
       case Assign([Name(id)], Call(Name('TypeVar'), args)):
         # ignore for now
-        return self.type_check_stmts(ss[1:], env)
+        pass
       case Pass():
-        return self.type_check_stmts(ss[1:], env)
+        pass
       case _:
-        return super().type_check_stmts(ss, env)
+        return super().type_check_stmt(s, env, tail)
         
   def type_check(self, p):
     match p:
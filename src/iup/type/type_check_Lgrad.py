@@ -1,11 +1,22 @@
 import ast
 from ast import *
-from type_check_Llambda import TypeCheckLlambda
-from utils import *
+from .type_check_Llambda import TypeCheckLlambda
+from iup.utils import *
 import typing
+import functools
+
+# consistent and join_types depend only on their (hash-consed) types, so the results
+# of the latest pairs are kept, in bounded caches that a compile server does not grow
+CACHED_TYPE_PAIRS = 4096
 
 class TypeCheckLgrad(TypeCheckLlambda):
 
+  def __init__(self):
+    super().__init__()
+    # the caches belong to the checker, and go away with it
+    self.cached_consistent = functools.lru_cache(maxsize=CACHED_TYPE_PAIRS)(self.consistent_types)
+    self.cached_join = functools.lru_cache(maxsize=CACHED_TYPE_PAIRS)(self.join)
+
   def parse_type_annot(self, annot):
       match annot:
         case None:
@@ -23,6 +34,11 @@ class TypeCheckLgrad(TypeCheckLlambda):
                       + ' in ' + repr(e))
 
   def consistent(self, t1, t2):
+      if t1 is t2:
+        return True
+      return self.cached_consistent(t1, t2)
+
+  def consistent_types(self, t1, t2):
       match (t1, t2):
         case (AnyType(), _):
           return True
@@ -39,6 +55,11 @@ class TypeCheckLgrad(TypeCheckLlambda):
           return t1 == t2
 
   def join_types(self, t1, t2):
+      if t1 is t2:
+        return t1
+      return self.cached_join(t1, t2)
+
+  def join(self, t1, t2):
       match (t1, t2):
         case (AnyType(), _):
           return t2
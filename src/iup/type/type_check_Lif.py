@@ -47,19 +47,15 @@ class TypeCheckLif(TypeCheckLvar):
       case _:
         return super().type_check_exp(e, env)
 
-  def type_check_stmts(self, ss, env):
-    if len(ss) == 0:
-      return
-    match ss[0]:
+  def type_check_stmt(self, s, env, tail):
+    match s:
       case If(test, body, orelse):
         test_t = self.type_check_exp(test, env)
         self.check_type_equal(BoolType(), test_t, test)
         body_t = self.type_check_stmts(body, env)
         orelse_t = self.type_check_stmts(orelse, env)
-        self.check_type_equal(body_t, orelse_t, ss[0])
-        if len(ss) > 1:
-          return self.type_check_stmts(ss[1:], env)
-        else: # this 'if' statement is in tail position
+        self.check_type_equal(body_t, orelse_t, s)
+        if tail: # this 'if' statement is in tail position
           return body_t
       case _:
-        return super().type_check_stmts(ss, env)
+        return super().type_check_stmt(s, env, tail)
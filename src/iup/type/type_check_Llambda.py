@@ -1,7 +1,7 @@
 import ast
 from ast import *
-from type_check_Lfun import TypeCheckLfun
-from utils import *
+from .type_check_Lfun import TypeCheckLfun
+from iup.utils import *
 import typing
 
 # This type checker uses bidirectional type checking to work-around
@@ -93,28 +93,26 @@ class TypeCheckLlambda(TypeCheckLfun):
         t = self.type_check_exp(e, env)
         self.check_type_equal(t, ty, e)
 
-  # Use check_stmts in contexts where there is an expected return type,
-  # such as inside the body of a function.
-  def check_stmts(self, ss, return_ty, env):
-    if len(ss) == 0:
-      return
-    #trace('*** check_stmts ' + repr(ss[0]) + '\n')
-    match ss[0]:
+  # Check one statement against the expected return type. Returns False for a
+  # statement without an expected type, from which on check_stmts type checks
+  # the rest of the list with type_check_stmts.
+  def check_stmt(self, s, return_ty, env):
+    #trace('*** check_stmts ' + repr(s) + '\n')
+    match s:
       case FunctionDef(name, params, body, dl, returns, comment):
         #trace('*** tc_check ' + name)
         new_env = {x: t for (x,t) in env.items()}
         if isinstance(params, ast.arguments):
             new_params = [(p.arg, self.parse_type_annot(p.annotation)) for p in params.args]
-            ss[0].args = new_params
+            s.args = new_params
             new_returns = self.parse_type_annot(returns)
-            ss[0].returns = new_returns
+            s.returns = new_returns
         else:
             new_params = params
             new_returns = returns
         for (x,t) in new_params:
             new_env[x] = t
         rt = self.check_stmts(body, new_returns, new_env)
-        self.check_stmts(ss[1:], return_ty, env)
       case Return(value):
         #trace('** tc_check return ' + repr(value))
         self.check_exp(value, return_ty, env)
@@ -124,7 +122,6 @@ class TypeCheckLlambda(TypeCheckLfun):
         else:
           env[v.id] = self.type_check_exp(value, env)
         v.has_type = env[v.id]
-        self.check_stmts(ss[1:], return_ty, env)
       case Assign([Subscript(tup, Constant(index), Store())], value):
         tup_t = self.type_check_exp(tup, env)
         match tup_t:
@@ -135,24 +132,34 @@ class TypeCheckLlambda(TypeCheckLfun):
           case _:
             raise Exception('check_stmts: expected a tuple, not ' \
                             + repr(tup_t))
-        self.check_stmts(ss[1:], return_ty, env)
       case AnnAssign(v, type_annot, value, simple) if isinstance(v, Name):
         ty_annot = self.parse_type_annot(type_annot)
-        ss[0].annotation = ty_annot
+        s.annotation = ty_annot
         if v.id in env:
             self.check_type_equal(env[v.id], ty_annot)
         else:
             env[v.id] = ty_annot
         v.has_type = env[v.id]
         self.check_exp(value, ty_annot, env)
-        self.check_stmts(ss[1:], return_ty, env)
       case _:
-        self.type_check_stmts(ss, env)
+        return False
+    return True
+
+  # Use check_stmts in contexts where there is an expected return type,
+  # such as inside the body of a function.
+  def check_stmts(self, ss, return_ty, env):
+    for i, s in enumerate(ss):
+      if not self.check_stmt(s, return_ty, env):
+        self.type_check_stmts(ss[i:], env)
+        return
+      if isinstance(s, Return): # the rest is unreachable
+        return
+
+  def type_check_end(self):
+    return None
 
-  def type_check_stmts(self, ss, env):
-    if len(ss) == 0:
-      return
-    match ss[0]:
+  def type_check_stmt(self, s, env, tail):
+    match s:
       case Assign([v], value) if isinstance(v, Name):
         t = self.type_check_exp(value, env)
         if v.id in env:
@@ -160,11 +167,10 @@ class TypeCheckLlambda(TypeCheckLfun):
         else:
           env[v.id] = t
         v.has_type = env[v.id]
-        return self.type_check_stmts(ss[1:], env)
       case Pass():
-        return self.type_check_stmts(ss[1:], env)
+        pass
       case _:
-        return super().type_check_stmts(ss, env)
+        return super().type_check_stmt(s, env, tail)
       
   def type_check(self, p):
     #trace('*** type check Llambda')
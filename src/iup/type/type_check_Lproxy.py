@@ -1,7 +1,7 @@
 import ast
 from ast import *
-from type_check_Lany import TypeCheckLany
-from utils import *
+from .type_check_Lany import TypeCheckLany
+from iup.utils import *
 import typing
 
 class TypeCheckLproxy(TypeCheckLany):
@@ -1,11 +1,13 @@
 from ast import *
-from type_check_Lwhile import TypeCheckLwhile
-from utils import *
+from .type_check_Lwhile import TypeCheckLwhile
+from iup.utils import *
 import typing
 
 class TypeCheckLtup(TypeCheckLwhile):
 
   def check_type_equal(self, t1, t2, e):
+    if t1 is t2:  # types are hash-consed
+      return
     match t1:
       case TupleType(ts1):
         match t2:
@@ -61,27 +63,24 @@ class TypeCheckLtup(TypeCheckLwhile):
       case _:
         return super().type_check_exp(e, env)
 
-  def type_check_stmts(self, ss, env):
-    if len(ss) == 0:
-      return
-    match ss[0]:
+  def type_check_stmt(self, s, env, tail):
+    match s:
       case Collect(size):
-        return self.type_check_stmts(ss[1:], env)
+        pass
       case Assign([Subscript(tup, Constant(index), Store())], value):
         tup_t = self.type_check_exp(tup, env)
         tup.has_type = tup_t
         value_t = self.type_check_exp(value, env)
         match tup_t:
           case TupleType(ts):
-            self.check_type_equal(ts[index], value_t, ss[0])
+            self.check_type_equal(ts[index], value_t, s)
           case Bottom():
               pass
           case _:
             raise Exception('type_check_stmts: expected a tuple, not ' \
                             + repr(tup_t))
-        return self.type_check_stmts(ss[1:], env)
       case _:
-        return super().type_check_stmts(ss, env)
+        return super().type_check_stmt(s, env, tail)
       
 if __name__ == "__main__":
   t1 = Tuple([Constant(1), Constant(2)], Load())
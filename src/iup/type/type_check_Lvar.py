@@ -36,28 +36,44 @@ class TypeCheckLvar(TypeChecker):
       case _:
         raise Exception('type_check_exp: unexpected ' + repr(e))
 
-  def type_check_stmts(self, ss, env):
-    if len(ss) == 0:
-      return
-    match ss[0]:
+  # Type check one statement; `tail` tells if it is the last one of its list.
+  # Returns the type of the whole list when the statement ends it,
+  # or None to go on with the next statement.
+  def type_check_stmt(self, s, env, tail):
+    match s:
       case Assign([Name(id)], value):
         t = self.type_check_exp(value, env)
         if id in env:
           self.check_type_equal(env[id], t, value)
         else:
           env[id] = t
-        return self.type_check_stmts(ss[1:], env)
       case Expr(Call(Name('print'), [arg])):
         t = self.type_check_exp(arg, env)
         self.check_type_equal(t, IntType(), arg)
-        return self.type_check_stmts(ss[1:], env)
       case Expr(value):
         self.type_check_exp(value, env)
-        return self.type_check_stmts(ss[1:], env)
       case _:
-        raise Exception('type_check_stmts: unexpected ' + repr(ss))
+        raise Exception('type_check_stmts: unexpected ' + repr(s))
+
+  # the type of a statement list that runs to its end
+  def type_check_end(self):
+    return None
+
+  def type_check_stmts(self, ss, env):
+    last = len(ss) - 1
+    for i, s in enumerate(ss):
+      t = self.type_check_stmt(s, env, i == last)
+      if t is not None:
+        return t
+    return self.type_check_end()
+
+  # the environment the top-level statements of a module start with
+  def module_env(self, body):
+    return {}
 
   def type_check(self, p: Module):
     match p:
       case Module(body):
-        self.type_check_stmts(body, {})
+        self.type_check_stmts(body, self.module_env(body))
+      case _:
+        raise Exception('type_check: unexpected ' + repr(p))
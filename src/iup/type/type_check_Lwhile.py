@@ -4,15 +4,12 @@ from ..utils import *
 
 class TypeCheckLwhile(TypeCheckLif):
 
-  def type_check_stmts(self, ss, env):
-    if len(ss) == 0:
-      return
-    match ss[0]:
+  def type_check_stmt(self, s, env, tail):
+    match s:
       case While(test, body, []):
         test_t = self.type_check_exp(test, env)
         self.check_type_equal(BoolType(), test_t, test)
         body_t = self.type_check_stmts(body, env)
-        return self.type_check_stmts(ss[1:], env)
       case _:
-        return super().type_check_stmts(ss, env)
+        return super().type_check_stmt(s, env, tail)
     
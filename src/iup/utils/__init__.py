@@ -1 +1,6 @@
-from iup.utils.utils import *
\ No newline at end of file
+from iup.utils.utils import *
+from iup.utils import utils as _utils
+
+# the names of utils.py: a submodule imported later, such as dict, is an attribute of the
+# package too, and `from iup.utils import *` would copy it over the builtin of that name
+__all__ = [name for name in dir(_utils) if not name.startswith('_')]
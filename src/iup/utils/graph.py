@@ -125,10 +125,11 @@ class DirectedAdjList:
 
 class UEdge(Edge):
     def raw(self):
-        return set([self.source, self.target])
+        return frozenset([self.source, self.target])
         
+    # vertices hashed by identity have nearby hashes, a sum of them collides all the time
     def __hash__(self):
-        return hash(self.source) + hash(self.target)
+        return hash(self.raw())
     
     def __eq__(self, other):
         return self.raw() == other.raw()
@@ -1,9 +1,12 @@
+import io
 import os
 import logging
 from sys import platform
 import ast
 from ast import *
-from dataclasses import dataclass
+from dataclasses import dataclass, field, fields
+import inspect
+import weakref
 
 
 # move these to the compilers, use a method with overrides -Jeremy
@@ -54,6 +57,22 @@ def str_Module(self):
 Module.__str__ = str_Module
 
 
+# write a statement to a file-like object; the compound statements write
+# their bodies one statement at a time instead of building them as a string
+def write_stmt(self, out):
+    out.write(str(self))
+
+
+stmt.write = write_stmt
+
+
+def write_body(ss, out):
+    indent()
+    for s in ss:
+        s.write(out)
+    dedent()
+
+
 def repr_Module(self):
     return 'Module(' + repr(self.body) + ')'
 
@@ -330,6 +349,16 @@ def str_If(self):
 If.__str__ = str_If
 
 
+def write_If(self, out):
+    out.write(indent_stmt() + 'if ' + str(self.test) + ':\n')
+    write_body(self.body, out)
+    out.write(indent_stmt() + 'else:\n')
+    write_body(self.orelse, out)
+
+
+If.write = write_If
+
+
 def repr_If(self):
     return 'If(' + repr(self.test) + ', ' + repr(self.body) + ', ' + repr(self.orelse) + ')'
 
@@ -364,6 +393,14 @@ def str_While(self):
 While.__str__ = str_While
 
 
+def write_While(self, out):
+    out.write(indent_stmt() + 'while ' + str(self.test) + ':\n')
+    write_body(self.body, out)
+
+
+While.write = write_While
+
+
 def repr_While(self):
     return 'While(' + repr(self.test) + ', ' + repr(self.body) + ', ' + repr(self.orelse) + ')'
 
@@ -627,8 +664,39 @@ def generate_name(name: str) -> str:
 # AST classes
 ################################################################################
 
-class Type:
-    ...
+# Types are hash-consed: constructing a type that is structurally equal to a
+# live one gives back that object, so types compare and hash by identity.
+# Their fields must not be changed after construction.
+hash_consed_types: 'weakref.WeakValueDictionary[tuple, Type]' = weakref.WeakValueDictionary()
+
+
+class HashConsed(type):
+    def __call__(cls, *args, **kwargs):
+        # the fields in order, with keyword arguments and defaults bound as __init__ does
+        if kwargs or len(args) != len(cls.__dataclass_fields__):
+            bound = inspect.signature(cls.__init__).bind(None, *args, **kwargs)
+            bound.apply_defaults()
+            args = tuple(bound.arguments.values())[1:]
+        # the shared type keeps tuples, not the lists of the call that created it
+        args = tuple(tuple(a) if isinstance(a, list) else a for a in args)
+        key = (cls,) + args
+        t = hash_consed_types.get(key)
+        if t is None:
+            t = super().__call__(*args)
+            hash_consed_types[key] = t
+        return t
+
+
+class Type(metaclass=HashConsed):
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (type(self), tuple(getattr(self, f.name) for f in fields(self)))
 
 
 def make_assigns(bs):
@@ -689,21 +757,23 @@ class Uninitialized(expr):
         return 'uninit[' + str(self.ty) + ']'
 
 
-@dataclass
+@dataclass(slots=True)
 class CProgram:
     __match_args__ = ("body",)
     body: dict[str, list[stmt]]
+    # set by the type checker of the C-like languages
+    var_types: dict[str, Type] = field(default_factory=dict, repr=False, compare=False)
 
-    def __str__(self):
-        result = ''
+    def write(self, out):
         for (bk, ss) in self.body.items():
-            result += bk + ':\n'
-            indent()
-            for s in ss:
-                result += str(s)
-            result += '\n'
-            dedent()
-        return result
+            out.write(bk + ':\n')
+            write_body(ss, out)
+            out.write('\n')
+
+    def __str__(self):
+        out = io.StringIO()
+        self.write(out)
+        return out.getvalue()
 
 
 @dataclass
@@ -795,31 +865,31 @@ class GlobalValue(expr):
         return str(self.name)
 
 
-@dataclass(eq=True)
+@dataclass(eq=False)
 class IntType(Type):
     def __str__(self):
         return 'int'
 
 
-@dataclass(eq=True)
+@dataclass(eq=False)
 class BoolType(Type):
     def __str__(self):
         return 'bool'
 
 
-@dataclass(eq=True)
+@dataclass(eq=False)
 class VoidType(Type):
     def __str__(self):
         return 'void'
 
 
-@dataclass(eq=True)
+@dataclass(eq=False)
 class Bottom(Type):
     def __str__(self):
         return 'bottom'
 
 
-@dataclass(eq=True)
+@dataclass(eq=False)
 class TupleType(Type):
     types: list[Type]
     __match_args__ = ("types",)
@@ -828,7 +898,7 @@ class TupleType(Type):
         return 'tuple[' + ','.join([str(p) for p in self.types]) + ']'
 
 
-@dataclass(eq=True)
+@dataclass(eq=False)
 class ListType(Type):
     elt_type: Type
     __match_args__ = ("elt_type",)
@@ -837,8 +907,8 @@ class ListType(Type):
         return 'list[' + str(self.elt_type) + ']'
 
 
-@dataclass(eq=True)
-class FunctionType:
+@dataclass(eq=False)
+class FunctionType(Type):
     param_types: list[Type]
     ret_type: Type
     __match_args__ = ("param_types", "ret_type")
@@ -848,8 +918,8 @@ class FunctionType:
             + ', ' + str(self.ret_type) + ']'
 
 
-@dataclass(eq=True)
-class GenericVar:
+@dataclass(eq=False)
+class GenericVar(Type):
     id: str
     __match_args__ = ("id",)
 
@@ -857,8 +927,8 @@ class GenericVar:
         return str(self.id)
 
 
-@dataclass(eq=True)
-class AllType:
+@dataclass(eq=False)
+class AllType(Type):
     params: list[str]
     typ: Type
     __match_args__ = ("params", "typ")
@@ -943,13 +1013,13 @@ class ValueOf(expr):
         return 'valueof(' + str(self.value) + ', ' + str(self.typ) + ')'
 
 
-@dataclass(eq=True)
+@dataclass(eq=False)
 class AnyType(Type):
     def __str__(self):
         return 'Any'
 
 
-@dataclass(eq=True)
+@dataclass(eq=False)
 class ProxyOrTupleType(Type):
     elt_types: list[Type]
 
@@ -957,7 +1027,7 @@ class ProxyOrTupleType(Type):
         return 'POrTuple[' + ','.join([str(t) for t in self.elt_types]) + ']'
 
 
-@dataclass(eq=True)
+@dataclass(eq=False)
 class ProxyOrListType(Type):
     elt_type: Type
 
@@ -1034,7 +1104,7 @@ class InjectListProxy(expr):
 
 # Base class of runtime values
 class Value:
-    pass
+    __slots__ = ()
 
 
 # smuggle a runtime value back into the AST
@@ -1047,7 +1117,7 @@ class ValueExp(expr):
 class ProxiedTuple(Value):
     tup: Value
     reads: list[Value]
-    value: Value
+    value: Value = None #type: ignore
     
     def __str__(self):
         return 'proxy[' + str(self.value) + ']'
@@ -1058,7 +1128,7 @@ class ProxiedList(Value):
     tup: Value
     read: Value
     write: Value
-    value: Value
+    value: Value = None #type: ignore
 
     def __str__(self):
         return 'proxy[' + str(self.value) + ']'
@@ -2,40 +2,121 @@
 # License: GPLv3
 
 from collections import defaultdict
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+import json
+import os
 from ..utils import *
+from typing import Dict
 from .convert_x86 import convert_program
+from .heap_x86 import Heap
 from .parser_x86 import x86_parser, x86_parser_instrs
 
 
-def interp_x86(program):
+def interp_x86(program, profile_file=None):
     x86_program = convert_program(program)
-    emu = X86Emulator(logging=False)
+    emu = X86Emulator(logging=False, profiling=profile_file is not None)
     x86_output = emu.eval_program(x86_program)
     for s in x86_output:
         print(s, end='')
+    if emu.heap is not None and os.environ.get('IUP_GC_STATS'):
+        emu.heap.print_stats()
+    if emu.profile is not None:
+        emu.profile.dump(profile_file)
 
 @dataclass
 class FunPointer:
     fun_name: str
 
+@dataclass
+class Profile:
+    '''
+    Dynamic execution counts of an emulated program.
+    Memory operands (including push/pop and rip-relative globals) count as loads and stores,
+    registers and pseudo-x86 variables as register reads and writes. The counters of the
+    heap, if the program initialized one, are in `gc`.
+    '''
+    blocks: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    opcodes: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    block_opcodes: Dict[str, Dict[str, int]] = field(default_factory=lambda: defaultdict(lambda: defaultdict(int)))
+    calls: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    loads: int = 0
+    stores: int = 0
+    register_reads: int = 0
+    register_writes: int = 0
+    gc: Dict[str, int] = field(default_factory=dict)
+
+    def instructions(self) -> int:
+        return sum(self.opcodes.values())
+
+    def to_json(self) -> Dict:
+        return {
+            'instructions': self.instructions(),
+            'loads': self.loads,
+            'stores': self.stores,
+            'register_reads': self.register_reads,
+            'register_writes': self.register_writes,
+            'blocks': {**self.blocks},
+            'opcodes': {**self.opcodes},
+            'block_opcodes': {b: {**ops} for (b, ops) in self.block_opcodes.items()},
+            'calls': {**self.calls},
+            'gc': {**self.gc},
+        }
+
+    def flat(self) -> str:
+        lines = [f'instructions {self.instructions()}',
+                 f'loads {self.loads}',
+                 f'stores {self.stores}',
+                 f'register_reads {self.register_reads}',
+                 f'register_writes {self.register_writes}']
+        lines += [f'block {b} {n}' for (b, n) in sorted(self.blocks.items(), key=lambda x: -x[1])]
+        lines += [f'opcode {op} {n}' for (op, n) in sorted(self.opcodes.items(), key=lambda x: -x[1])]
+        lines += [f'call {f} {n}' for (f, n) in sorted(self.calls.items(), key=lambda x: -x[1])]
+        lines += [f'gc {key} {n}' for (key, n) in self.gc.items()]
+        return '\n'.join(lines) + '\n'
+
+    def dump(self, filename: str) -> None:
+        with open(filename, 'w') as file:
+            if filename.endswith('.json'):
+                json.dump(self.to_json(), file, indent=2)
+            else:
+                file.write(self.flat())
+
+def read_block_counts(filename: str) -> Dict[str, int]:
+    '''
+    Block execution counts of a profile written by Profile.dump.
+    '''
+    with open(filename) as file:
+        if filename.endswith('.json'):
+            return json.load(file)['blocks']
+        counts = {}
+        for line in file:
+            match line.split():
+                case ['block', label, n]:
+                    counts[label] = int(n)
+                case _:
+                    pass
+        return counts
+
 class X86Emulator:
-    def __init__(self, logging=True):
+    def __init__(self, logging=True, profiling=False):
         self.registers = defaultdict(lambda: None)
         self.memory = defaultdict(lambda: None)
         self.variables = defaultdict(lambda: None)
         self.logging = logging
+        self.profile = Profile() if profiling else None
+        self.block = None
         self.registers['rbp'] = 1000
         self.registers['rsp'] = 1000
 
         self.global_vals = {}
+        self.heap = None
 
     def log(self, s):
         if self.logging:
             print(s)
 
     def parse_and_eval_program(self, s):
-        p = x86_parser.parse(s)
+        p = x86_parser().parse(s)
 
     def eval_program(self, p):
         assert p.data == 'prog'
@@ -54,11 +135,9 @@ class X86Emulator:
 
         # start evaluating at "main" or at "start"
         if label_name('main') in blocks.keys():
-            self.eval_instrs(blocks[label_name('main')], blocks,
-                             output)
+            self.eval_block(label_name('main'), blocks, output)
         elif label_name('start') in blocks.keys():
-            self.eval_instrs(blocks[label_name('start')], blocks,
-                             output)
+            self.eval_block(label_name('start'), blocks, output)
 
 
         self.log('FINAL STATE:')
@@ -68,12 +147,14 @@ class X86Emulator:
         self.log(f'OUTPUT: {output}')
         self.log('========== FINISHED EXECUTION ==============================')
 
+        if self.profile is not None and self.heap is not None:
+            self.profile.gc = self.heap.counters()
         return output
 
     def eval_instructions(self, s):
         import pandas as pd
 
-        p = x86_parser_instrs.parse(s)
+        p = x86_parser_instrs().parse(s)
 
         assert p.data == 'instrs'
         blocks = {}
@@ -162,7 +243,21 @@ class X86Emulator:
             raise Exception('eval_imm: unknown immediate:', e)
 
 
+    def count_access(self, a, write):
+        if a.data in ('reg_a', 'var_a'):
+            if write:
+                self.profile.register_writes += 1
+            else:
+                self.profile.register_reads += 1
+        elif a.data in ('mem_a', 'direct_mem_a', 'global_val_a'):
+            if write:
+                self.profile.stores += 1
+            else:
+                self.profile.loads += 1
+
     def eval_arg(self, a):
+        if self.profile is not None:
+            self.count_access(a, False)
         if a.data == 'reg_a':
             return self.registers[str(a.children[0])]
         elif a.data == 'var_a':
@@ -187,6 +282,8 @@ class X86Emulator:
             raise RuntimeError(f'Unknown arg in eval_arg: {a}')
 
     def store_arg(self, a, v):
+        if self.profile is not None:
+            self.count_access(a, True)
         if a.data == 'reg_a':
             self.registers[str(a.children[0])] = v
         elif a.data == 'var_a':
@@ -209,20 +306,38 @@ class X86Emulator:
         else:
             raise RuntimeError(f'Unknown arg in store_arg: {a}')
 
+    def eval_block(self, label, blocks, output):
+        if self.profile is None:
+            return self.eval_instrs(blocks[label], blocks, output)
+        self.profile.blocks[label] += 1
+        caller = self.block
+        self.block = label
+        self.eval_instrs(blocks[label], blocks, output)
+        self.block = caller
+
     def eval_instrs(self, instrs, blocks, output):
+        profile = self.profile
         for instr in instrs:
-            self.log(f'Evaluating instruction: {instr.pretty()}')
+            if self.logging:
+                self.log(f'Evaluating instruction: {instr.pretty()}')
+            if profile is not None:
+                profile.opcodes[instr.data] += 1
+                profile.block_opcodes[self.block][instr.data] += 1
             if instr.data == 'pushq':
                 a = instr.children[0]
                 self.registers['rsp'] = self.registers['rsp'] - 8
                 v = self.eval_arg(a)
                 self.memory[self.registers['rsp']] = v
+                if profile is not None:
+                    profile.stores += 1
 
             elif instr.data == 'popq':
                 a = instr.children[0]
                 v = self.memory[self.registers['rsp']]
                 self.registers['rsp'] = self.registers['rsp'] + 8
                 self.store_arg(a, v)
+                if profile is not None:
+                    profile.loads += 1
 
             elif instr.data == 'movq':
                 a1, a2 = instr.children
@@ -281,7 +396,7 @@ class X86Emulator:
 
                 if perform_jump:
                     if target in blocks.keys():
-                        self.eval_instrs(blocks[target], blocks, output)
+                        self.eval_block(target, blocks, output)
                     elif target == label_name('conclusion'):
                         return
                     else:
@@ -311,6 +426,8 @@ class X86Emulator:
 
             elif instr.data == 'callq':
                 target = str(instr.children[0])
+                if profile is not None:
+                    profile.calls[target] += 1
                 if target == label_name('print_int'):
                     self.log(f'CALL TO print_int: {self.registers["rdi"]}')
                     output.append(self.registers['rdi'])
@@ -325,48 +442,21 @@ class X86Emulator:
 
                 elif target == 'initialize':
                     self.log(f'CALL TO initialize: {self.registers["rdi"]}, {self.registers["rsi"]}')
-                    rootstack_size = self.registers['rdi']
-                    heap_size = self.registers['rsi']
-
-                    rs_begin = 2000
-                    rs_end = rs_begin + rootstack_size
-
-                    fromspace_begin = 100000
-                    fromspace_end = fromspace_begin + heap_size
-
-                    self.global_vals = { **self.global_vals,
-                        'rootstack_begin': rs_begin,
-                        'rootstack_end': rs_end,
-                        'free_ptr': fromspace_begin,
-                        'fromspace_begin': fromspace_begin,
-                        'fromspace_end': fromspace_end
-                    }
+                    self.heap = Heap(self.memory, self.global_vals, self.registers['rdi'], self.registers['rsi'])
 
                     if self.logging:
                         print(self.print_state())
 
-
                 elif target == 'collect':
                     self.log(f'CALL TO collect: need {self.registers["rsi"]} bytes')
-
-                    needed = self.registers["rsi"]
-                    fsb = self.global_vals['fromspace_begin']
-                    fse = self.global_vals['fromspace_end']
-
-                    current_space = fse - fsb
-
-                    new_space = current_space
-                    while new_space - current_space < needed:
-                        new_space = new_space * 2
-
-                    new_fse = fsb + new_space
-                    self.global_vals['fromspace_end'] = new_fse
+                    assert self.heap is not None, 'collect before initialize'
+                    self.heap.collect(self.registers['rdi'], self.registers['rsi'])
 
                     if self.logging:
                         print(self.print_state())
 
                 else:
-                    self.eval_instrs(blocks[target], blocks, output)
+                    self.eval_block(target, blocks, output)
 
             elif instr.data == 'retq':
                 return
@@ -395,13 +485,15 @@ class X86Emulator:
                 v = self.eval_arg(instr.children[0])
                 assert isinstance(v, FunPointer)
                 target = v.fun_name
-                self.eval_instrs(blocks[target], blocks, output)
+                if profile is not None:
+                    profile.calls[target] += 1
+                self.eval_block(target, blocks, output)
 
             elif instr.data == 'indirect_jmp':
                 v = self.eval_arg(instr.children[0])
                 assert isinstance(v, FunPointer)
                 target = v.fun_name
-                self.eval_instrs(blocks[target], blocks, output)
+                self.eval_block(target, blocks, output)
                 return # after jumping, toss continuation
 
             else:
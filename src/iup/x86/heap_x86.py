@@ -0,0 +1,176 @@
+import sys
+import time
+from typing import Any, Dict
+
+# The layout of the tags and the growth policy of the heap follow runtime.c.
+TAG_VECOF_RSHIFT = 62
+ANY_TAG_MASK = 7
+ANY_TAG_PTR = 0
+ANY_TAG_VEC = 2
+ANY_TAG_VECOF = 6
+GROW_PERCENT = 50
+WORD = 8
+
+# the emulated heap starts above the root stack, which starts at 2000
+HEAP_BEGIN = 100000
+
+
+def is_forwarding(tag: int) -> bool:
+    return not (tag & 1)
+
+def is_vecof(tag: int) -> bool:
+    return bool(1 & (tag >> TAG_VECOF_RSHIFT))
+
+def is_ptr(p: Any) -> bool:
+    return isinstance(p, int) and p != 0 and (p & ANY_TAG_MASK) in (ANY_TAG_PTR, ANY_TAG_VEC, ANY_TAG_VECOF)
+
+def to_ptr(p: int) -> int:
+    return p & ~ANY_TAG_MASK
+
+
+class Heap:
+    '''
+    The heap of runtime.c, in the memory of the emulator: fromspace and tospace, the root
+    stack, and the semispace collector with Cheney's algorithm, including its growth policy.
+    The globals free_ptr, fromspace_end, rootstack_begin and rootstack_end are in the global
+    values of the emulator, which the compiled code reads and bumps.
+
+    The words of a space are in the memory of the emulator, keyed by their addresses, as the
+    stack and the root stack are; a space is a range of addresses, and freeing it deletes the
+    words written in it. The counters are the ones runtime.c writes with IUP_GC_STATS, and
+    they have the same values for the same program and sizes; only the pause times differ.
+    '''
+
+    def __init__(self, memory: Dict[int, Any], global_vals: Dict[str, Any], rootstack_size: int, heap_size: int):
+        assert heap_size % WORD == 0
+        assert rootstack_size % WORD == 0
+        self.memory = memory
+        self.global_vals = global_vals
+        self.top = HEAP_BEGIN  # where the next space is allocated
+        self.fromspace_begin = self.allocate_space(heap_size)
+        self.fromspace_end = self.fromspace_begin + heap_size
+        self.tospace_begin = self.allocate_space(heap_size)
+        self.tospace_end = self.tospace_begin + heap_size
+        self.rootstack_begin = 2000
+        self.free_ptr = self.fromspace_begin
+        self.allocation_start = self.free_ptr
+        self.stats = {
+            'collections': 0,
+            'major_collections': 0,
+            'heap_growths': 0,
+            'bytes_allocated': 0,
+            'bytes_copied': 0,
+        }
+        self.pause = 0.0
+        self.max_pause = 0.0
+        global_vals.update({
+            'rootstack_begin': self.rootstack_begin,
+            'rootstack_end': self.rootstack_begin + rootstack_size,
+            'free_ptr': self.free_ptr,
+            'fromspace_begin': self.fromspace_begin,
+            'fromspace_end': self.fromspace_end,
+        })
+
+    def allocate_space(self, size: int) -> int:
+        begin = self.top
+        self.top += size
+        return begin
+
+    def free_space(self, begin: int, end: int) -> None:
+        for addr in range(begin, end, WORD):
+            self.memory.pop(addr, None)
+
+    def collect(self, rootstack_ptr: int, bytes_requested: int) -> None:
+        start = time.perf_counter()
+        self.free_ptr = self.global_vals['free_ptr']
+        self.stats['collections'] += 1
+        self.stats['bytes_allocated'] += self.free_ptr - self.allocation_start
+
+        self.cheney(rootstack_ptr)
+        occupied_bytes = self.free_ptr - self.fromspace_begin
+        old_bytes = self.fromspace_end - self.fromspace_begin
+        if self.fromspace_end - self.free_ptr < bytes_requested \
+           or occupied_bytes * 100 > old_bytes * GROW_PERCENT:
+            needed_bytes = occupied_bytes + bytes_requested
+            new_bytes = old_bytes
+            while new_bytes <= needed_bytes or occupied_bytes * 100 > new_bytes * GROW_PERCENT:
+                new_bytes *= 2
+            self.stats['heap_growths'] += 1
+            self.tospace_begin = self.allocate_space(new_bytes)
+            self.tospace_end = self.tospace_begin + new_bytes
+            # copy again, to the bigger space
+            self.cheney(rootstack_ptr)
+            self.tospace_begin = self.allocate_space(new_bytes)
+            self.tospace_end = self.tospace_begin + new_bytes
+
+        self.allocation_start = self.free_ptr
+        self.global_vals['free_ptr'] = self.free_ptr
+        self.global_vals['fromspace_begin'] = self.fromspace_begin
+        self.global_vals['fromspace_end'] = self.fromspace_end
+        pause = time.perf_counter() - start
+        self.pause += pause
+        self.max_pause = max(self.max_pause, pause)
+
+    def cheney(self, rootstack_ptr: int) -> None:
+        memory = self.memory
+        used_end = self.free_ptr
+        scan_ptr = self.free_ptr = self.tospace_begin
+        for root_loc in range(self.rootstack_begin, rootstack_ptr, WORD):
+            self.copy_vector(root_loc)
+        while scan_ptr != self.free_ptr:
+            tag = memory[scan_ptr]
+            if is_vecof(tag):
+                length = (tag & ((1 << TAG_VECOF_RSHIFT) - 1)) >> 2
+                pointers = -1 if (tag >> 1) & 1 else 0
+            else:
+                length = (tag & 126) >> 1
+                pointers = tag >> 7
+            for i in range(length):
+                if (pointers >> i) & 1:
+                    self.copy_vector(scan_ptr + WORD * (i + 1))
+            scan_ptr += WORD * (length + 1)
+        self.stats['bytes_copied'] += self.free_ptr - self.tospace_begin
+
+        old_begin, old_end = self.fromspace_begin, self.fromspace_end
+        self.free_space(old_begin, used_end)
+        self.fromspace_begin, self.fromspace_end = self.tospace_begin, self.tospace_end
+        self.tospace_begin, self.tospace_end = old_begin, old_end
+
+    # copy the vector the pointer at loc points to, unless it was already, and point loc to the copy
+    def copy_vector(self, loc: int) -> None:
+        memory = self.memory
+        p = memory.get(loc)
+        if not is_ptr(p):
+            return
+        vec = to_ptr(p)
+        if not (self.fromspace_begin <= vec < self.fromspace_end):
+            return
+        any_tag = p & ANY_TAG_MASK
+        tag = memory[vec]
+        if is_forwarding(tag):
+            memory[loc] = tag | any_tag
+            return
+        if is_vecof(tag):
+            length = (tag & ((1 << TAG_VECOF_RSHIFT) - 1)) >> 2
+        else:
+            length = (tag & 126) >> 1
+        new = self.free_ptr
+        for i in range(0, WORD * (length + 1), WORD):
+            memory[new + i] = memory.get(vec + i)
+        self.free_ptr = new + WORD * (length + 1)
+        memory[vec] = new
+        memory[loc] = new | any_tag
+
+    def counters(self) -> Dict[str, int]:
+        return {**self.stats,
+                'heap_bytes': self.fromspace_end - self.fromspace_begin,
+                'bytes_allocated': self.stats['bytes_allocated'] + self.global_vals['free_ptr'] - self.allocation_start}
+
+    # the counters, as runtime.c writes them at exit
+    def print_stats(self, file=sys.stderr) -> None:
+        counters = self.counters()
+        print('gc: collector semispace', file=file)
+        for key in ['collections', 'major_collections', 'heap_growths', 'heap_bytes', 'bytes_allocated', 'bytes_copied']:
+            print(f'gc: {key} {counters[key]}', file=file)
+        print(f'gc: pause_ms {self.pause * 1000:.3f}', file=file)
+        print(f'gc: max_pause_ms {self.max_pause * 1000:.3f}', file=file)
@@ -1,9 +1,17 @@
 # Author: Joe Near
 # License: GPLv3
 
-from ..lark import Lark
+from functools import lru_cache
+from typing import TYPE_CHECKING
 
-x86_parser = Lark(r"""
+if TYPE_CHECKING:
+    from ..lark import Lark
+
+# The parsers are only built when an x86 program is first parsed. Their LALR
+# tables are cached on disk by lark (cache=True), keyed by the grammar, so
+# later processes load the serialized tables instead of rebuilding them.
+
+x86_grammar = r"""
     ?instr: "movq" arg "," arg -> movq
           | "addq" arg "," arg -> addq
           | "subq" arg "," arg -> subq
@@ -56,9 +64,9 @@ x86_parser = Lark(r"""
 
     %import common.WS
     %ignore WS
-    """, start='prog', parser='lalr')
+    """
 
-x86_parser_instrs = Lark(r"""
+x86_instrs_grammar = r"""
     ?instr: "movq" arg "," arg -> movq
           | "addq" arg "," arg -> addq
           | "subq" arg "," arg -> subq
@@ -107,5 +115,15 @@ x86_parser_instrs = Lark(r"""
 
     %import common.WS
     %ignore WS
-    """, start='instrs', parser='lalr')
+    """
+
+@lru_cache(maxsize=None)
+def x86_parser() -> 'Lark':
+    from ..lark import Lark
+    return Lark(x86_grammar, start='prog', parser='lalr', cache=True)
+
+@lru_cache(maxsize=None)
+def x86_parser_instrs() -> 'Lark':
+    from ..lark import Lark
+    return Lark(x86_instrs_grammar, start='instrs', parser='lalr', cache=True)
 
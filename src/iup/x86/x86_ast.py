@@ -1,50 +1,78 @@
 from __future__ import annotations
 
 import ast
+import io
 from dataclasses import dataclass, field
-from typing import Iterable
+from typing import Iterable, TextIO
 
-from ..utils import dedent, indent, indent_stmt, label_name
+from ..utils import indent_stmt, label_name
 
+# indentation of the instructions of a block
+asm_indent = ' ' * 4
 
-@dataclass
+@dataclass(slots=True)
 class X86Program:
     body: dict[str, list[instr]] | list[instr]
     stack_space: int = 0
     used_callee: list[Reg] = field(default_factory=lambda:[])
 
-    def __str__(self):
-        result = ''
+    def write(self, out: TextIO) -> None:
+        '''
+        Write the assembly to a file-like object, one block at a time.
+        '''
         if isinstance(self.body, dict):
             for (l,ss) in self.body.items():
                 if l == label_name('main'):
-                    result += '\t.globl ' + label_name('main') + '\n'
-                result += '\t.align 16\n'
-                result += l + ':\n'
-                indent()
-                result += ''.join([str(s) for s in ss]) + '\n'
-                dedent()
+                    out.write('\t.globl ' + label_name('main') + '\n')
+                out.write('\t.align 16\n' + l + ':\n')
+                out.writelines([asm_indent + s.asm() + '\n' for s in ss])
+                out.write('\n')
         else:
-            result += '\t.globl ' + label_name('main') + '\n' + \
-                      label_name('main') + ':\n'
-            indent()
-            result += ''.join([str(s) for s in self.body])
-            dedent()
-        result += '\n'
-        return result
-
-@dataclass
+            out.write('\t.globl ' + label_name('main') + '\n' + \
+                      label_name('main') + ':\n')
+            out.writelines([asm_indent + s.asm() + '\n' for s in self.body])
+        out.write('\n')
+
+    def __str__(self):
+        out = io.StringIO()
+        self.write(out)
+        return out.getvalue()
+
+@dataclass(slots=True)
 class X86ProgramDefs:
     defs: list[ast.FunctionDef]
 
     def __str__(self):
         return "\n".join([str(d) for d in self.defs])
 
-class instr: ...
-class arg: ...
-class location(arg): ...
+class instr:
+    __slots__ = ()
+
+    def asm(self) -> str: ...
+
+    def __str__(self):
+        return indent_stmt() + self.asm() + '\n'
+
+class arg:
+    __slots__ = ()
+
+# Registers and small immediates are immutable and there are few of them, so every
+# construction returns one shared object.
+interned_args: dict[tuple[type, type, object], arg] = {}
+small_immediate_min = -128
+small_immediate_max = 1024
+
+def interned(cls: type, value: object) -> arg:
+    key = (cls, type(value), value)
+    a = interned_args.get(key)
+    if a is None:
+        a = interned_args[key] = object.__new__(cls)
+    return a
+
+class location(arg):
+    __slots__ = ()
 
-@dataclass(frozen=True, eq=False)
+@dataclass(frozen=True, eq=False, slots=True)
 class Instr(instr):
     instr: str
     args: tuple[arg, ...]
@@ -58,81 +86,98 @@ class Instr(instr):
         return self.args[0]
     def target(self):
         return self.args[-1]
-    def __str__(self):
-        return indent_stmt() + self.instr + ' ' + ', '.join(str(a) for a in self.args) + '\n'
+    def asm(self):
+        return self.instr + ' ' + ', '.join(str(a) for a in self.args)
 
-@dataclass(frozen=True, eq=False)
+@dataclass(frozen=True, eq=False, slots=True)
 class Callq(instr):
     func: str
     num_args: int
 
-    def __str__(self):
-        return indent_stmt() + 'callq' + ' ' + self.func + '\n'
+    def asm(self):
+        return 'callq' + ' ' + self.func
 
-@dataclass(frozen=True, eq=False)
+@dataclass(frozen=True, eq=False, slots=True)
 class IndirectCallq(instr):
     func: arg
     num_args: int
 
-    def __str__(self):
-        return indent_stmt() + 'callq' + ' *' + str(self.func) + '\n'
+    def asm(self):
+        return 'callq' + ' *' + str(self.func)
 
-@dataclass(frozen=True, eq=False)
+@dataclass(frozen=True, eq=False, slots=True)
 class JumpIf(instr):
     cc: str
     label: str
 
-    def __str__(self):
-        return indent_stmt() + 'j' + self.cc + ' ' + self.label + '\n'
+    def asm(self):
+        return 'j' + self.cc + ' ' + self.label
 
-@dataclass(frozen=True, eq=False)
+@dataclass(frozen=True, eq=False, slots=True)
 class Jump(instr):
     label: str
 
-    def __str__(self):
-        return indent_stmt() + 'jmp ' + self.label + '\n'
+    def asm(self):
+        return 'jmp ' + self.label
 
-@dataclass(frozen=True, eq=False)
+@dataclass(frozen=True, eq=False, slots=True)
 class IndirectJump(instr):
     target: location
 
-    def __str__(self):
-        return indent_stmt() + 'jmp *' + str(self.target) + '\n'
+    def asm(self):
+        return 'jmp *' + str(self.target)
 
-@dataclass(frozen=True, eq=False)
+@dataclass(frozen=True, eq=False, slots=True)
 class TailJump(instr):
     func: arg
     arity: int
 
-    def __str__(self):
-        return indent_stmt() + 'tailjmp ' + str(self.func) + '\n'
+    def asm(self):
+        return 'tailjmp ' + str(self.func)
 
-@dataclass(frozen=True)
+# Variables and registers are compared and hashed by identity, which is what liveness and
+# interference spend their time on. Registers are interned, and select instructions makes
+# one Variable per name that the later passes keep.
+@dataclass(frozen=True, eq=False, slots=True)
 class Variable(location):
     id: str
 
     def __str__(self):
         return self.id
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Immediate(arg):
     value: int
 
+    def __new__(cls, value: int | None = None):
+        if value is None or not (small_immediate_min <= value <= small_immediate_max):
+            return object.__new__(cls)
+        return interned(cls, value)
+
     def __str__(self):
         return '$' +  str(self.value)
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, eq=False, slots=True)
 class Reg(location):
     id: str
 
+    def __new__(cls, id: str | None = None):
+        if id is None:
+            return object.__new__(cls)
+        return interned(cls, id)
+
+    # copies and unpickled registers are the interned ones
+    def __reduce__(self):
+        return (type(self), (self.id,))
+
     def __str__(self):
         return '%' + self.id
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, eq=False, slots=True)
 class ByteReg(Reg):
     pass
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Deref(arg):
     reg: str
     offset: int
@@ -140,7 +185,7 @@ class Deref(arg):
     def __str__(self):
         return str(self.offset) + '(%' + self.reg + ')'
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Global(arg):
     name: str
 
@@ -0,0 +1,227 @@
+# Programs that exercise the collectors of runtime.c, shared by the tests and the benchmarks.
+
+import io
+import os
+import subprocess
+import time
+from contextlib import redirect_stdout
+from typing import Dict, List, Tuple
+
+from iup.x86.convert_x86 import convert_program
+from iup.x86.eval_x86 import X86Emulator
+from iup.x86.x86_ast import Callq, Deref, Global, Immediate, Instr, Jump, JumpIf, Reg, X86Program
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The mutator allocates the way ExposeAllocationPass does: it bumps free_ptr, and calls
+# collect when the tuple does not fit before fromspace_end. It keeps a ring of LIVE tuples
+# live, allocates short-lived tuples at every one of STEPS steps, and at every 16th step
+# stores a new tuple in a cell of the ring, calling record_write. It prints a sum over the
+# ring, which does not depend on the collector.
+MUTATOR = r'''
+#include <stdint.h>
+#include <stdio.h>
+#include <stdlib.h>
+
+// runtime.h defines these, so it can only be included once
+extern int64_t* fromspace_end;
+extern int64_t* free_ptr;
+extern int64_t** rootstack_begin;
+void initialize(uint64_t rootstack_size, uint64_t heap_size);
+void collect(int64_t** rootstack_ptr, uint64_t bytes_requested);
+void record_write(int64_t** field_loc);
+
+static int64_t** rs;
+
+// a tuple of len fields, whose fields in mask are pointers
+static int64_t* alloc(int len, int64_t mask)
+{
+  if (free_ptr + len + 1 > fromspace_end)
+    collect(rs + 3, 8 * (len + 1));
+  int64_t* v = free_ptr;
+  free_ptr += len + 1;
+  v[0] = 1 | (len << 1) | (mask << 7);
+  return v;
+}
+
+int main(int argc, char** argv)
+{
+  long live = atol(argv[1]), steps = atol(argv[2]);
+  initialize(1 << 16, atol(argv[3]));
+  rs = rootstack_begin;
+  rs[0] = rs[1] = rs[2] = 0;  // the ring, a cursor in it, young garbage
+
+  // rs[0] is a list of cells (payload, next); the last one is rs[1]
+  for (long i = 0; i != live; i++) {
+    int64_t* p = alloc(1, 0);
+    p[1] = i;
+    rs[2] = p;
+    int64_t* cell = alloc(2, 3);
+    cell[1] = (int64_t)rs[2];
+    cell[2] = (int64_t)rs[0];
+    rs[0] = cell;
+    if (i == 0)
+      rs[1] = cell;
+  }
+  rs[2] = 0;
+
+  for (long i = 0; i != steps; i++) {
+    int64_t* g = alloc(2, 2);
+    g[1] = i;
+    g[2] = (int64_t)rs[2];
+    rs[2] = i % 100 == 0 ? 0 : g;
+    if (i % 16 == 0) {
+      int64_t* p = alloc(1, 0);
+      p[1] = i;
+      int64_t* cursor = rs[1];
+      cursor[1] = (int64_t)p;
+      record_write((int64_t**)&cursor[1]);
+      rs[1] = cursor[2] ? (int64_t*)cursor[2] : rs[0];
+    }
+  }
+
+  int64_t sum = 0;
+  for (int64_t* cell = rs[0]; cell; cell = (int64_t*)cell[2])
+    sum += ((int64_t*)cell[1])[1];
+  printf("%ld\n", (long)sum);
+  return 0;
+}
+'''
+
+
+def build_mutator(directory: str, cflags: List[str]) -> str:
+    source = os.path.join(directory, 'mutator.c')
+    binary = os.path.join(directory, 'mutator')
+    with open(source, 'w') as f:
+        f.write(MUTATOR)
+    subprocess.run(['gcc', *cflags, source, os.path.join(ROOT, 'runtime.c'), '-o', binary], check=True)
+    return binary
+
+
+# the output of the mutator and the counters the runtime writes at exit with IUP_GC_STATS set
+def run_mutator(binary: str, live: int, steps: int, heap: int, collector: str) -> Tuple[str, Dict[str, str]]:
+    env = dict(os.environ, IUP_GC=collector, IUP_GC_STATS='1')
+    res = subprocess.run([binary, str(live), str(steps), str(heap)],
+                         env=env, capture_output=True, text=True, check=True)
+    return res.stdout.strip(), gc_stats(res.stderr)
+
+
+def gc_stats(stderr: str) -> Dict[str, str]:
+    stats = {}
+    for line in stderr.splitlines():
+        if line.startswith('gc: '):
+            key, value = line[4:].split()
+            stats[key] = value
+    return stats
+
+
+# The x86 program allocates like the compiled code: it bumps free_ptr and calls collect
+# when a tuple does not fit before fromspace_end, with the root stack in %r15. Each
+# iteration allocates a tuple of three integers that dies at once, and every `keep`-th also
+# allocates a cell of a list kept in the root stack; the program prints the sum of the
+# list. `emulate` runs it in the emulator and `native` with runtime.c, and both return its
+# output, the time of the run and the counters of the heap, which must be the same.
+COUNTERS = ['collections', 'heap_growths', 'heap_bytes', 'bytes_allocated', 'bytes_copied']
+
+
+def movq(src, dst):
+    return Instr('movq', [src, dst])
+
+
+def allocate(blocks, label, bytes_, tag, fields, next_):
+    blocks[label] = [
+        movq(Global('free_ptr'), Reg('rax')),
+        Instr('addq', [Immediate(bytes_), Reg('rax')]),
+        movq(Global('fromspace_end'), Reg('r11')),
+        Instr('cmpq', [Reg('r11'), Reg('rax')]),
+        JumpIf('l', label + '_fits'),
+        movq(Reg('r15'), Reg('rdi')),
+        movq(Immediate(bytes_), Reg('rsi')),
+        Callq('collect', 2),
+        Jump(label + '_fits')]
+    blocks[label + '_fits'] = [
+        movq(Global('free_ptr'), Reg('r11')),
+        Instr('addq', [Immediate(bytes_), Global('free_ptr')]),
+        movq(Immediate(tag), Deref('r11', 0)),
+        *[movq(field, Deref('r11', 8 * (i + 1))) for i, field in enumerate(fields)],
+        Jump(next_)]
+
+
+def program(iterations, keep, heap):
+    blocks = {}
+    blocks['main'] = [
+        Instr('pushq', [Reg('rbp')]),
+        movq(Reg('rsp'), Reg('rbp')),
+        *[Instr('pushq', [Reg(r)]) for r in ['r15', 'rbx', 'r12', 'r13']],
+        movq(Immediate(65536), Reg('rdi')),
+        movq(Immediate(heap), Reg('rsi')),
+        Callq('initialize', 2),
+        movq(Global('rootstack_begin'), Reg('r15')),
+        movq(Immediate(0), Deref('r15', 0)),
+        Instr('addq', [Immediate(8), Reg('r15')]),
+        movq(Immediate(0), Reg('rbx')),
+        movq(Immediate(0), Reg('r13')),
+        Jump('loop')]
+    blocks['loop'] = [
+        Instr('cmpq', [Immediate(iterations), Reg('rbx')]),
+        JumpIf('l', 'garbage'),
+        Jump('sum')]
+    # a tuple of three integers: length 3, no pointers
+    allocate(blocks, 'garbage', 32, 1 | 3 << 1, [Reg('rbx')] * 3, 'keep')
+    blocks['keep'] = [
+        Instr('addq', [Immediate(1), Reg('r13')]),
+        Instr('cmpq', [Immediate(keep), Reg('r13')]),
+        JumpIf('l', 'next'),
+        movq(Immediate(0), Reg('r13')),
+        Jump('cell')]
+    # a cell (i, list): length 2, the second field a pointer; the list is loaded after
+    # collect, which may move it
+    allocate(blocks, 'cell', 24, 1 | 2 << 1 | 2 << 7, [Reg('rbx')], 'link')
+    blocks['link'] = [
+        movq(Deref('r15', -8), Reg('rax')),
+        movq(Reg('rax'), Deref('r11', 16)),
+        movq(Reg('r11'), Deref('r15', -8)),
+        Jump('next')]
+    blocks['next'] = [
+        Instr('addq', [Immediate(1), Reg('rbx')]),
+        Jump('loop')]
+    blocks['sum'] = [
+        movq(Immediate(0), Reg('r12')),
+        movq(Deref('r15', -8), Reg('rax')),
+        Jump('sum_loop')]
+    blocks['sum_loop'] = [
+        Instr('cmpq', [Immediate(0), Reg('rax')]),
+        JumpIf('e', 'done'),
+        Instr('addq', [Deref('rax', 8), Reg('r12')]),
+        movq(Deref('rax', 16), Reg('rax')),
+        Jump('sum_loop')]
+    blocks['done'] = [
+        movq(Reg('r12'), Reg('rdi')),
+        Callq('print_int', 1),
+        *[Instr('popq', [Reg(r)]) for r in ['r13', 'r12', 'rbx', 'r15', 'rbp']],
+        movq(Immediate(0), Reg('rax')),
+        Instr('retq', [])]
+    return X86Program(blocks)
+
+
+def emulate(prog):
+    emu = X86Emulator(logging=False)
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        output = emu.eval_program(convert_program(prog))
+    elapsed = time.perf_counter() - start
+    return ''.join(str(x) for x in output), elapsed, emu.heap.counters()
+
+
+def native(prog, tmp):
+    source = os.path.join(tmp, 'prog.s')
+    binary = os.path.join(tmp, 'prog')
+    with open(source, 'w') as f:
+        prog.write(f)
+    subprocess.run(['gcc', '-g', '-std=c99', os.path.join(ROOT, 'runtime.c'), source, '-o', binary], check=True, capture_output=True)
+    env = dict(os.environ, IUP_GC='semispace', IUP_GC_STATS='1')
+    start = time.perf_counter()
+    res = subprocess.run([binary], env=env, capture_output=True, text=True, check=True)
+    elapsed = time.perf_counter() - start
+    stats = gc_stats(res.stderr)
+    return res.stdout.strip(), elapsed, {key: int(stats[key]) for key in COUNTERS}
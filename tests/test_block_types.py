@@ -0,0 +1,56 @@
+import ast
+
+import pytest
+
+from iup.compiler import ExplicateControlPass, PassManager, RCOPass, ShrinkPass
+from iup.type import TYPE_CHECKERS
+from iup.type.type_check_Cif import TypeEnv
+from iup.utils import BoolType, CProgram, Goto, IntType
+
+
+# each variable is a copy of the previous one in both branches of a conditional
+def chain(n: int) -> CProgram:
+    lines = ['v0 = input_int()']
+    for i in range(1, n):
+        lines += [f'if v{i - 1} < {i}:', f'    v{i} = v{i - 1}', 'else:', f'    v{i} = v{i - 1}']
+    lines.append(f'print(v{n - 1})')
+    manager = PassManager([ShrinkPass(), RCOPass(), ExplicateControlPass()], [])
+    manager.trace = False
+    return manager.run(ast.parse('\n'.join(lines) + '\n'), None) #type: ignore
+
+
+def test_type_env_versions_and_reads():
+    env = TypeEnv()
+    env['x'] = IntType()
+    env['x'] = IntType()
+    env['y'] = BoolType()
+    assert env.versions == {'x': 1, 'y': 1} and env.changed == {'x', 'y'}
+    env['x'] = BoolType()
+    env.get('x')
+    env.get('z')
+    assert env.reads == {'x': 2, 'z': 0}
+
+
+def test_blocks_are_checked_again_only_when_a_type_they_read_changed():
+    prog = chain(20)
+    checker = TYPE_CHECKERS['Cif']
+    checked = []
+
+    def type_check_block(ss, env):
+        checked.append(ss)
+        checker.type_check_block(ss, env) #type: ignore
+
+    # explicate control lists the blocks from the end of the program, so each
+    # variable is known one round after the previous one
+    rounds = checker.infer_blocks(prog.body, TypeEnv(), type_check_block) #type: ignore
+    assert rounds == 21
+    assert len(prog.body) < len(checked) < 3 * len(prog.body)
+    TYPE_CHECKERS['Cwhile'].type_check(prog)
+    assert prog.var_types == {f'v{i}': IntType() for i in range(20)} #type: ignore
+
+
+def test_a_block_checked_before_a_type_it_reads_is_checked_again():
+    prog = CProgram({'block_1': [ast.Expr(ast.Call(ast.Name('print'), [ast.Name('x')], [])), ast.Return(ast.Constant(0))],
+                     'start': [ast.Assign([ast.Name('x')], ast.Constant(True)), Goto('block_1')]})
+    with pytest.raises(Exception, match='BoolType'):
+        TYPE_CHECKERS['Cif'].type_check(prog)
@@ -0,0 +1,54 @@
+import ast
+import json
+import os
+import subprocess
+import sys
+
+import iup
+from iup.check import check_file, check_paths, language_level
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(iup.__file__))))
+
+
+def test_language_level():
+    assert language_level(ast.parse('x = input_int()\nprint(x + 1)\n')) == 'Lvar'
+    assert language_level(ast.parse('x = 1\nprint(x if not True else 2)\n')) == 'Lif'
+    assert language_level(ast.parse('x = 1\nwhile x < 3:\n    x = x + 1\n')) == 'Lwhile'
+
+
+def test_fields_of_a_passing_and_a_failing_source(tmp_path):
+    good, bad = tmp_path / 'good.py', tmp_path / 'bad.py'
+    good.write_text('x = input_int()\nif x < 2:\n    print(x)\nelse:\n    print(0)\n')
+    bad.write_text('x = input_int()\nprint(x < 2)\n')
+    result = check_file(str(good))
+    assert set(result) == {'file', 'lang', 'ok', 'error', 'time'}
+    assert (result['file'], result['lang'], result['ok'], result['error']) == (str(good), 'Lif', True, None)
+    assert result['time'] >= 0
+    result = check_file(str(bad))
+    assert (result['lang'], result['ok']) == ('Lif', False)
+    assert 'BoolType' in result['error'] and '\n' not in result['error']
+    # a language given for every source
+    assert check_file(str(good), 'Lwhile')['lang'] == 'Lwhile'
+    assert not check_file(str(good), 'Lvar')['ok']
+
+
+def test_sources_of_a_directory_in_a_stable_order(tmp_path):
+    names = ['b.py', 'a.py', 'sub/c.py', 'sub/a.py', 'z/y.py', 'notes.txt']
+    for name in names:
+        path = tmp_path / name
+        path.parent.mkdir(exist_ok=True)
+        path.write_text('print(1)\n')
+    expected = [str(tmp_path / name) for name in ['a.py', 'b.py', 'sub/a.py', 'sub/c.py', 'z/y.py']]
+    for workers in [1, 2]:
+        assert [r['file'] for r in check_paths([str(tmp_path)], None, workers)] == expected
+
+
+def test_check_only_writes_json_lines(tmp_path):
+    (tmp_path / 'good.py').write_text('print(1)\n')
+    (tmp_path / 'bad.py').write_text('print(input_int() + True)\n')
+    env = dict(os.environ, PYTHONPATH=os.path.join(ROOT, 'src'))
+    res = subprocess.run([sys.executable, os.path.join(ROOT, 'main.py'), '--check-only', str(tmp_path)],
+                         env=env, capture_output=True, text=True)
+    results = [json.loads(line) for line in res.stdout.splitlines()]
+    assert [(os.path.basename(r['file']), r['ok']) for r in results] == [('bad.py', False), ('good.py', True)]
+    assert res.returncode == 1
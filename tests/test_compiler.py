@@ -1,10 +1,15 @@
 import pytest
 import os
+import re
+import subprocess
 import sys
-from typing import Any, Callable, List, Tuple
-from ast import parse
+from typing import Any, Dict, List, Optional, Tuple
+from iup import runtime_object
+from iup.parse_cache import parse_file
+from iup.sandbox import run_binary
 from iup.x86.eval_x86 import interp_x86 # type: ignore
-from iup.compiler import Language, LwhileAnalyses, LwhileTransforms, PassManager, Program
+from iup.compiler.pass_manager import run_with_io
+from iup.compiler import Compilation, Language, LwhileAnalyses, LwhileFusedTransforms, LwhileTransforms, PassManager, Program, Validation
 from iup.interp import INTERPRETERS
 from iup.type   import TYPE_CHECKERS
 
@@ -14,59 +19,83 @@ class TestPassManager(PassManager):
 
     test: str
     test_dir: str
+    # the run of the compiled binary, by check_pass
+    run_result: Optional[Dict[str, Any]] = None
 
-    def run(self, prog: Program, manager: 'PassManager') -> Program:
-        self.prog = prog
-        TYPE_CHECKERS[self.lang].type_check(self.prog) #type: ignore
+    def run(self, prog: Program, outer: Optional[Compilation]) -> Program:
+        ctx = self.start(prog)
+        TYPE_CHECKERS[self.lang].type_check(ctx.prog) #type: ignore
         
         for trans in self.transforms:
-            self.prog = trans.run(self.prog, self)
-            # check_pass(trans.target, self.prog, self.test_dir, self.test, False)
+            ctx.prog = trans.run(ctx.prog, ctx)
+            if self.validation is not None:
+                self.validation.check(trans, ctx.prog, self)
         
-        assert check_pass('X86', self.prog, self.test_dir, self.test, False)
+        if not check_pass('X86', ctx.prog, self.test_dir, self.test, False, self):
+            if self.validation is not None and not self.validation.active:
+                self.validation.locate(self)
+            assert False
         
-        self.cache = {}
-        return self.prog
+        return ctx.prog
     
 LwhileTestManager = TestPassManager(LwhileTransforms, LwhileAnalyses, lang='Lwhile')
+LwhileTestManager.validation = Validation(mode='on_failure')
+LwhileFusedTestManager = TestPassManager(LwhileFusedTransforms, LwhileAnalyses, lang='Lwhile')
+LwhileFusedTestManager.validation = Validation(mode='on_failure')
     
 compiler_test_configs: List[Tuple[TestPassManager, str]] = [
     (LwhileTestManager, os.path.join(TEST_BASE, 'var')),
     (LwhileTestManager, os.path.join(TEST_BASE, 'if')),
     (LwhileTestManager, os.path.join(TEST_BASE, 'while')),
+    (LwhileFusedTestManager, os.path.join(TEST_BASE, 'while')),
 ]
 
 
-def check_pass(lang: Language, res: Any, test_dir: str, test: str, emulate: bool) -> bool:
+# as diff -b --strip-trailing-cr: runs of blanks are the same, and trailing ones and a
+# missing newline at the end are ignored
+def same_output(output: str, golden: str) -> bool:
+    def lines(text: str) -> List[str]:
+        return [re.sub(r'[ \t]+', ' ', line).rstrip() for line in text.replace('\r\n', '\n').splitlines()]
+    return lines(output) == lines(golden)
+
+
+def check_pass(lang: Language, res: Any, test_dir: str, test: str, emulate: bool,
+               manager: Optional[TestPassManager] = None) -> bool:
     input_file  = os.path.join(test_dir, test + ".in")
     output_file = os.path.join(test_dir, test + ".out")
-    
-    def run_with_io(command: Callable[[],None]) -> None:
-        stdin = sys.stdin
-        stdout = sys.stdout
-        sys.stdin = open(input_file, 'r')
-        sys.stdout = open(output_file, 'w')
-        command()
-        sys.stdin = stdin
-        sys.stdout = stdout
+    with open(input_file) as file:
+        input_data = file.read()
 
     if INTERPRETERS.get(lang) is not None:
-        run_with_io(lambda: INTERPRETERS[lang].interp(res))
+        output = run_with_io(lambda: INTERPRETERS[lang].interp(res), input_data)
+    elif emulate:
+        output = run_with_io(lambda: interp_x86(res), input_data)
     else:
-        if emulate:
-            run_with_io(lambda: interp_x86(res))
-        else:
-            with open(f'{test_dir}/{test}.s', 'w') as file:
-                file.write(str(res))
-            if os.system(f'gcc runtime.o {test_dir}/{test}.s -o {test_dir}/{test}') != 0:
-                return False
-            
-            os.system(f'{test_dir}/{test} < {input_file} > {output_file}') #type: ignore
+        binary = os.path.join(test_dir, test)
+        with open(binary + '.s', 'w') as file:
+            res.write(file)
+        if subprocess.run(['gcc', runtime_object(), binary + '.s', '-o', binary]).returncode != 0:
+            return False
+        result = run_binary(binary, input_data)
+        if manager is not None:
+            manager.run_result = result
+        output = result['stdout']
+        # killed by a signal, its own or the timeout's
+        if result['status'] < 0:
+            sys.stderr.write(f"{binary}: {'timed out' if result['timed_out'] else 'signal ' + str(-result['status'])}\n")
+            return False
 
-    return os.system('diff --strip-trailing-cr' + ' -b ' + output_file + ' ' + os.path.join(test_dir, test + '.golden')) == 0
+    # kept for inspection
+    with open(output_file, 'w') as file:
+        file.write(output)
+    with open(os.path.join(test_dir, test + '.golden')) as file:
+        return same_output(output, file.read())
 
 
+# a checkout without the example programs has no test directories
 def get_tests(test_dir: str) -> List[str]:
+    if not os.path.isdir(test_dir):
+        return []
     return [f[:-3] for f in os.listdir(test_dir) if f.endswith(".py")]
 
 
@@ -78,17 +107,28 @@ empty: List[Tuple[str, str, TestPassManager]] = []
 test_items: List[Tuple[str, str, TestPassManager]] = sum(
     [get_test_items(manager, test_dir) for manager, test_dir in compiler_test_configs], empty 
 )
+# the managers that run the same source run one after the other, so they share its parse
+test_items.sort(key=lambda item: (item[1], item[0]))
 
 @pytest.mark.parametrize('test, test_dir, manager', test_items)
-def test(test: str, test_dir: str, manager: TestPassManager):
+def test(test: str, test_dir: str, manager: TestPassManager, record_property):
     file_name = os.path.join(test_dir, test + ".py")
     
-    with open(file_name) as source:
-        program = parse(source.read())
-        
+    program = parse_file(file_name)
+
     manager.test = test
     manager.test_dir = test_dir
-    manager.run(program, None) #type: ignore
+    if manager.validation is not None:
+        with open(os.path.join(test_dir, test + ".in")) as input_file:
+            manager.validation.start(program, input_file.read())
+    manager.run_result = None
+    try:
+        manager.run(program, None) #type: ignore
+    finally:
+        # the runtime and the max RSS of the binary, in the JUnit XML report
+        if manager.run_result is not None:
+            for key in ['status', 'timed_out', 'time', 'cpu', 'max_rss']:
+                record_property(key, manager.run_result[key])
             
             
 if __name__ == '__main__':
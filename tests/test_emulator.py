@@ -0,0 +1,54 @@
+import ast
+import json
+import shutil
+import sys
+
+import pytest
+
+from iup.compiler import LwhileAnalyses, LwhileTransforms, PassManager
+from iup.compiler.pass_manager import run_with_io
+from iup.x86.eval_x86 import interp_x86, read_block_counts
+
+# the x86 program of the emulator benchmark, which allocates like the compiled code
+from tests.heap_programs import COUNTERS, emulate, native, program
+
+PROGRAM = '''x = input_int()
+y = x + 3
+if x < 5:
+    print(y + x)
+else:
+    print(x - y)
+'''
+
+
+def compiled(source: str):
+    manager = PassManager(LwhileTransforms, LwhileAnalyses, 'Lwhile')
+    manager.trace = False
+    return manager.run(ast.parse(source), None) #type: ignore
+
+
+# the compiler is imported first, as by main.py
+def test_profile_after_compiling(tmp_path):
+    profile = str(tmp_path / 'profile.json')
+    assert run_with_io(lambda: interp_x86(compiled(PROGRAM), profile), '9\n').split() == ['-3']
+    with open(profile) as file:
+        counts = json.load(file)
+    assert counts['blocks']['start'] == 1 and counts['gc'] == {}
+    assert read_block_counts(profile) == counts['blocks']
+
+
+# small heaps, so that the collector runs and grows the heap
+@pytest.mark.skipif(shutil.which('gcc') is None, reason='needs gcc')
+@pytest.mark.parametrize('iterations, keep, heap', [(500, 1, 64), (2000, 3, 256), (3000, 50, 1024)])
+def test_heap_counters_of_runtime_c(tmp_path, iterations, keep, heap):
+    prog = program(iterations, keep, heap)
+    # the emulator follows each jump with a recursive call
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(limit, 20 * iterations + 1000))
+    try:
+        output, _, counters = emulate(prog)
+    finally:
+        sys.setrecursionlimit(limit)
+    native_output, _, native_counters = native(prog, str(tmp_path))
+    assert output == native_output
+    assert {key: counters[key] for key in COUNTERS} == native_counters and counters['collections'] > 0
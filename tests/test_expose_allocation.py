@@ -0,0 +1,41 @@
+import ast
+
+from iup.compiler import ExposeAllocationPass, PassManager
+from iup.compiler.compiler import heap_check_bytes
+from iup.compiler.pass_manager import run_with_io
+from iup.interp.interp_Ltup import InterpLtup
+from iup.utils import IntType, TupleType
+
+# ten pairs of 24 bytes in one straight-line run
+PROGRAM = '\n'.join([f'p{i} = (input_int(), {i})' for i in range(10)] +
+                    ['print(' + ' + '.join(f'p{i}[1]' for i in range(10)) + ' + p9[0])']) + '\n'
+
+
+def exposed(coalesced_bytes: int) -> ast.Module:
+    prog = ast.parse(PROGRAM)
+    for node in ast.walk(prog):
+        if isinstance(node, ast.Tuple):
+            node.has_type = TupleType([IntType() for _ in node.elts]) #type: ignore
+    expose = ExposeAllocationPass()
+    expose.coalesced_bytes = coalesced_bytes
+    manager = PassManager([expose], [])
+    manager.trace = False
+    return manager.run(prog, None) #type: ignore
+
+
+def checks(prog: ast.Module) -> list:
+    return [heap_check_bytes(s) for s in prog.body if heap_check_bytes(s) is not None]
+
+
+def test_one_check_for_a_run():
+    prog = exposed(16384)
+    assert checks(prog) == [240]
+    assert run_with_io(lambda: InterpLtup().interp(prog), '\n'.join(['3'] * 10) + '\n') == '48'
+
+
+def test_long_runs_are_split_at_the_bound():
+    prog = exposed(100)
+    assert checks(prog) == [96, 96, 48]
+    assert run_with_io(lambda: InterpLtup().interp(prog), '\n'.join(['3'] * 10) + '\n') == '48'
+    # a tuple bigger than the bound still gets its check
+    assert checks(exposed(16)) == [24] * 10
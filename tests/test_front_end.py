@@ -0,0 +1,76 @@
+import ast
+import io
+import sys
+
+from iup.compiler import ExplicateControlPass, FrontEndPass, PassManager, RCOPass, ShrinkPass
+from iup.interp import INTERPRETERS
+from iup.compiler.pass_manager import run_with_io
+from iup.utils import CProgram, Goto
+
+# shrink only lowers the `and` and `or` at the top of a test
+PROGRAM = '''a = input_int()
+b = 1 + (a if a < 3 else -a)
+if a < 2 or b < a and a < 9:
+    print(b + (a - (b + 1)))
+else:
+    print(-(a + 2) if b < 0 else a + b)
+'''
+
+
+def lower(transforms, prog: ast.Module):
+    manager = PassManager(transforms, [], 'Lwhile')
+    manager.trace = False
+    return manager.run(prog, None) #type: ignore
+
+
+def test_same_program_as_the_separate_passes():
+    fused = lower([FrontEndPass()], ast.parse(PROGRAM))
+    assert str(fused) == str(lower([ShrinkPass(), RCOPass(), ExplicateControlPass()], ast.parse(PROGRAM)))
+    assert run_with_io(lambda: INTERPRETERS['Cwhile'].interp(fused), '4\n').split() == ['3']
+
+
+# deeper than the recursion limit: a sum of `depth` operands, and a test of `depth` conjunctions
+def test_deep_expressions():
+    depth = sys.getrecursionlimit() * 2
+    total: ast.expr = ast.Name('a')
+    test: ast.expr = ast.Compare(ast.Name('a'), [ast.Lt()], [ast.Constant(0)])
+    for i in range(depth):
+        total = ast.BinOp(total, ast.Add(), ast.Constant(1))
+        test = ast.BoolOp(ast.And(), [ast.Compare(ast.Name('a'), [ast.Lt()], [ast.Constant(i + 1)]), test])
+    prog = ast.Module([
+        ast.Assign([ast.Name('a')], ast.Call(ast.Name('input_int'), [], [])),
+        ast.Assign([ast.Name('b')], total),
+        ast.If(test, [ast.Expr(ast.Call(ast.Name('print'), [ast.Name('b')], []))], [])], [])
+    for i, s in enumerate(prog.body):
+        s.lineno = i + 1
+
+    blocks = lower([FrontEndPass()], prog).body #type: ignore
+    start = blocks['start']
+    # a temporary for every operand but the last, which b is assigned
+    assert len([s for s in start if isinstance(s, ast.Assign)]) == depth + 1
+    # a block for each conjunction that is true
+    assert len(blocks) == depth + 3
+
+
+# records every write, as a file would receive them
+class Writes(io.StringIO):
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.writes: list[str] = []
+
+    def write(self, s: str) -> int:
+        self.writes.append(s)
+        return super().write(s)
+
+
+def test_write_streams_compound_statements():
+    inner = ast.If(ast.Name('b'), [Goto('block_1')], [ast.Expr(ast.Call(ast.Name('print'), [ast.Name('a')], []))])
+    loop = ast.While(ast.Name('a'), [ast.Assign([ast.Name('a')], ast.Name('b')), inner], [])
+    prog = CProgram({'start': [loop, ast.If(ast.Name('a'), [Goto('block_1')], [Goto('block_2')])],
+                     'block_1': [ast.Return(ast.Constant(0))]})
+    out = Writes()
+    prog.write(out)
+    assert all(w.count('\n') <= 1 for w in out.writes)
+    expected = ''.join(label + ':\n' + str(ast.Module(ss, [])) + '\n' for label, ss in prog.body.items())
+    assert out.getvalue() == expected == str(prog)
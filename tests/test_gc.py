@@ -0,0 +1,44 @@
+import shutil
+
+import pytest
+
+from tests.heap_programs import build_mutator, run_mutator
+
+pytestmark = pytest.mark.skipif(shutil.which('gcc') is None, reason='needs gcc')
+
+
+# the sum the mutator prints: the ring is built from its head, and the cursor starts at its
+# last cell and stores the step in a cell every 16 steps
+def expected_sum(live: int, steps: int) -> int:
+    ring = list(reversed(range(live)))
+    cursor = live - 1
+    for i in range(0, steps, 16):
+        ring[cursor] = i
+        cursor = cursor + 1 if cursor + 1 < live else 0
+    return sum(ring)
+
+
+@pytest.fixture(scope='module')
+def mutator(tmp_path_factory):
+    return build_mutator(str(tmp_path_factory.mktemp('gc')), ['-g', '-std=c99'])
+
+
+@pytest.mark.parametrize('live, steps, heap', [(500, 50000, 1024), (3000, 100000, 4096)])
+def test_both_collectors_keep_the_ring(mutator, live, steps, heap):
+    semispace_out, semispace = run_mutator(mutator, live, steps, heap, 'semispace')
+    generational_out, generational = run_mutator(mutator, live, steps, heap, 'generational')
+    assert semispace_out == generational_out == str(expected_sum(live, steps))
+
+    assert semispace['collector'] == 'semispace'
+    assert int(semispace['collections']) > 0 and int(semispace['major_collections']) == 0
+    assert int(semispace['remembered_writes']) == 0
+
+    assert generational['collector'] == 'generational'
+    assert int(generational['collections']) > int(semispace['collections'])
+    # the old generation filled up, and was collected with the nursery
+    assert int(generational['major_collections']) > 0
+    # the cells of the ring are old when the mutator stores young tuples in them
+    assert int(generational['remembered_writes']) > 0
+    # the live ring does not fit in the initial heap
+    assert int(semispace['heap_growths']) > 0 and int(generational['heap_growths']) > 0
+    assert semispace['bytes_allocated'] == generational['bytes_allocated']
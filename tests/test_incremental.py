@@ -0,0 +1,61 @@
+import ast
+import re
+
+import pytest
+
+from iup.type import TYPE_CHECKERS, IncrementalTypeChecker
+
+PROGRAM = '''a = input_int()
+b = a + 1
+c = a < b
+while a < 10:
+    a = a + b
+if c:
+    print(a)
+else:
+    print(b)
+d = -b
+print(d)
+'''
+
+checker = TYPE_CHECKERS['Lwhile']
+
+
+# the types the checker gives the top-level variables when it checks the whole module
+def full(source: str) -> dict:
+    body = ast.parse(source).body
+    env = checker.module_env(body) #type: ignore
+    checker.type_check_stmts(body, env) #type: ignore
+    return env
+
+
+def test_edits_give_the_types_of_a_full_check():
+    incremental = IncrementalTypeChecker(checker)
+    assert incremental.type_check(ast.parse(PROGRAM)) == full(PROGRAM)
+    assert incremental.checked == len(ast.parse(PROGRAM).body)
+    for old, new in [('d = -b', 'd = b < a'), ('b = a + 1', 'b = a < 1'), ('b = a + 1', 'b = a + 2'),
+                     ('print(d)', 'print(d + a)')]:
+        source = PROGRAM.replace(old, new)
+        try:
+            expected = full(source)
+        except Exception as e:
+            with pytest.raises(Exception, match=re.escape(str(e))):
+                incremental.type_check(ast.parse(source))
+            continue
+        assert incremental.type_check(ast.parse(source)) == expected
+
+
+def test_only_what_an_edit_affects_is_checked_again():
+    incremental = IncrementalTypeChecker(checker)
+    incremental.type_check(ast.parse(PROGRAM))
+    # d is still an int: only its statement is checked again
+    incremental.type_check(ast.parse(PROGRAM.replace('d = -b', 'd = b + b')))
+    assert (incremental.checked, incremental.reused) == (1, 6)
+    # c is a bool whatever b is
+    incremental.type_check(ast.parse(PROGRAM.replace('b = a + 1', 'b = a + 2')))
+    assert incremental.checked == 2
+    # an error is reported, and fixing it checks again from the error on
+    with pytest.raises(Exception):
+        incremental.type_check(ast.parse(PROGRAM.replace('print(d)', 'print(c)')))
+    incremental.type_check(ast.parse(PROGRAM.replace('print(d)', 'print(d - a)')))
+    assert (incremental.checked, incremental.reused) == (1, 6)
@@ -0,0 +1,51 @@
+import json
+import os
+import subprocess
+import sys
+
+import iup
+
+SRC = os.path.dirname(os.path.dirname(os.path.abspath(iup.__file__)))
+
+
+# in a fresh process, since the other tests have imported the compiler already
+def run_python(code):
+    env = dict(os.environ, PYTHONPATH=SRC)
+    res = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True, check=True)
+    return json.loads(res.stdout)
+
+
+def test_import_iup_leaves_the_compiler_unloaded():
+    loaded = run_python('''
+import json, sys
+import iup
+print(json.dumps({name: name in sys.modules for name in ['iup.compiler', 'iup.interp', 'iup.type', 'iup.x86.eval_x86', 'lark']}))
+''')
+    assert loaded == {'iup.compiler': False, 'iup.interp': False, 'iup.type': False,
+                      'iup.x86.eval_x86': False, 'lark': False}
+
+
+def test_lazy_names_resolve():
+    resolved = run_python('''
+import importlib, json
+import iup
+names = {}
+for name, module in iup.lazy_names.items():
+    value = getattr(iup, name)
+    names[name] = value is getattr(importlib.import_module(module), name) and vars(iup)[name] is value
+print(json.dumps(names))
+''')
+    assert resolved == {name: True for name in iup.lazy_names}
+
+
+def test_unknown_name_raises_attribute_error():
+    missing = run_python('''
+import json
+import iup
+try:
+    iup.no_such_name
+    print(json.dumps(None))
+except AttributeError as e:
+    print(json.dumps([str(e), hasattr(iup, 'no_such_name')]))
+''')
+    assert missing == ["module 'iup' has no attribute 'no_such_name'", False]
@@ -0,0 +1,96 @@
+import ast
+
+import pytest
+
+from iup.interp.interp_Lcast import CastFunction, InterpLcast
+from iup.interp.interp_Ldyn import Tagged
+from iup.interp.interp_Lfun import Function
+from iup.utils import AnyType, BoolType, FunctionType, IntType, ListType, ProxiedList, ProxiedTuple, TupleType
+
+PAIR = TupleType([IntType(), IntType()])
+ANY_PAIR = TupleType([AnyType(), AnyType()])
+
+
+def test_identity_casts_return_the_value():
+    interp = InterpLcast()
+    tup = [1, 2]
+    assert interp.apply_cast(tup, PAIR, PAIR) is tup
+    # t => Any => t
+    tagged = interp.apply_cast(tup, PAIR, AnyType())
+    assert isinstance(tagged, Tagged) and isinstance(tagged.value, ProxiedTuple)
+    assert interp.apply_cast(tagged, AnyType(), PAIR) is tup
+    assert interp.collapse([IntType(), AnyType(), IntType(), IntType()]) == [IntType()]
+
+
+def test_casts_of_a_proxied_tuple_are_composed():
+    interp = InterpLcast()
+    tup = [1, 2]
+    proxy = interp.apply_cast(tup, PAIR, ANY_PAIR)
+    back = interp.apply_cast(proxy, ANY_PAIR, TupleType([IntType(), AnyType()]))
+    # one proxy on the tuple, which only injects the second field
+    assert isinstance(back, ProxiedTuple) and back.tup is tup
+    assert interp.interp_getitem(back, 0) == 1
+    assert interp.interp_getitem(back, 1) == Tagged(2, 'int')
+
+
+def test_alternating_casts_of_a_list_stay_bounded():
+    interp = InterpLcast()
+    first = ListType(TupleType([IntType(), AnyType()]))
+    second = ListType(TupleType([AnyType(), BoolType()]))
+    lst = [[1, Tagged(True, 'bool')]]
+    value = lst
+    for _ in range(50):
+        value = interp.apply_cast(value, first, second)
+        value = interp.apply_cast(value, second, first)
+    value = interp.apply_cast(value, first, second)
+    assert isinstance(value, ProxiedList) and value.tup is lst
+    # the meet of the two element types is tuple[int,bool]
+    assert len(interp.proxy_chains[id(value.read)]) == 3
+    elt = interp.interp_getitem(value, 0)
+    assert interp.interp_getitem(elt, 0) == Tagged(1, 'int')
+    assert interp.interp_getitem(elt, 1) is True
+
+
+def test_casts_of_a_cast_function_are_composed():
+    interp = InterpLcast()
+    x = 'x'
+    identity = Function('f', [x], [ast.Return(ast.Name(x))], {})
+    any_fun = FunctionType([AnyType()], AnyType())
+    int_fun = FunctionType([IntType()], IntType())
+    fun = identity
+    for _ in range(20):
+        fun = interp.apply_cast(fun, any_fun, int_fun)
+        fun = interp.apply_cast(fun, int_fun, any_fun)
+    fun = interp.apply_cast(fun, any_fun, int_fun)
+    assert isinstance(fun, CastFunction) and fun.fun is identity
+    assert fun.param_chains == [[AnyType(), IntType()]] and fun.ret_chain == [AnyType(), IntType()]
+    assert interp.apply_fun(fun, [3], None) == 3
+    # a function of typed parameters is itself after int => any => int
+    assert interp.apply_cast(interp.apply_cast(identity, int_fun, any_fun), any_fun, int_fun) is identity
+
+
+def test_cast_functions_are_reused():
+    interp = InterpLcast()
+    first = interp.apply_cast([1, 2], PAIR, ANY_PAIR)
+    second = interp.apply_cast([3, 4], PAIR, ANY_PAIR)
+    assert first.reads is second.reads
+    lists = [interp.apply_cast([i], ListType(IntType()), ListType(AnyType())) for i in range(2)]
+    assert lists[0].read is lists[1].read and lists[0].write is lists[1].write
+
+
+def test_a_failing_projection_still_raises():
+    interp = InterpLcast()
+    with pytest.raises(Exception, match='apply_project'):
+        interp.apply_cast(Tagged(True, 'bool'), AnyType(), IntType())
+    # the field is only checked when it is read
+    proxy = interp.apply_cast([Tagged(True, 'bool')], TupleType([AnyType()]), TupleType([IntType()]))
+    with pytest.raises(Exception, match='apply_project'):
+        interp.interp_getitem(proxy, 0)
+    # int => any => bool has no meet, and is kept
+    one = TupleType([IntType()])
+    proxy = interp.apply_cast([1], one, TupleType([AnyType()]))
+    for _ in range(3):
+        proxy = interp.apply_cast(proxy, TupleType([AnyType()]), TupleType([BoolType()]))
+        proxy = interp.apply_cast(proxy, TupleType([BoolType()]), TupleType([AnyType()]))
+    with pytest.raises(Exception, match='apply_project'):
+        interp.interp_getitem(proxy, 0)
@@ -0,0 +1,98 @@
+import ast
+
+import pytest
+
+from iup.compiler.pass_manager import run_with_io
+from iup.interp.interp_Ldyn import InterpLdyn, Tagged, small_int_max, small_int_min, small_ints, tagged_false, tagged_none, tagged_true
+from iup.interp.interp_Lfun import Function
+from iup.interp.interp_Llambda import InterpLlambda
+from iup.utils import TrappedError
+
+# functions, tuples, booleans and integers on both sides of the shared range
+PROGRAM = '''
+def add(x, y):
+    return x + y
+
+i = 0
+s = 0
+while i < 40:
+    s = add(s, i)
+    i = i + 1
+t = (s, -200, 3 == 3, not True)
+if t[2] and (t[3] or t[1] < 0):
+    print(t[0])
+else:
+    print(0)
+print(t[1] - 2000)
+print(len(t))
+'''
+
+
+def run(source, interp=None):
+    interp = interp or InterpLdyn()
+    return run_with_io(lambda: interp.interp(ast.parse(source)), '')
+
+
+def test_small_integers_are_shared():
+    interp = InterpLdyn()
+    for n in [small_int_min, -1, 0, 1, 42, small_int_max - 1]:
+        tagged = interp.tag(n)
+        assert tagged is small_ints[n - small_int_min]
+        assert tagged is interp.tag(n)
+        assert tagged == Tagged(n, 'int')
+    for n in [small_int_min - 1, small_int_max, 10 ** 6, -10 ** 6]:
+        tagged = interp.tag(n)
+        assert tagged == Tagged(n, 'int')
+        assert tagged is not interp.tag(n)
+
+
+def test_booleans_and_none_are_shared():
+    interp = InterpLdyn()
+    assert interp.tag(True) is tagged_true and tagged_true == Tagged(True, 'bool')
+    assert interp.tag(False) is tagged_false and tagged_false == Tagged(False, 'bool')
+    assert interp.tag(None) is tagged_none and tagged_none == Tagged(None, 'none')
+    # bool is a subclass of int, but True is not the shared 1
+    assert interp.tag(True) != interp.tag(1)
+    assert interp.tag(0) is not tagged_false
+
+
+def test_tagged_equality():
+    assert Tagged(5, 'int') == Tagged(5, 'int')
+    assert Tagged(5, 'int') != Tagged(6, 'int')
+    assert Tagged(1, 'int') != Tagged(True, 'bool')
+    assert Tagged([1, 2], 'tuple') == Tagged([1, 2], 'tuple')
+    assert Tagged(5, 'int') != 5
+    assert Tagged(5, 'int').__match_args__ == ('value', 'tag')
+    match Tagged(5, 'int'):
+        case Tagged(value, 'int'):
+            assert value == 5
+    assert str(Tagged(5, 'int')) == '5'
+    assert repr(Tagged(5, 'int')) == "Tagged(value=5, tag='int')"
+    with pytest.raises(TypeError):
+        hash(Tagged(5, 'int'))
+    with pytest.raises(AttributeError):
+        Tagged(5, 'int').other = 1
+
+
+def test_tag_of_functions_and_tuples():
+    interp = InterpLdyn()
+    tup = [tagged_true]
+    assert interp.tag(tup) == Tagged(tup, 'tuple') and interp.tag(tup).value is tup
+    fun = Function('f', [], [], {})
+    assert interp.tag(fun).tag == 'function'
+    with pytest.raises(Exception):
+        interp.tag('string')
+
+
+def test_program():
+    # the same output as the untagged interpreter
+    assert run(PROGRAM) == run(PROGRAM, InterpLlambda()) == '780-22004'
+
+
+def test_tag_mismatch_traps():
+    with pytest.raises(TrappedError):
+        run('print(1 + True)')
+    with pytest.raises(TrappedError):
+        run('if 1:\n    print(1)\n')
+    with pytest.raises(TrappedError):
+        run('x = 3\nprint(x[0])')
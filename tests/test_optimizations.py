@@ -0,0 +1,42 @@
+import ast
+
+from iup.compiler import CopyPropagationPass, ExplicateControlPass, PartialEvalPass, PassManager, RCOPass, ShrinkPass
+from iup.compiler.pass_manager import run_with_io
+from iup.interp import INTERPRETERS
+
+PROGRAM = '''a = input_int()
+b = a
+c = 2 + 3 - -1
+d = b + c
+e = a
+if c < 4:
+    print(a)
+else:
+    print(d + e)
+print(b)
+'''
+
+FRONT = [PartialEvalPass(), ShrinkPass(), RCOPass(), ExplicateControlPass()]
+
+
+def lower(transforms):
+    manager = PassManager(transforms, [], 'Lwhile')
+    manager.trace = False
+    return manager.run(ast.parse(PROGRAM), None) #type: ignore
+
+
+def test_partial_eval_folds_constants():
+    prog = lower([PartialEvalPass()])
+    assert str(prog.body[2]).strip() == 'c = 6'
+    assert str(prog.body[3]).strip() == 'd = (b + c)'
+    assert run_with_io(lambda: INTERPRETERS['Lwhile'].interp(prog), '5\n') == '165'
+
+
+def test_copy_propagation_inside_a_block():
+    prog = lower(FRONT + [CopyPropagationPass()])
+    # c is folded into d and the test, b and e stay for the blocks that print them
+    assert [str(s).strip() for s in prog.body['start']] == \
+        ['a = input_int()', 'b = a', 'd = (a + 6)', 'e = a', 'goto ' + prog.body['start'][-1].label]
+    for input in ['5\n', '-7\n']:
+        expected = run_with_io(lambda: INTERPRETERS['Cwhile'].interp(lower(FRONT)), input)
+        assert run_with_io(lambda: INTERPRETERS['Cwhile'].interp(prog), input) == expected
@@ -0,0 +1,85 @@
+import ast
+
+from iup import parse_cache
+from iup.compiler import LwhileAnalyses, LwhileFusedTransforms, LwhileTransforms, PassManager
+from iup.parse_cache import parse_file
+from iup.type.type_check_Llambda import TypeCheckLlambda
+from iup.type.type_check_Ltup import TypeCheckLtup
+
+PROGRAM = '''x = input_int()
+y = x + 3 - input_int()
+if x < y or y < 0:
+    print(y + (x - 2))
+else:
+    print(-x)
+'''
+
+TUPLES = '''t = (1, (2, True))
+x = t[1]
+if x[1]:
+    print(t[0] + x[0])
+else:
+    print(0)
+'''
+
+
+def test_the_same_content_is_parsed_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(parse_cache, 'parsed', {})
+    first, second, other = tmp_path / 'first.py', tmp_path / 'second.py', tmp_path / 'other.py'
+    first.write_text(PROGRAM)
+    second.write_text(PROGRAM)
+    other.write_text('print(1)\n')
+    prog = parse_file(str(first))
+    assert parse_file(str(second)) is prog
+    assert parse_file(str(other)) is not prog
+    first.write_text(PROGRAM + 'print(x)\n')
+    assert parse_file(str(first)) is not prog
+
+
+def test_only_the_last_modules_are_kept(tmp_path, monkeypatch):
+    monkeypatch.setattr(parse_cache, 'parsed', {})
+    paths = []
+    for i in range(parse_cache.capacity + 1):
+        paths.append(tmp_path / f'{i}.py')
+        paths[-1].write_text(f'print({i})\n')
+    progs = [parse_file(str(path)) for path in paths[:-1]]
+    # the first module is used again, so the second is the oldest
+    assert parse_file(str(paths[0])) is progs[0]
+    parse_file(str(paths[-1]))
+    assert parse_file(str(paths[0])) is progs[0]
+    assert parse_file(str(paths[1])) is not progs[1]
+
+
+def test_compiling_leaves_the_shared_module_unchanged(tmp_path, monkeypatch):
+    monkeypatch.setattr(parse_cache, 'parsed', {})
+    path = tmp_path / 'prog.py'
+    path.write_text(PROGRAM)
+    prog = parse_file(str(path))
+    before = ast.dump(prog, include_attributes=True)
+    results = []
+    for transforms in [LwhileTransforms, LwhileFusedTransforms]:
+        manager = PassManager(transforms, LwhileAnalyses, 'Lwhile')
+        manager.trace = False
+        results.append(str(manager.run(parse_file(str(path)), None)))
+        assert ast.dump(prog, include_attributes=True) == before
+    assert results[0] != ''
+
+
+def annotations(prog):
+    return [(ast.dump(node), node.has_type) for node in ast.walk(prog) if hasattr(node, 'has_type')]
+
+
+def test_type_checking_the_shared_module_again_is_idempotent(tmp_path, monkeypatch):
+    monkeypatch.setattr(parse_cache, 'parsed', {})
+    path = tmp_path / 'prog.py'
+    path.write_text(TUPLES)
+    prog = parse_file(str(path))
+    before = ast.dump(prog, include_attributes=True)
+    for checker in [TypeCheckLtup, TypeCheckLlambda]:
+        checker().type_check(parse_file(str(path)))
+        first = annotations(prog)
+        assert first != []
+        checker().type_check(parse_file(str(path)))
+        assert annotations(prog) == first
+        # the annotations are the only change
+        assert ast.dump(prog, include_attributes=True) == before
@@ -0,0 +1,85 @@
+import ast
+import io
+import threading
+
+from iup.compiler import (ExplicateControlPass, LwhileAnalyses, LwhileFusedTransforms, NameSupply, PartialEvalPass,
+                          PassManager, RCOPass, ShrinkPass)
+
+FIRST = '''x = input_int()
+y = x + 3 - input_int()
+if x < y:
+    print(y + (x - 2))
+else:
+    print(x - (y + 4))
+'''
+
+SECOND = '''a = input_int()
+b = -a + (a - 1)
+c = a + b + 7
+print(c - (b - (a + 1)))
+print(a + c)
+'''
+
+
+def assembly(manager: PassManager, source: str) -> str:
+    out = io.StringIO()
+    manager.run(ast.parse(source), None).write(out) #type: ignore
+    return out.getvalue()
+
+
+def test_name_supply_counts_per_prefix_and_line():
+    names = NameSupply()
+    assert [names.fresh('_t', 3), names.fresh('_t', 3), names.fresh('_t', 4), names.fresh('block_', 3)] == \
+        ['_t3_0', '_t3_1', '_t4_0', 'block_3_0']
+    assert NameSupply().fresh('_t', 3) == '_t3_0'
+
+
+def test_names_do_not_depend_on_earlier_compilations():
+    manager = PassManager(LwhileFusedTransforms, LwhileAnalyses, 'Lwhile')
+    manager.trace = False
+    first = assembly(manager, FIRST)
+    assembly(manager, SECOND)
+    assert assembly(manager, FIRST) == first
+
+
+# waits for the other thread before each statement, so the two compilations alternate
+class InterleavedRCOPass(RCOPass):
+
+    def __init__(self, barrier: threading.Barrier) -> None:
+        self.barrier = barrier
+
+    def rco_stmt(self, s, ctx):
+        self.barrier.wait()
+        return super().rco_stmt(s, ctx)
+
+
+def test_interleaved_compilations_with_one_manager():
+    # the temporaries of remove_complex_operands and the labels are only seen before select_instructions
+    def front(rco: RCOPass) -> PassManager:
+        manager = PassManager([PartialEvalPass(), ShrinkPass(), rco, ExplicateControlPass()], [], 'Lwhile')
+        manager.trace = False
+        return manager
+
+    alone = front(RCOPass())
+    expected = [str(alone.run(ast.parse(source), None)) for source in [FIRST, SECOND]] #type: ignore
+
+    # both programs have five statements for remove_complex_operands, branches included
+    barrier = threading.Barrier(2, timeout=10)
+    shared = front(InterleavedRCOPass(barrier))
+    results = [None, None]
+    errors = []
+
+    def compile(i: int, source: str) -> None:
+        try:
+            results[i] = str(shared.run(ast.parse(source), None)) #type: ignore
+        except Exception as e:
+            barrier.abort()
+            errors.append(e)
+
+    threads = [threading.Thread(target=compile, args=(i, source)) for i, source in enumerate([FIRST, SECOND])]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert results == expected
@@ -0,0 +1,94 @@
+import ast
+import io
+import os
+import subprocess
+import sys
+
+import iup
+from iup.compiler import AllocateRegPass, LwhileAnalyses, LwhileTransforms, PassManager
+from iup.compiler.pass_manager import run_with_io
+from iup.x86.eval_x86 import interp_x86
+import iup.x86.x86_ast as x86
+
+# more variables than registers, live across a branch
+PROGRAM = '\n'.join(
+    ['a = input_int()', 'b = input_int()'] +
+    [f'v{i} = a + {i}' if i % 3 == 0 else f'v{i} = v{i - 1} + b' for i in range(40)] +
+    ['if a < b:',
+     '    print(' + ' + '.join(f'v{i}' for i in range(0, 40, 2)) + ')',
+     'else:',
+     '    print(v39 - v1)']) + '\n'
+
+# objects allocated before the compilation move the operands of the allocator in memory
+COMPILE = '''
+import ast, sys
+padding = [object() for _ in range(int(sys.argv[1]))]
+from iup.compiler import LwhileManager
+LwhileManager.trace = False
+LwhileManager.run(ast.parse(sys.stdin.read()), None).write(sys.stdout)
+'''
+
+
+def compile_in_subprocess(padding: int) -> str:
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(os.path.abspath(iup.__file__))))
+    res = subprocess.run([sys.executable, '-c', COMPILE, str(padding)], input=PROGRAM, env=env,
+                         capture_output=True, text=True, check=True)
+    return res.stdout
+
+
+def test_same_assembly_in_two_processes():
+    first = compile_in_subprocess(3)
+    assert first != ''
+    assert compile_in_subprocess(500) == first
+
+    manager = PassManager(LwhileTransforms, LwhileAnalyses, 'Lwhile')
+    manager.trace = False
+    out = io.StringIO()
+    manager.run(ast.parse(PROGRAM), None).write(out) #type: ignore
+    assert out.getvalue() == first
+
+
+# sixteen variables live at the branch: the last ones are spilled, and only the cold
+# branch uses them. The hot block stands for a loop body, which the liveness analysis
+# cannot compile yet.
+BRANCHES = '\n'.join(
+    ['a = input_int()'] + [f'v{i} = a + {i}' for i in range(16)] +
+    ['if a < 5:',
+     '    print(' + ' + '.join(f'v{i}' for i in range(16)) + ')',
+     'else:',
+     '    print(v15 - v14)']) + '\n'
+
+
+# checks that the coloring is still valid once the hot variables got registers
+class CheckedAllocateRegPass(AllocateRegPass):
+
+    def prefer_hot(self, graph, colors, spilled, weights):
+        super().prefer_hot(graph, colors, spilled, weights)
+        for v, c in colors.items():
+            if isinstance(v, x86.Variable):
+                assert all(colors.get(u) != c for u in graph.out[v] if u != v)
+                assert (v in spilled) == (c >= 11)
+
+
+def compile_branches(block_counts):
+    transforms = [CheckedAllocateRegPass() if isinstance(p, AllocateRegPass) else p for p in LwhileTransforms]
+    manager = PassManager(transforms, LwhileAnalyses, 'Lwhile')
+    manager.trace = False
+    manager.block_counts = block_counts
+    return manager.run(ast.parse(BRANCHES), None) #type: ignore
+
+
+def test_hot_variables_get_registers():
+    plain = compile_branches(None)
+    cold = next(lb for lb, ss in plain.body.items() #type: ignore
+                if any(isinstance(i, x86.Instr) and i.instr == 'subq' for i in ss))
+    assert any(isinstance(a, x86.Deref) for i in plain.body[cold] for a in getattr(i, 'args', ())) #type: ignore
+
+    counts = {lb: 1 for lb in plain.body} #type: ignore
+    counts[cold] = 1000
+    hot = compile_branches(counts)
+    assert all(isinstance(a, (x86.Reg, x86.Immediate)) for i in hot.body[cold] for a in getattr(i, 'args', ())) #type: ignore
+    # main first, then from the hottest block
+    assert list(hot.body)[:2] == ['main', cold] #type: ignore
+    for input in ['3\n', '7\n']:
+        assert run_with_io(lambda: interp_x86(hot), input) == run_with_io(lambda: interp_x86(plain), input)
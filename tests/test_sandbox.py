@@ -0,0 +1,51 @@
+import shutil
+import signal
+import subprocess
+
+import pytest
+
+from iup.sandbox import run_binary, run_binaries
+
+pytestmark = pytest.mark.skipif(shutil.which('gcc') is None, reason='needs gcc')
+
+ECHO = '''#include <stdio.h>
+int main(void) { long x; scanf("%ld", &x); printf("%ld\\n", x + 1); return x > 10; }
+'''
+
+SLEEP = '''#include <unistd.h>
+int main(void) { sleep(30); return 0; }
+'''
+
+SPIN = '''int main(void) { volatile unsigned long n = 0; for (;;) n++; }
+'''
+
+
+def build(tmp_path, name, source):
+    path = tmp_path / (name + '.c')
+    path.write_text(source)
+    subprocess.run(['gcc', str(path), '-o', str(tmp_path / name)], check=True)
+    return str(tmp_path / name)
+
+
+def test_output_status_and_usage(tmp_path):
+    echo = build(tmp_path, 'echo', ECHO)
+    result = run_binary(echo, '4\n')
+    assert (result['status'], result['stdout'], result['timed_out']) == (0, '5\n', False)
+    assert result['cpu'] is not None and result['max_rss'] > 0
+    assert [r['status'] for r in run_binaries([(echo, '4\n'), (echo, '11\n'), (echo, '7\n')], 2)] == [0, 1, 0]
+
+
+def test_timeout_kills_the_binary(tmp_path):
+    result = run_binary(build(tmp_path, 'sleep', SLEEP), timeout=0.5)
+    assert result['timed_out']
+    assert result['status'] == -signal.SIGKILL
+    assert result['time'] < 5000
+    # the launcher was killed with the binary, so nothing reported the usage
+    assert result['cpu'] is None and result['max_rss'] is None
+
+
+def test_cpu_limit_sends_sigxcpu(tmp_path):
+    result = run_binary(build(tmp_path, 'spin', SPIN), cpu_seconds=1, timeout=20)
+    assert not result['timed_out']
+    assert result['status'] == -signal.SIGXCPU
+    assert result['cpu'] >= 900
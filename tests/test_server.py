@@ -0,0 +1,70 @@
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import time
+
+import pytest
+
+import iup
+from iup.server import request
+
+pytestmark = pytest.mark.skipif(shutil.which('gcc') is None, reason='needs gcc')
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(iup.__file__))))
+
+PROGRAM = '''x = input_int()
+y = x + 3
+print(y - 1)
+'''
+
+
+@pytest.fixture(scope='module')
+def server(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('server') / 'iup.sock')
+    env = dict(os.environ, PYTHONPATH=os.path.join(ROOT, 'src'))
+    process = subprocess.Popen([sys.executable, os.path.join(ROOT, 'main.py'), '--serve', path, '--workers', '1'],
+                               env=env, stderr=subprocess.PIPE, text=True)
+    deadline = time.monotonic() + 60
+    while not os.path.exists(path):
+        assert process.poll() is None, process.stderr.read() #type: ignore
+        assert time.monotonic() < deadline, 'the server did not start'
+        time.sleep(0.05)
+    yield path
+    process.send_signal(signal.SIGINT)
+    process.wait(30)
+    assert not os.path.exists(path)
+
+
+def test_compile_and_run(server, tmp_path):
+    source = tmp_path / 'prog.py'
+    source.write_text(PROGRAM)
+    target = str(tmp_path / 'prog')
+    res = request(server, str(source), target, ['all'])
+    assert (res['status'], res['error']) == (0, None)
+    assert subprocess.run([target], input='4\n', capture_output=True, text=True).stdout.split() == ['6']
+
+
+def test_emulate(server, tmp_path):
+    source = tmp_path / 'prog.py'
+    source.write_text(PROGRAM)
+    res = request(server, str(source), str(tmp_path / 'prog'), ['all'], emulate=True, input_data='9\n')
+    # the output of the emulated program follows the trace of the passes
+    assert (res['status'], res['output'].split()[-1]) == (0, '11')
+    assert not os.path.exists(tmp_path / 'prog.s')
+
+
+def test_a_missing_source(server, tmp_path):
+    res = request(server, str(tmp_path / 'missing.py'), str(tmp_path / 'missing'), ['all'])
+    assert res['status'] == 1 and 'FileNotFoundError' in res['error']
+
+
+def test_a_failed_link(server, tmp_path):
+    source = tmp_path / 'prog.py'
+    source.write_text(PROGRAM)
+    # gcc cannot write the binary over a directory
+    target = tmp_path / 'prog'
+    target.mkdir()
+    res = request(server, str(source), str(target), ['all'])
+    assert res['status'] == 1 and 'could not link' in res['error']
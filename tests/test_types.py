@@ -0,0 +1,91 @@
+import copy
+import gc
+import itertools
+import pickle
+import weakref
+from dataclasses import dataclass
+
+import pytest
+
+from iup.type.type_check_Lgeneric import TypeCheckLgeneric
+from iup.type.type_check_Lgrad import TypeCheckLgrad
+from iup.utils import AllType, AnyType, BoolType, FunctionType, GenericVar, IntType, ListType, TupleType, Type
+
+
+# a type with a field that has a default
+@dataclass(eq=False)
+class SizedType(Type):
+    elt: Type
+    size: int = 8
+
+
+def test_a_type_does_not_share_the_list_it_was_made_from():
+    types = [IntType()]
+    t = TupleType(types)
+    types.append(IntType())
+    assert t.types == (IntType(),)
+    assert TupleType([IntType()]) is t
+
+
+def test_keyword_and_default_arguments_give_the_same_type():
+    f = FunctionType([IntType()], IntType())
+    assert FunctionType(param_types=[IntType()], ret_type=IntType()) is f
+    assert FunctionType([IntType()], ret_type=IntType()) is f
+    assert SizedType(IntType()) is SizedType(IntType(), 8) is SizedType(elt=IntType(), size=8)
+    assert SizedType(IntType(), 4) is not SizedType(IntType())
+    with pytest.raises(TypeError):
+        FunctionType([IntType()])
+
+
+def test_copies_are_the_same_type():
+    t = FunctionType([TupleType([IntType()])], IntType())
+    assert pickle.loads(pickle.dumps(t)) is t
+    assert copy.deepcopy(t) is t
+
+
+GRADUAL = [IntType(), BoolType(), AnyType(), TupleType([IntType(), AnyType()]), TupleType([AnyType(), BoolType()]),
+           TupleType([IntType(), BoolType()]), ListType(AnyType()), ListType(IntType()),
+           FunctionType([AnyType()], IntType()), FunctionType([IntType()], AnyType()), FunctionType([BoolType()], IntType())]
+
+
+# the checker without its caches, as it was before them
+def uncached() -> TypeCheckLgrad:
+    checker = TypeCheckLgrad()
+    checker.cached_consistent = checker.consistent_types
+    checker.cached_join = checker.join
+    return checker
+
+
+def test_consistent_and_join_are_cached():
+    checker, plain = TypeCheckLgrad(), uncached()
+    for t1, t2 in itertools.product(GRADUAL, repeat=2):
+        assert checker.consistent(t1, t2) == plain.consistent(t1, t2)
+        if plain.consistent(t1, t2):
+            assert checker.join_types(t1, t2) is plain.join_types(t1, t2)
+    assert checker.join_types(TupleType([IntType(), AnyType()]), TupleType([AnyType(), BoolType()])) is \
+        TupleType([IntType(), BoolType()])
+    hits = checker.cached_consistent.cache_info().hits
+    checker.consistent(FunctionType([AnyType()], IntType()), FunctionType([IntType()], AnyType()))
+    assert checker.cached_consistent.cache_info().hits == hits + 1
+
+
+def test_substitute_is_cached():
+    checker = TypeCheckLgeneric()
+    ty = FunctionType([GenericVar('T')], TupleType([GenericVar('T'), ListType(GenericVar('U'))]))
+    var_map = {'T': BoolType(), 'U': IntType()}
+    assert checker.substitute_type(ty, var_map) is FunctionType([BoolType()], TupleType([BoolType(), ListType(IntType())]))
+    # the parameters of an inner generic type are not substituted
+    inner = AllType(['T'], FunctionType([GenericVar('T')], GenericVar('U')))
+    assert checker.substitute_type(inner, var_map) is AllType(['T'], FunctionType([GenericVar('T')], IntType()))
+    hits = checker.cached_substitute.cache_info().hits
+    assert checker.substitute_type(ty, dict(var_map)) is FunctionType([BoolType()], TupleType([BoolType(), ListType(IntType())]))
+    assert checker.cached_substitute.cache_info().hits == hits + 1
+
+
+def test_the_caches_do_not_keep_their_checker():
+    checker = TypeCheckLgrad()
+    checker.consistent(IntType(), AnyType())
+    ref = weakref.ref(checker)
+    del checker
+    gc.collect()
+    assert ref() is None
@@ -0,0 +1,132 @@
+import ast
+
+import pytest
+
+from iup.compiler import (LwhileAnalyses, LwhileTransforms, PassManager, TransformPass, Validation,
+                          ValidationError)
+import iup.x86.x86_ast as x86
+
+PROGRAM = '''x = input_int()
+y = x + 3
+print(y + 1)
+'''
+
+
+# adds one to every constant the program assigns
+class ConstantsPass(TransformPass):
+    name = 'constants'
+    source = 'Py'
+    target = 'Py'
+
+    def run(self, prog, ctx):
+        prog = ast.parse(ast.unparse(prog))
+        for node in ast.walk(prog):
+            if isinstance(node, ast.Constant) and type(node.value) is int:
+                node.value += 1
+        return prog
+
+
+# adds one to every immediate of the x86 program, where nothing is checked
+class ImmediatesPass(TransformPass):
+    name = 'immediates'
+    source = 'X86'
+    target = 'X86'
+
+    def run(self, prog, ctx):
+        def arg(a):
+            return x86.Immediate(a.value + 1) if isinstance(a, x86.Immediate) else a
+        return x86.X86Program({label: [x86.Instr(i.instr, [arg(a) for a in i.args]) if isinstance(i, x86.Instr) else i
+                                       for i in ss]
+                               for label, ss in prog.body.items()}) #type: ignore
+
+
+def manager(validation, front=[], back=[]):
+    # the shrink pass checks what the passes before it made
+    transforms = front + LwhileTransforms[:-1] + back + LwhileTransforms[-1:]
+    m = PassManager(transforms, LwhileAnalyses, 'Lwhile')
+    m.trace = False
+    m.validation = validation
+    return m
+
+
+def test_every_accepts_a_correct_compilation():
+    manager(Validation(mode='every')).run_validated(ast.parse(PROGRAM), '4\n')
+
+
+def test_every_names_the_first_wrong_pass():
+    validation = Validation(passes=['constants', 'shrink'], mode='every')
+    with pytest.raises(ValidationError, match='after constants'):
+        manager(validation, front=[ConstantsPass()]).run_validated(ast.parse(PROGRAM), '4\n')
+
+
+
+def test_the_source_is_dumped_once_per_program(monkeypatch):
+    dumped = []
+    dump = ast.dump
+
+    def counting_dump(node, *args, **kwargs):
+        dumped.append(node)
+        return dump(node, *args, **kwargs)
+
+    monkeypatch.setattr(ast, 'dump', counting_dump)
+    validation = Validation(mode='every')
+    source = ast.parse(PROGRAM)
+    manager(validation).run_validated(source, '4\n')
+    assert len([trans for trans in LwhileTransforms if trans.name in validation.passes]) > 1
+    assert [node for node in dumped if node is source] == [source]
+    assert validation.key == (dump(source), '4\n')
+    # a sampled-out program is not dumped
+    validation = Validation(mode='sample', period=2)
+    m = manager(validation)
+    m.run_validated(ast.parse(PROGRAM), '4\n')
+    m.run_validated(ast.parse(PROGRAM), '4\n')
+    assert validation.key is None
+
+def test_sample_checks_every_period_th_program():
+    m = manager(Validation(passes=['constants'], mode='sample', period=2), front=[ConstantsPass()])
+    with pytest.raises(ValidationError):
+        m.run_validated(ast.parse(PROGRAM), '4\n')
+    m.run_validated(ast.parse(PROGRAM), '4\n')
+    with pytest.raises(ValidationError):
+        m.run_validated(ast.parse(PROGRAM), '4\n')
+
+
+def test_on_failure_checks_only_a_wrong_result():
+    validation = Validation(passes=['constants'], mode='on_failure')
+    manager(validation).run_validated(ast.parse(PROGRAM), '4\n')
+    with pytest.raises(ValidationError, match='after constants'):
+        manager(validation, front=[ConstantsPass()]).run_validated(ast.parse(PROGRAM), '4\n')
+
+
+def test_on_failure_names_the_unchecked_passes():
+    m = manager(Validation(mode='on_failure'), back=[ImmediatesPass()])
+    with pytest.raises(ValidationError) as error:
+        m.run_validated(ast.parse(PROGRAM), '4\n')
+    message = str(error.value)
+    assert 'right after every checked pass' in message
+    assert 'immediates' in message and 'select_instructions' in message
+    assert 'the run of the X86 program' in message
+    assert 'remove_complex_operands' not in message
+
+
+# builds the interference graph of the program, then gives up
+class FailingPass(TransformPass):
+    name = 'failing'
+    source = 'X86'
+    target = 'X86'
+
+    def run(self, prog, ctx):
+        ctx.get_result('build_interference')
+        raise Exception('failing')
+
+
+def test_a_compilation_after_one_that_raised():
+    failing = FailingPass()
+    m = manager(Validation(mode='on_failure'))
+    # right before allocate_registers, which uses the graph
+    m.transforms.insert(len(m.transforms) - 3, failing)
+    with pytest.raises(Exception, match='failing'):
+        m.run_validated(ast.parse('a = input_int()\nb = a + a\nprint(b - a)\n'), '4\n')
+    m.transforms.remove(failing)
+    # without its own graph, the allocator gives x and y the same register
+    m.run_validated(ast.parse('x = input_int()\ny = input_int()\nprint(x - y)\n'), '5\n2\n')